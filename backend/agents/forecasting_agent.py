@@ -39,6 +39,16 @@ class CongestionForecastingAgent:
         self.port_history[port_id] = historical_data
         logger.info(f"Historique enregistré pour {port_id}: {len(historical_data)} entrées")
     
+    def register_port_calls(self, port_calls: pd.DataFrame):
+        """
+        Enregistre l'historique de tous les ports à partir des escales détectées sur l'AIS
+        port_calls: sortie de AISDataProcessor.detect_port_calls
+        """
+        from data_engineering.port_calls import port_history_from_calls
+        
+        for port_id, history in port_history_from_calls(port_calls).items():
+            self.register_port_history(port_id, history)
+    
     def simple_moving_average_forecast(self, port_id: str, days_ahead: int = 3) -> Optional[float]:
         """
         Prévision simple par moyenne mobile
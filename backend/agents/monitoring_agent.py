@@ -8,6 +8,9 @@ from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 
+import numpy as np
+
+from data_engineering.geodesy import haversine_distance, haversine_one_to_many, haversine_matrix
 from models import (
     VesselSpec,
     OptimizedRoute,
@@ -43,15 +46,7 @@ class DeviationMonitoringAgent:
     @staticmethod
     def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Distance en km"""
-        from math import radians, cos, sin, asin, sqrt
-        lon1, lon2 = map(radians, [lon1, lon2])
-        lat1, lat2 = map(radians, [lat1, lat2])
-        dlon = lon2 - lon1
-        dlat = lat2 - lat1
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * asin(sqrt(a))
-        km = c * 6371
-        return km
+        return haversine_distance(lat1, lon1, lat2, lon2, unit='km')
     
     def register_voyage(self, vessel: VesselSpec, route: OptimizedRoute):
         """Enregistre un nouveau voyage actif"""
@@ -73,17 +68,19 @@ class DeviationMonitoringAgent:
                                                vessel_lon: float,
                                                voyage: ActiveVoyage) -> Optional[int]:
         """Trouve le waypoint le plus proche sur la route prévue"""
-        min_distance = float('inf')
-        closest_index = None
+        waypoints = voyage.planned_route.waypoints
+        
+        if not waypoints:
+            return None
         
-        for i, wp in enumerate(voyage.planned_route.waypoints):
-            distance = self.haversine_distance(vessel_lat, vessel_lon, 
-                                             wp.latitude, wp.longitude)
-            if distance < min_distance:
-                min_distance = distance
-                closest_index = i
+        distances = haversine_one_to_many(
+            vessel_lat, vessel_lon,
+            np.array([wp.latitude for wp in waypoints]),
+            np.array([wp.longitude for wp in waypoints]),
+            unit='km',
+        )
         
-        return closest_index
+        return int(np.argmin(distances))
     
     def detect_deviation(self, mmsi: str) -> Optional[ReroutingEvent]:
         """
@@ -142,28 +139,36 @@ class DeviationMonitoringAgent:
         storm_lat, storm_lon = storm_warning.get('location')
         storm_radius = storm_warning.get('radius_km', 100)
         
+        segments = voyage.planned_route.segments
+        if not segments:
+            return None
+        
         # Vérifier si la tempête coupe la route planifiée
-        for segment in voyage.planned_route.segments:
-            wp_to = segment.to_waypoint
-            distance_to_storm = self.haversine_distance(
-                wp_to.latitude, wp_to.longitude,
-                storm_lat, storm_lon
+        distances_to_storm = haversine_one_to_many(
+            storm_lat, storm_lon,
+            np.array([s.to_waypoint.latitude for s in segments]),
+            np.array([s.to_waypoint.longitude for s in segments]),
+            unit='km',
+        )
+        affected = np.flatnonzero(distances_to_storm < storm_radius)
+        
+        if len(affected):
+            wp_to = segments[affected[0]].to_waypoint
+            distance_to_storm = distances_to_storm[affected[0]]
+            
+            logger.warning(
+                f"Tempête affectant le passage de {voyage.vessel.name} "
+                f"à {wp_to.name} (distance: {distance_to_storm:.1f} km)"
             )
             
-            if distance_to_storm < storm_radius:
-                logger.warning(
-                    f"Tempête affectant le passage de {voyage.vessel.name} "
-                    f"à {wp_to.name} (distance: {distance_to_storm:.1f} km)"
-                )
-                
-                event = ReroutingEvent(
-                    vessel_mmsi=mmsi,
-                    trigger_type="storm",
-                    trigger_location=voyage.actual_positions[-1][:2],
-                    old_route=voyage.planned_route,
-                )
-                
-                return event
+            event = ReroutingEvent(
+                vessel_mmsi=mmsi,
+                trigger_type="storm",
+                trigger_location=voyage.actual_positions[-1][:2],
+                old_route=voyage.planned_route,
+            )
+            
+            return event
         
         return None
     
@@ -227,23 +232,27 @@ class CongestionBlockageDetector:
         """Vérifie si la route traverse des chokepoints bloqués"""
         blockages = []
         
-        for segment in route.segments:
-            wp = segment.to_waypoint
-            
-            for choke_name, choke_info in self.chokepoints.items():
-                choke_lat, choke_lon = choke_info['center']
-                
-                from optimization_engine.optimizer import WeightedAStarOptimizer
-                distance_km = WeightedAStarOptimizer.haversine_distance(
-                    wp.latitude, wp.longitude,
-                    choke_lat, choke_lon
-                ) * 1.852  # Convert NM to km
-                
-                if distance_km < choke_info['radius_km']:
-                    blockages.append({
-                        'chokepoint': choke_name,
-                        'reason': choke_info['blocked_reason'],
-                        'estimated_delay_hours': choke_info['typical_delay_hours'],
-                    })
+        if not route.segments:
+            return blockages
+        
+        chokepoints = list(self.chokepoints.items())
+        
+        # Matrice (segments x chokepoints) des distances en km
+        distances_km = haversine_matrix(
+            np.array([s.to_waypoint.latitude for s in route.segments]),
+            np.array([s.to_waypoint.longitude for s in route.segments]),
+            np.array([info['center'][0] for _, info in chokepoints]),
+            np.array([info['center'][1] for _, info in chokepoints]),
+            unit='km',
+        )
+        radii_km = np.array([info['radius_km'] for _, info in chokepoints])
+        
+        for _, choke_idx in np.argwhere(distances_km < radii_km):
+            choke_name, choke_info = chokepoints[choke_idx]
+            blockages.append({
+                'chokepoint': choke_name,
+                'reason': choke_info['blocked_reason'],
+                'estimated_delay_hours': choke_info['typical_delay_hours'],
+            })
         
         return blockages
@@ -2,7 +2,7 @@
 API REST pour AI Captain
 Endpoints pour requêtes d'optimisation, monitoring, et prédictions
 """
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
@@ -12,6 +12,8 @@ import logging
 import asyncio
 import sys
 import os
+from pathlib import Path
+import numpy as np
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -26,8 +28,14 @@ from models import (
     serialize_route,
 )
 from data_engineering.ais_processor import AISDataProcessor, GeospatialGraphBuilder
+from data_engineering.ais_cache import AISColumnarCache
+from data_engineering.traffic_density import TrafficDensityStore
+from data_engineering.ais_history import AISHistoryStore
 from data_engineering.maritime_graph_builder import create_maritime_network
-from optimization_engine.optimizer import WeightedAStarOptimizer
+from optimization_engine.k_shortest import DEFAULT_MAX_SIMILARITY
+from optimization_engine.optimizer import STANDARD_PRESETS, WeightedAStarOptimizer
+from optimization_engine.pareto import DEFAULT_EPSILON, select_alternatives
+from optimization_engine.route_cache import RouteCache
 from agents.monitoring_agent import DeviationMonitoringAgent, CongestionBlockageDetector
 from agents.forecasting_agent import CongestionForecastingAgent
 
@@ -55,6 +63,8 @@ waypoints_dict: Optional[Dict[str, WayPoint]] = None
 monitoring_agent: Optional[DeviationMonitoringAgent] = None
 forecasting_agent: Optional[CongestionForecastingAgent] = None
 blockage_detector: Optional[CongestionBlockageDetector] = None
+density_store: Optional[TrafficDensityStore] = None
+history_store: Optional[AISHistoryStore] = None
 
 
 # ==================== REQUEST/RESPONSE MODELS ====================
@@ -93,6 +103,7 @@ class OptimizationRequest(BaseModel):
     fuel_price_per_ton: float = 500.0
     avoid_piracy_zones: bool = True
     avoid_weather_risks: bool = True
+    bidirectional: bool = False  # Recherche avant + arrière (coût minimal)
 
 
 class PortCongestionForecastRequest(BaseModel):
@@ -110,12 +121,48 @@ class VesselPositionUpdate(BaseModel):
     timestamp: datetime
 
 
+class AISCacheBuildRequest(BaseModel):
+    """Pré-construction du cache colonnaire AIS pour un répertoire"""
+    directory: str
+    pattern: str = "*.json"
+    force: bool = False
+
+
+class TrafficDensityBuildRequest(BaseModel):
+    """Ingestion d'un fichier AIS dans les rasters de densité"""
+    source_path: str
+    force: bool = False
+
+
+class AISHistoryIngestRequest(BaseModel):
+    """Ingestion d'un fichier AIS dans l'historique local"""
+    source_path: str
+    force: bool = False
+
+
 # ==================== STARTUP/SHUTDOWN ====================
 
+def build_routing_indexes(build_missing: bool = True) -> bool:
+    """
+    Repères ALT et hiérarchies de contraction activés, rechargés depuis ROUTING_INDEX_DIR si à jour
+    build_missing=False: rechargement seul; retourne False s'il manque des index à construire
+    """
+    ready = True
+    if settings.ROUTING_HEURISTIC == 'landmarks':
+        indexes = optimizer.build_landmarks(n_landmarks=settings.ROUTING_LANDMARKS,
+                                            directory=settings.ROUTING_INDEX_DIR, build_missing=build_missing)
+        ready = ready and len(indexes) == len(STANDARD_PRESETS)
+    if settings.ROUTING_CONTRACTION:
+        indexes = optimizer.build_contraction_hierarchies(directory=settings.ROUTING_INDEX_DIR,
+                                                          build_missing=build_missing)
+        ready = ready and len(indexes) == len(STANDARD_PRESETS)
+    return ready
+
+
 @app.on_event("startup")
 async def startup_event():
     """Initialise les composants au démarrage"""
-    global optimizer, waypoints_dict, monitoring_agent, forecasting_agent, blockage_detector
+    global optimizer, waypoints_dict, monitoring_agent, forecasting_agent, blockage_detector, density_store, history_store
     
     logger.info(f"🚀 Démarrage de {settings.APP_NAME} v{settings.APP_VERSION}")
     
@@ -128,7 +175,15 @@ async def startup_event():
         logger.info(f"✅ Réseau créé: {graph.number_of_nodes()} nœuds, {graph.number_of_edges()} arêtes")
         
         # Initialiser l'optimiseur avec le graphe réaliste
-        optimizer = WeightedAStarOptimizer(graph, waypoints_dict)
+        route_cache = RouteCache(settings.ROUTE_CACHE_SIZE, settings.ROUTE_CACHE_TTL_SECONDS) \
+            if settings.ROUTE_CACHE_SIZE > 0 else None
+        optimizer = WeightedAStarOptimizer(graph, waypoints_dict, heuristic=settings.ROUTING_HEURISTIC,
+                                           route_cache=route_cache)
+        # Index persistés seulement: les index manquants ou périmés sont construits en tâche de
+        # fond (A* d'ici là) pour ne pas retarder le démarrage
+        if not build_routing_indexes(build_missing=False):
+            asyncio.get_running_loop().run_in_executor(None, build_routing_indexes)
+            logger.info("⏳ Index de routage en construction en tâche de fond")
         logger.info("✅ Optimiseur A* pondéré initialisé")
         
         # Initialiser les agents
@@ -137,8 +192,16 @@ async def startup_event():
         blockage_detector = CongestionBlockageDetector()
         logger.info("✅ Agents initialisés")
         
-        logger.info("✅ Tous les composants démarrés avec succès!\n")
+        density_store = TrafficDensityStore(
+            settings.TRAFFIC_DENSITY_DIR,
+            settings.TRAFFIC_DENSITY_RESOLUTION_DEG,
+            settings.TRAFFIC_DENSITY_TILE_CELLS,
+            settings.TRAFFIC_DENSITY_CACHE_TILES,
+        )
+        history_store = AISHistoryStore(settings.AIS_HISTORY_DB)
         
+        logger.info("✅ Tous les composants démarrés avec succès!\n")
+    
     except Exception as e:
         logger.error(f"❌ Erreur lors du démarrage: {e}", exc_info=True)
         raise
@@ -149,6 +212,8 @@ async def shutdown_event():
     """Arrête les composants"""
     if monitoring_agent:
         monitoring_agent.stop_monitoring()
+    if history_store:
+        history_store.close()
     logger.info("Arrêt de l'application")
 
 
@@ -208,19 +273,17 @@ async def optimize_route(request: OptimizationRequest):
             fuel_price_per_ton=request.fuel_price_per_ton,
         )
         
-        # Trouver le chemin optimal
-        path = optimizer.find_optimal_route(
+        # Trouver le chemin optimal et construire l'objet route (cache de routes)
+        route = optimizer.optimize_route(
             request.start_port_id,
             request.end_port_id,
             params,
+            bidirectional=request.bidirectional,
         )
         
-        if not path:
+        if not route:
             raise HTTPException(status_code=404, detail="No route found")
         
-        # Construire l'objet route
-        route = optimizer.construct_optimized_route(path, params)
-        
         # Vérifier les blocages de canaux
         blockages = blockage_detector.check_chokepoint_blockage(route)
         
@@ -248,44 +311,75 @@ async def optimize_route(request: OptimizationRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get(f"{settings.API_PREFIX}/route/alternatives")
-async def get_alternative_routes(start: str, end: str, num_alternatives: int = 3):
-    """Retourne plusieurs routes alternatives"""
+@app.post(f"{settings.API_PREFIX}/route/index/rebuild")
+async def rebuild_route_indexes(background_tasks: BackgroundTasks):
+    """
+    Reconstruit en tâche de fond les index de routage (repères ALT, hiérarchies de contraction)
+    après un blocage d'arête; d'ici là les requêtes passent par A*
+    """
     if not optimizer:
         raise HTTPException(status_code=503, detail="Optimizer not initialized")
     
+    background_tasks.add_task(build_routing_indexes)
+    
+    return {
+        "status": "scheduled",
+        "landmarks": settings.ROUTING_HEURISTIC == 'landmarks',
+        "contraction_hierarchies": settings.ROUTING_CONTRACTION,
+        "index_dir": settings.ROUTING_INDEX_DIR,
+    }
+
+
+@app.get(f"{settings.API_PREFIX}/route/alternatives")
+async def get_alternative_routes(start: str, end: str, num_alternatives: Optional[int] = Query(None, ge=1),
+                                 epsilon: float = Query(DEFAULT_EPSILON, ge=0.0),
+                                 k: Optional[int] = Query(None, ge=1, le=settings.ROUTE_ALTERNATIVES_MAX_K),
+                                 max_similarity: float = Query(DEFAULT_MAX_SIMILARITY, ge=0.0, le=1.0)):
+    """
+    Routes alternatives
+    - par défaut: routes non dominées (temps, coût, risque), calculées en une seule recherche;
+      epsilon (>= 0): deux routes à moins de (1 + epsilon) l'une de l'autre sur chaque objectif sont
+      confondues (num_alternatives >= 1 routes, 3 par défaut)
+    - k: les k meilleures routes par coût pondéré (Yen), chacune partageant au plus
+      max_similarity (dans [0, 1]) de son coût avec les précédentes (stratégies 'k-shortest-1',
+      'k-shortest-2'...); k <= ROUTE_ALTERNATIVES_MAX_K, exclusif de num_alternatives
+    """
+    if not optimizer or not waypoints_dict:
+        raise HTTPException(status_code=503, detail="Optimizer not initialized")
+    for port_id in (start, end):
+        if port_id not in waypoints_dict:
+            raise HTTPException(status_code=404, detail=f"Unknown port: {port_id}")
+    if k is not None and num_alternatives is not None:
+        raise HTTPException(status_code=400, detail="Use either k or num_alternatives, not both")
+    
     try:
-        alternatives = []
-        
-        # Générer plusieurs routes avec des pondérations différentes
-        weight_configs = [
-            {"time": 1.0, "cost": 1.0, "risk": 1.0},  # Équilibré
-            {"time": 2.0, "cost": 1.0, "risk": 1.0},  # Priorité temps
-            {"time": 1.0, "cost": 1.0, "risk": 2.0},  # Priorité sécurité
-        ]
+        params = OptimizationParams()
+        if k is not None:
+            routes = optimizer.k_shortest_routes(start, end, params, k=k, max_similarity=max_similarity)
+            selected = [(f"k-shortest-{i + 1}", path) for i, (path, _) in enumerate(routes)]
+        else:
+            routes = optimizer.pareto_routes(start, end, params, epsilon=epsilon)
+            n_routes = 3 if num_alternatives is None else num_alternatives
+            selected = [(strategy, path) for strategy, path, _ in select_alternatives(routes, n_routes)]
         
-        for i, weights in enumerate(weight_configs[:num_alternatives]):
-            params = OptimizationParams(
-                weight_time=weights["time"],
-                weight_cost=weights["cost"],
-                weight_risk=weights["risk"],
-            )
-            
-            path = optimizer.find_optimal_route(start, end, params)
-            if path:
-                route = optimizer.construct_optimized_route(path, params)
-                alternatives.append({
-                    "id": i,
-                    "strategy": list(weights.keys())[i],
-                    "metrics": {
-                        "distance": route.total_distance_nm,
-                        "time": route.estimated_time_hours,
-                        "cost": route.estimated_cost_usd,
-                        "risk": route.overall_risk_score,
-                    }
-                })
+        alternatives = []
+        for i, (strategy, path) in enumerate(selected):
+            route = optimizer.construct_optimized_route(path, params)
+            alternatives.append({
+                "id": i,
+                "strategy": strategy,
+                "waypoints": path,
+                "metrics": {
+                    "distance": route.total_distance_nm,
+                    "time": route.estimated_time_hours,
+                    "cost": route.estimated_cost_usd,
+                    "risk": route.overall_risk_score,
+                }
+            })
         
-        return {"alternatives": alternatives}
+        if k is not None:
+            return {"alternatives": alternatives}
+        return {"alternatives": alternatives, "pareto_front_size": len(routes)}
     
     except Exception as e:
         logger.error(f"Error in get_alternative_routes: {e}", exc_info=True)
@@ -303,13 +397,11 @@ async def register_voyage(vessel_request: VesselSpecRequest, start_port: str, en
     try:
         # Créer la route optimale
         params = OptimizationParams()
-        path = optimizer.find_optimal_route(start_port, end_port, params)
+        route = optimizer.optimize_route(start_port, end_port, params)
         
-        if not path:
+        if not route:
             raise HTTPException(status_code=404, detail="No route found")
         
-        route = optimizer.construct_optimized_route(path, params)
-        
         # Construire le VesselSpec
         vessel_dims = VesselDimensions(
             length_m=vessel_request.dimensions.length_m,
@@ -426,6 +518,137 @@ async def select_best_port(primary_port: str, alternatives: List[str], arrival_d
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ==================== AIS DATA ENDPOINTS ====================
+
+def resolve_ais_path(path: str) -> Path:
+    """Chemin AIS résolu (relatif à AIS_DATA_DIR ou absolu); 400 s'il sort de AIS_DATA_DIR"""
+    root = Path(settings.AIS_DATA_DIR).resolve()
+    resolved = (root / path).resolve()
+    if not resolved.is_relative_to(root):
+        raise HTTPException(status_code=400, detail=f"Path outside AIS data directory: {path}")
+    return resolved
+
+
+@app.post(f"{settings.API_PREFIX}/ais/cache/build")
+async def build_ais_cache(request: AISCacheBuildRequest, background_tasks: BackgroundTasks):
+    """Lance la pré-construction du cache AIS en tâche de fond"""
+    directory = resolve_ais_path(request.directory)
+    if Path(request.pattern).is_absolute() or '..' in Path(request.pattern).parts:
+        raise HTTPException(status_code=400, detail=f"Invalid pattern: {request.pattern}")
+    if not directory.is_dir():
+        raise HTTPException(status_code=404, detail=f"Directory not found: {request.directory}")
+    
+    cache = AISColumnarCache(settings.AIS_CACHE_DIR)
+    background_tasks.add_task(
+        cache.build_directory, directory, request.pattern, force=request.force
+    )
+    
+    return {
+        "status": "scheduled",
+        "directory": request.directory,
+        "pattern": request.pattern,
+        "cache_dir": settings.AIS_CACHE_DIR,
+    }
+
+
+@app.post(f"{settings.API_PREFIX}/ais/density/build")
+async def build_traffic_density(request: TrafficDensityBuildRequest, background_tasks: BackgroundTasks):
+    """Lance l'ingestion d'un fichier AIS dans les rasters de densité en tâche de fond"""
+    if density_store is None:
+        raise HTTPException(status_code=503, detail="Traffic density store not initialized")
+    source_path = resolve_ais_path(request.source_path)
+    if not source_path.is_file():
+        raise HTTPException(status_code=404, detail=f"File not found: {request.source_path}")
+    
+    background_tasks.add_task(density_store.ingest_source, source_path, force=request.force)
+    
+    return {
+        "status": "scheduled",
+        "source_path": request.source_path,
+        "density_dir": settings.TRAFFIC_DENSITY_DIR,
+    }
+
+
+@app.get(f"{settings.API_PREFIX}/ais/density")
+async def get_traffic_density(start_date: datetime, end_date: datetime,
+                              lat_min: float = -90.0, lon_min: float = -180.0,
+                              lat_max: float = 90.0, lon_max: float = 180.0):
+    """
+    Densité de trafic AIS sommée sur [start_date, end_date] dans une emprise
+    Réponse creuse: [latitude, longitude, pings] des cellules non vides (coin sud-ouest)
+    """
+    if density_store is None:
+        raise HTTPException(status_code=503, detail="Traffic density store not initialized")
+    
+    try:
+        raster, extent = density_store.query(start_date, end_date, (lat_min, lon_min, lat_max, lon_max))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    rows, cols = np.nonzero(raster)
+    resolution = density_store.resolution_deg
+    return {
+        "start_date": start_date.date().isoformat(),
+        "end_date": end_date.date().isoformat(),
+        "resolution_deg": resolution,
+        "extent": {"lat_min": extent[0], "lon_min": extent[1], "lat_max": extent[2], "lon_max": extent[3]},
+        "shape": list(raster.shape),
+        "total": float(raster.sum()),
+        "cells": [
+            [round(extent[0] + r * resolution, 6), round(extent[1] + c * resolution, 6), float(raster[r, c])]
+            for r, c in zip(rows.tolist(), cols.tolist())
+        ],
+        "tile_cache": density_store.cache.info(),
+    }
+
+
+@app.post(f"{settings.API_PREFIX}/ais/history/ingest")
+async def ingest_ais_history(request: AISHistoryIngestRequest, background_tasks: BackgroundTasks):
+    """Lance l'ingestion d'un fichier AIS dans l'historique local en tâche de fond"""
+    if history_store is None:
+        raise HTTPException(status_code=503, detail="AIS history store not initialized")
+    source_path = resolve_ais_path(request.source_path)
+    if not source_path.is_file():
+        raise HTTPException(status_code=404, detail=f"File not found: {request.source_path}")
+    
+    background_tasks.add_task(history_store.ingest_source, source_path, force=request.force)
+    
+    return {
+        "status": "scheduled",
+        "source_path": request.source_path,
+        "database": settings.AIS_HISTORY_DB,
+    }
+
+
+@app.get(f"{settings.API_PREFIX}/ais/history")
+async def query_ais_history(mmsi: Optional[str] = None,
+                            start_date: Optional[datetime] = None,
+                            end_date: Optional[datetime] = None,
+                            lat_min: float = -90.0, lon_min: float = -180.0,
+                            lat_max: float = 90.0, lon_max: float = 180.0,
+                            limit: int = 10_000):
+    """Pings historiques par navire, fenêtre temporelle et emprise (triés par MMSI puis date)"""
+    if history_store is None:
+        raise HTTPException(status_code=503, detail="AIS history store not initialized")
+    
+    try:
+        pings = history_store.query(
+            mmsi, start_date, end_date, (lat_min, lon_min, lat_max, lon_max), limit=limit + 1
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    truncated = len(pings) > limit
+    pings = pings.iloc[:limit]
+    pings['TSTAMP'] = pings['TSTAMP'].dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+    
+    return {
+        "count": len(pings),
+        "truncated": truncated,
+        "pings": pings.replace({np.nan: None}).to_dict('records'),
+    }
+
+
 # ==================== STATISTICS ENDPOINTS ====================
 
 @app.get(f"{settings.API_PREFIX}/system/status")
@@ -442,6 +665,7 @@ async def system_status():
         "status": "operational",
         "graph": graph_stats,
         "active_voyages": len(monitoring_agent.active_voyages) if monitoring_agent else 0,
+        "route_cache": optimizer.route_cache.info() if optimizer and optimizer.route_cache is not None else None,
         "timestamp": datetime.now().isoformat(),
     }
 
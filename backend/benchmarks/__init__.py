@@ -0,0 +1 @@
+# Benchmarks de performance (lancer depuis backend/: python -m benchmarks.<script>)
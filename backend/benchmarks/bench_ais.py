@@ -0,0 +1,310 @@
+"""
+Benchmark du pipeline AIS
+Usage: python -m benchmarks.bench_ais --sizes 1000000 10000000 50000000
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_ais_frame, synthetic_track_frame
+from data_engineering.ais_processor import (
+    AISDataProcessor,
+    GeospatialGraphBuilder,
+    compact_ais_frame,
+    frame_bytes_per_million_rows,
+)
+from models import WayPoint
+from data_engineering.parallel import ShardTiming, shard_skew
+from data_engineering.quality import filter_ais_quality
+from data_engineering.port_calls import detect_port_calls
+from data_engineering.traffic_density import TrafficDensityStore
+from data_engineering.ais_history import AISHistoryStore
+
+
+def bench_segmentation(sizes, loop_size: int):
+    """Débit (pings/s) de la segmentation vectorisée, et de la boucle sur un petit échantillon"""
+    print("=== create_voyage_segments ===")
+    
+    processor = AISDataProcessor("synthetic")
+    
+    if loop_size:
+        processor.raw_data = synthetic_ais_frame(loop_size, n_vessels=50)
+        start = time.perf_counter()
+        segments = processor.create_voyage_segments(vectorized=False)
+        elapsed = time.perf_counter() - start
+        print(f"  loop       {loop_size:>12,} pings  {elapsed:8.2f}s  "
+              f"{loop_size / elapsed:>14,.0f} pings/s  ({len(segments):,} segments)")
+    
+    for n in sizes:
+        processor.raw_data = synthetic_ais_frame(n)
+        start = time.perf_counter()
+        segments = processor.create_voyage_segments(vectorized=True)
+        elapsed = time.perf_counter() - start
+        print(f"  vectorized {n:>12,} pings  {elapsed:8.2f}s  "
+              f"{n / elapsed:>14,.0f} pings/s  ({len(segments):,} segments)")
+        processor.raw_data = processor.processed_data = None
+
+
+def bench_edge_statistics(sizes, loop_size: int):
+    """Débit (segments/s) de l'agrégation par arête"""
+    print("=== compute_edge_statistics ===")
+    
+    processor = AISDataProcessor("synthetic")
+    runs = [(loop_size, False)] if loop_size else []
+    runs += [(n, True) for n in sizes]
+    
+    for n, vectorized in runs:
+        processor.raw_data = synthetic_ais_frame(n, n_vessels=50 if not vectorized else 2000)
+        segments = processor.create_voyage_segments()
+        start = time.perf_counter()
+        stats = processor.compute_edge_statistics(vectorized=vectorized)
+        elapsed = time.perf_counter() - start
+        label = "vectorized" if vectorized else "loop"
+        print(f"  {label:<10} {len(segments):>12,} segs   {elapsed:8.2f}s  "
+              f"{len(segments) / elapsed:>14,.0f} segs/s   ({len(stats):,} arêtes)")
+        processor.raw_data = processor.processed_data = None
+
+
+def bench_memory(sizes):
+    """Empreinte mémoire par million de lignes et débit de segmentation selon le profil de types"""
+    print("=== profil mémoire ===")
+    
+    processor = AISDataProcessor("synthetic")
+    
+    for n in sizes:
+        frame = synthetic_ais_frame(n)
+        for label, df in (("défaut", frame), ("compact", compact_ais_frame(frame))):
+            processor.raw_data = df
+            start = time.perf_counter()
+            processor.create_voyage_segments(drop_raw=True)
+            elapsed = time.perf_counter() - start
+            print(f"  {label:<8} {n:>12,} pings  {frame_bytes_per_million_rows(df) / 1e6:8.1f} Mo/M lignes  "
+                  f"{n / elapsed:>14,.0f} pings/s")
+            processor.processed_data = None
+        del frame, df
+
+
+def bench_quality(sizes):
+    """Coût du filtre qualité et volume écarté (1% de doublons et 0.1% de sauts GPS injectés)"""
+    print("=== filtre qualité ===")
+    
+    for n in sizes:
+        frame = synthetic_track_frame(n)
+        rng = np.random.default_rng(1)
+        duplicates = frame.iloc[rng.integers(0, n, n // 100)]
+        teleports = rng.integers(0, n, n // 1000)
+        frame.loc[teleports, 'LATITUDE'] += rng.choice([-3.0, 3.0], len(teleports))
+        frame = pd.concat([frame, duplicates], ignore_index=True)
+        
+        start = time.perf_counter()
+        filtered, counts = filter_ais_quality(frame)
+        elapsed = time.perf_counter() - start
+        print(f"  {len(frame):>12,} pings  {elapsed:8.2f}s  {len(frame) / elapsed:>14,.0f} pings/s  "
+              f"-> {len(filtered):,} ({', '.join(f'{k}={v:,}' for k, v in counts.items() if v)})")
+
+
+def bench_simplification(sizes, tolerances):
+    """Segments produits et temps segmentation + agrégation, avec ou sans Douglas-Peucker"""
+    print("=== simplification des trajectoires ===")
+    
+    processor = AISDataProcessor("synthetic")
+    
+    for n in sizes:
+        processor.raw_data = synthetic_track_frame(n)
+        for tolerance in [None] + list(tolerances):
+            start = time.perf_counter()
+            segments = processor.create_voyage_segments(simplify_tolerance_nm=tolerance)
+            stats = processor.compute_edge_statistics(min_observations=1)
+            elapsed = time.perf_counter() - start
+            label = "aucune" if tolerance is None else f"{tolerance} NM"
+            print(f"  {label:<8} {n:>12,} pings  {len(segments):>12,} segs  {elapsed:8.2f}s  "
+                  f"({len(stats):,} arêtes)")
+        processor.raw_data = processor.processed_data = None
+
+
+def bench_edge_profiles(sizes, n_lookups: int = 100_000):
+    """Construction des profils temporels et coût d'une recherche (arête, instant)"""
+    print("=== profils temporels des arêtes ===")
+    
+    processor = AISDataProcessor("synthetic")
+    
+    for n in sizes:
+        processor.raw_data = synthetic_track_frame(n)
+        processor.create_voyage_segments(simplify_tolerance_nm=0.5, drop_raw=True)
+        start = time.perf_counter()
+        profiles = processor.compute_edge_profiles(min_observations=1)
+        build = time.perf_counter() - start
+        
+        rng = np.random.default_rng(0)
+        edge_ids = rng.integers(0, len(profiles), n_lookups).tolist()
+        when = [pd.Timestamp('2024-01-01') + pd.Timedelta(hours=int(h)) for h in rng.integers(0, 8760, 1000)]
+        start = time.perf_counter()
+        for i, edge_id in enumerate(edge_ids):
+            profiles.travel_time_at(edge_id, when[i % 1000])
+        lookup = (time.perf_counter() - start) / n_lookups
+        print(f"  {len(processor.processed_data):>12,} segs  construction {build:6.2f}s  "
+              f"{profiles.nbytes / 1e6:8.1f} Mo  recherche {lookup * 1e6:6.2f} µs")
+        processor.processed_data = None
+
+
+def bench_graph_snapping(sizes, n_waypoints: int):
+    """Rattachement des arêtes AIS à un graphe de n_waypoints et ajout en masse"""
+    print(f"=== snap_edges_to_graph ({n_waypoints:,} waypoints) ===")
+    
+    rng = np.random.default_rng(0)
+    builder = GeospatialGraphBuilder()
+    for i, (lat, lon) in enumerate(zip(rng.uniform(-60, 60, n_waypoints), rng.uniform(-180, 180, n_waypoints))):
+        builder.add_waypoint(WayPoint(f"W{i}", f"W{i}", float(lat), float(lon), "waypoint"))
+    
+    processor = AISDataProcessor("synthetic")
+    for n in sizes:
+        processor.raw_data = synthetic_ais_frame(n)
+        segments = processor.create_voyage_segments(drop_raw=True)
+        start = time.perf_counter()
+        written = processor.snap_edges_to_graph(builder, radius_nm=200, min_observations=1)
+        elapsed = time.perf_counter() - start
+        print(f"  {len(segments):>12,} segs   {elapsed:8.2f}s  "
+              f"{len(segments) / elapsed:>14,.0f} segs/s   ({written:,} arêtes du graphe)")
+        processor.processed_data = None
+
+
+def bench_port_calls(sizes, n_ports: int = 2_000):
+    """Détection des escales: arrêts de 6h toutes les 24h, ports placés sur une partie des arrêts"""
+    print(f"=== detect_port_calls ({n_ports:,} ports) ===")
+    
+    rng = np.random.default_rng(0)
+    for n in sizes:
+        frame = synthetic_track_frame(n)
+        hour = frame['TSTAMP'].dt.hour.to_numpy()
+        stopped = hour < 6
+        frame.loc[stopped, 'SOG'] = rng.uniform(0, 0.8, int(stopped.sum()))
+        sample = rng.choice(np.flatnonzero(stopped), size=min(n_ports, int(stopped.sum())), replace=False)
+        ports = {
+            f"P{i}": WayPoint(f"P{i}", f"P{i}", float(frame['LATITUDE'].iat[j]),
+                              float(frame['LONGITUDE'].iat[j]), "port")
+            for i, j in enumerate(sample)
+        }
+        
+        start = time.perf_counter()
+        calls = detect_port_calls(frame, ports)
+        elapsed = time.perf_counter() - start
+        print(f"  {n:>12,} pings  {elapsed:8.2f}s  {n / elapsed:>14,.0f} pings/s   ({len(calls):,} escales)")
+
+
+def bench_traffic_density(sizes):
+    """Ingestion des rasters journaliers puis requêtes (mondiale et régionale, cache froid/chaud)"""
+    print("=== TrafficDensityStore (0.1°, tuiles 256x256) ===")
+    
+    for n in sizes:
+        frame = synthetic_track_frame(n)
+        with tempfile.TemporaryDirectory() as root:
+            store = TrafficDensityStore(root)
+            start = time.perf_counter()
+            store.ingest_pings(frame)
+            ingest = time.perf_counter() - start
+            
+            first, last = frame['TSTAMP'].min(), frame['TSTAMP'].max()
+            timings = []
+            for bbox in [(-90.0, -180.0, 90.0, 180.0), (-10.0, 90.0, 10.0, 120.0)]:
+                store.cache.clear()
+                start = time.perf_counter()
+                store.query(first, last, bbox)
+                timings.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            store.query(first, last, (-10.0, 90.0, 10.0, 120.0))
+            timings.append(time.perf_counter() - start)
+            
+            print(f"  {n:>12,} pings  ingestion {ingest:6.2f}s ({n / ingest:>12,.0f} pings/s, "
+                  f"{len(store.days())} jours)  monde {timings[0]:5.2f}s  "
+                  f"région {timings[1] * 1e3:6.1f} ms (cache chaud {timings[2] * 1e3:6.1f} ms)")
+
+
+def bench_history(n_pings: int, n_vessels: int = 50):
+    """Historique SQLite: ingestion puis latence des requêtes (un an de pings à 5 min par navire)"""
+    print(f"=== AISHistoryStore ({n_pings:,} pings, {n_vessels} navires) ===")
+    
+    frame = synthetic_track_frame(n_pings, n_vessels=n_vessels)
+    with tempfile.TemporaryDirectory() as root:
+        store = AISHistoryStore(f"{root}/history.sqlite")
+        start = time.perf_counter()
+        for offset in range(0, len(frame), 1_000_000):
+            store.ingest(frame.iloc[offset:offset + 1_000_000])
+        ingest = time.perf_counter() - start
+        stats = store.stats()
+        print(f"  ingestion {ingest:6.2f}s ({n_pings / ingest:,.0f} pings/s)  {stats}")
+        
+        mmsi = frame['MMSI'].iloc[0]
+        center = frame.iloc[len(frame) // 2]
+        lat, lon = float(center['LATITUDE']), float(center['LONGITUDE'])
+        week = (pd.Timestamp('2024-06-01'), pd.Timestamp('2024-06-08'))
+        queries = {
+            'navire, 1 semaine': dict(mmsi=mmsi, start=week[0], end=week[1]),
+            'navire, toute la période': dict(mmsi=mmsi),
+            'emprise 2°, toute la période': dict(bbox=(lat - 1, lon - 1, lat + 1, lon + 1)),
+            'emprise 20°, 1 semaine': dict(bbox=(lat - 10, lon - 10, lat + 10, lon + 10), start=week[0], end=week[1]),
+        }
+        for label, query in queries.items():
+            start = time.perf_counter()
+            result = store.query(**query)
+            print(f"  {label:<30} {(time.perf_counter() - start) * 1e3:8.1f} ms  {len(result):>10,} pings")
+        store.close()
+
+
+def bench_parallel(size: int, workers):
+    """Passage à l'échelle de compute_edge_statistics_parallel selon le nombre de workers"""
+    print(f"=== compute_edge_statistics_parallel ({size:,} pings) ===")
+    
+    processor = AISDataProcessor("synthetic")
+    processor.raw_data = synthetic_ais_frame(size)
+    baseline = None
+    
+    for n_workers in workers:
+        start = time.perf_counter()
+        processor.compute_edge_statistics_parallel(n_workers=n_workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        skew = shard_skew([ShardTiming(**shard) for shard in processor.shard_report])
+        print(f"  {n_workers:>3} workers  {elapsed:8.2f}s  {size / elapsed:>14,.0f} pings/s  "
+              f"speedup x{baseline / elapsed:5.2f}  skew pings {skew['pings']:.2f} / temps {skew['seconds']:.2f}")
+        for shard in processor.shard_report:
+            print(f"      shard {shard['shard_id']:>3}: {shard['pings']:>10,} pings  {shard['seconds']:6.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du pipeline AIS")
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1_000_000, 10_000_000, 50_000_000],
+                        help='Nombres de pings à traiter')
+    parser.add_argument('--loop-size', type=int, default=20_000,
+                        help='Taille de l\'échantillon pour la boucle historique (0 = ignorer)')
+    parser.add_argument('--workers', type=int, nargs='*', default=[1, 2, 4, 8],
+                        help='Nombres de workers pour le mode parallèle (vide = ignorer)')
+    parser.add_argument('--tolerances', type=float, nargs='*', default=[0.1, 0.5, 1.0],
+                        help='Tolérances Douglas-Peucker (NM) à comparer')
+    parser.add_argument('--waypoints', type=int, default=20_000,
+                        help='Waypoints du graphe pour le rattachement AIS')
+    parser.add_argument('--history-size', type=int, default=5_000_000,
+                        help='Pings de l\'historique SQLite (50 navires: ~1 an de pings à 5 min)')
+    parser.add_argument('--parallel-size', type=int, default=10_000_000,
+                        help='Nombre de pings pour le benchmark parallèle')
+    args = parser.parse_args()
+    
+    bench_segmentation(args.sizes, args.loop_size)
+    bench_edge_statistics(args.sizes, args.loop_size)
+    bench_memory(args.sizes)
+    bench_quality(args.sizes)
+    bench_simplification(args.sizes, args.tolerances)
+    bench_edge_profiles(args.sizes)
+    bench_graph_snapping(args.sizes, args.waypoints)
+    bench_port_calls(args.sizes)
+    bench_traffic_density(args.sizes)
+    bench_history(args.history_size)
+    if args.workers:
+        bench_parallel(args.parallel_size, args.workers)
+
+
+if __name__ == "__main__":
+    main()
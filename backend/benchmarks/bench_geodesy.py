@@ -0,0 +1,81 @@
+"""
+Microbenchmark du noyau géodésique: boucle scalaire historique vs noyaux NumPy
+Usage: python -m benchmarks.bench_geodesy --pairs 1000000 --fleet 5000 --waypoints 2000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from data_engineering.geodesy import haversine_distance, haversine_one_to_many, haversine_matrix
+from data_engineering.spatial_index import WaypointIndex
+
+
+def legacy_haversine(lat1, lon1, lat2, lon2):
+    """Copie de l'ancienne implémentation scalaire (import de math à chaque appel)"""
+    from math import radians, cos, sin, asin, sqrt
+    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
+    c = 2 * asin(sqrt(a))
+    return c * 3440.065
+
+
+def timed(label: str, n_ops: int, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<32} {elapsed * 1000:10.1f} ms  {elapsed / n_ops * 1e9:8.1f} ns/distance")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark haversine")
+    parser.add_argument('--pairs', type=int, default=1_000_000, help='Paires (distance élément par élément)')
+    parser.add_argument('--fleet', type=int, default=5_000, help='Navires (matrice navires x waypoints)')
+    parser.add_argument('--waypoints', type=int, default=2_000, help='Waypoints')
+    parser.add_argument('--snap', type=int, default=1_000_000, help='Positions à rattacher au waypoint le plus proche')
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    lat1, lat2 = rng.uniform(-80, 80, (2, args.pairs))
+    lon1, lon2 = rng.uniform(-180, 180, (2, args.pairs))
+    
+    print(f"=== Paires: {args.pairs:,} ===")
+    lists = [a.tolist() for a in (lat1, lon1, lat2, lon2)]
+    timed("scalaire historique", args.pairs,
+          lambda: [legacy_haversine(*p) for p in zip(*lists)])
+    timed("geodesy scalaire", args.pairs,
+          lambda: [haversine_distance(*p) for p in zip(*lists)])
+    timed("geodesy vectorisé", args.pairs,
+          lambda: haversine_distance(lat1, lon1, lat2, lon2))
+    
+    fleet_lat = rng.uniform(-80, 80, args.fleet)
+    fleet_lon = rng.uniform(-180, 180, args.fleet)
+    wp_lat = rng.uniform(-80, 80, args.waypoints)
+    wp_lon = rng.uniform(-180, 180, args.waypoints)
+    n_ops = args.fleet * args.waypoints
+    
+    print(f"=== Matrice: {args.fleet:,} navires x {args.waypoints:,} waypoints ===")
+    timed("one-to-many par navire", n_ops,
+          lambda: [haversine_one_to_many(la, lo, wp_lat, wp_lon) for la, lo in zip(fleet_lat, fleet_lon)])
+    timed("many-to-many", n_ops,
+          lambda: haversine_matrix(fleet_lat, fleet_lon, wp_lat, wp_lon))
+    
+    print(f"=== Plus proche waypoint: {args.snap:,} positions x {args.waypoints:,} waypoints ===")
+    snap_lat = rng.uniform(-80, 80, args.snap)
+    snap_lon = rng.uniform(-180, 180, args.snap)
+    sample = min(args.snap, 10_000)
+    elapsed = timed(f"argmin linéaire ({sample:,})", sample * args.waypoints,
+                    lambda: [np.argmin(haversine_one_to_many(la, lo, wp_lat, wp_lon))
+                             for la, lo in zip(snap_lat[:sample], snap_lon[:sample])])
+    print(f"  {'-> estimation pour toutes':<32} {elapsed * args.snap / sample:10.1f} s")
+    start = time.perf_counter()
+    index = WaypointIndex(np.arange(args.waypoints), wp_lat, wp_lon)
+    index.nearest(snap_lat, snap_lon)
+    print(f"  {'KD-tree (construction + requêtes)':<32} {(time.perf_counter() - start) * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
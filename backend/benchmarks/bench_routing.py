@@ -0,0 +1,339 @@
+"""
+Benchmark du moteur de routage sur graphes synthétiques
+Usage: python -m benchmarks.bench_routing --sizes 10000 100000 --queries 20
+"""
+import argparse
+import logging
+import time
+from datetime import datetime
+from itertools import islice
+
+import networkx as nx
+import numpy as np
+
+from benchmarks.synthetic import synthetic_route_graph
+from data_engineering.maritime_graph_builder import create_maritime_network
+from models import OptimizationParams
+from optimization_engine.k_shortest import DEFAULT_MAX_SIMILARITY
+from optimization_engine.landmarks import DEFAULT_LANDMARKS, LandmarkIndex
+from optimization_engine.optimizer import STANDARD_PRESETS, WeightedAStarOptimizer, cost_params_key
+from optimization_engine.route_cache import RouteCache
+
+
+def random_queries(waypoints, n_queries: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    ids = list(waypoints)
+    return [tuple(rng.choice(ids, size=2, replace=False)) for _ in range(n_queries)]
+
+
+def bench_backends(sizes, n_queries: int):
+    """Latence et ns par arête relâchée: parcours networkx vs graphe compilé CSR"""
+    print("=== find_optimal_route: networkx vs CSR ===")
+    params = OptimizationParams()
+    
+    for n in sizes:
+        graph, waypoints = synthetic_route_graph(n)
+        optimizer = WeightedAStarOptimizer(graph, waypoints)
+        queries = random_queries(waypoints, n_queries)
+        start = time.perf_counter()
+        optimizer.find_optimal_route(*queries[0], params, max_iterations=10 ** 9)
+        compile_time = time.perf_counter() - start
+        
+        results = {}
+        for backend in WeightedAStarOptimizer.BACKENDS:
+            elapsed, relaxed, paths = 0.0, 0, []
+            for a, b in queries:
+                start = time.perf_counter()
+                paths.append(optimizer.find_optimal_route(a, b, params, max_iterations=10 ** 9, backend=backend))
+                elapsed += time.perf_counter() - start
+                relaxed += optimizer.last_search_stats['relaxed']
+            results[backend] = (elapsed, relaxed, paths)
+        
+        identical = sum(p == q for p, q in zip(results['csr'][2], results['networkx'][2]))
+        print(f"  {n:>9,} nœuds  compilation + 1re requête {compile_time:5.2f}s  chemins identiques {identical}/{n_queries}")
+        for backend, (elapsed, relaxed, _) in results.items():
+            print(f"    {backend:<9} {elapsed / n_queries * 1e3:9.2f} ms/requête  "
+                  f"{relaxed / n_queries:>10,.0f} arêtes  {elapsed / max(relaxed, 1) * 1e9:7.0f} ns/arête")
+        print(f"    accélération x{results['networkx'][0] / results['csr'][0]:.1f}")
+
+
+def bench_cost_vector(sizes):
+    """Vecteur de coût: compute_edge_cost arête par arête vs passe vectorisée vs mémo"""
+    print("=== edge_cost_vector ===")
+    params = OptimizationParams()
+    
+    for n in sizes:
+        graph, waypoints = synthetic_route_graph(n)
+        optimizer = WeightedAStarOptimizer(graph, waypoints)
+        csr = optimizer.compiled_graph
+        now = datetime.now()
+        
+        start = time.perf_counter()
+        for u, v in zip(csr.sources.tolist(), csr.targets.tolist()):
+            optimizer.compute_edge_cost(csr.node_ids[u], csr.node_ids[v], params, now)
+        scalar = time.perf_counter() - start
+        start = time.perf_counter()
+        optimizer.edge_cost_vector(params)
+        vectorized = time.perf_counter() - start
+        start = time.perf_counter()
+        optimizer.edge_cost_vector(OptimizationParams())
+        memoized = time.perf_counter() - start
+        print(f"  {csr.n_edges:>9,} arêtes  par arête {scalar:6.2f}s  vectorisé {vectorized * 1e3:7.1f} ms  "
+              f"mémoïsé {memoized * 1e6:5.1f} µs")
+
+
+def bench_heuristic(sizes, n_queries: int, n_destinations: int = 5):
+    """Tables d'heuristique: requêtes vers quelques destinations, 1er passage vs passage répété"""
+    print("=== heuristic_table: destinations récurrentes ===")
+    params = OptimizationParams()
+    
+    for n in sizes:
+        graph, waypoints = synthetic_route_graph(n)
+        optimizer = WeightedAStarOptimizer(graph, waypoints)
+        destinations = [b for _, b in random_queries(waypoints, n_destinations, seed=1)]
+        origins = [a for a, _ in random_queries(waypoints, n_queries)]
+        queries = [(a, destinations[i % n_destinations]) for i, a in enumerate(origins) if a != destinations[i % n_destinations]]
+        optimizer.find_optimal_route(*random_queries(waypoints, 1, seed=2)[0], params, max_iterations=10 ** 9)
+        
+        timings = []
+        for _ in range(2):
+            start = time.perf_counter()
+            for a, b in queries:
+                optimizer.find_optimal_route(a, b, params, max_iterations=10 ** 9)
+            timings.append((time.perf_counter() - start) / len(queries) * 1e3)
+        print(f"  {n:>9,} nœuds  {n_destinations} destinations  1er passage {timings[0]:7.2f} ms/requête  "
+              f"répété {timings[1]:7.2f} ms/requête  cache {optimizer.heuristic_cache_stats}")
+
+
+def bench_landmarks(sizes, n_queries: int, n_landmarks: int = DEFAULT_LANDMARKS):
+    """
+    Nœuds développés et latence (moyenne, p99) par heuristique, coût relatif au coût exact
+    geodesic: heuristique historique (non admissible); borne géodésique seule et ALT: exactes
+    """
+    print("=== heuristiques: géodésique vs borne géodésique seule vs repères ALT ===")
+    params = OptimizationParams()
+    
+    for n in sizes:
+        graph, waypoints = synthetic_route_graph(n)
+        optimizer = WeightedAStarOptimizer(graph, waypoints)
+        queries = random_queries(waypoints, n_queries)
+        csr = optimizer.compiled_graph
+        costs = optimizer.edge_cost_vector(params)
+        start = time.perf_counter()
+        landmarks = optimizer.build_landmarks({'balanced': params}, n_landmarks)['balanced']
+        print(f"  {n:>9,} nœuds  {landmarks.n_landmarks} repères construits en {time.perf_counter() - start:5.2f}s")
+        
+        def path_cost(path):
+            return float(costs[csr.path_edges([csr.index[node] for node in path])].sum())
+        
+        variants = [
+            ('ALT', 'landmarks', landmarks),
+            ('borne seule', 'landmarks', LandmarkIndex.build(csr, costs, 0)),
+            ('geodesic', 'geodesic', landmarks),
+        ]
+        exact_costs = None
+        for label, mode, index in variants:
+            optimizer.landmark_indexes[cost_params_key(params)] = index
+            latencies, expanded, path_costs = [], 0, []
+            for a, b in queries:
+                start = time.perf_counter()
+                path = optimizer.find_optimal_route(a, b, params, max_iterations=10 ** 9, heuristic=mode)
+                latencies.append(time.perf_counter() - start)
+                expanded += optimizer.last_search_stats['expanded']
+                path_costs.append(path_cost(path))
+            exact_costs = exact_costs or path_costs
+            excess = np.mean(np.array(path_costs) / np.array(exact_costs)) - 1
+            print(f"    {label:<12} {expanded / n_queries:>9,.0f} nœuds  {np.mean(latencies) * 1e3:8.2f} ms  "
+                  f"p99 {np.percentile(latencies, 99) * 1e3:8.2f} ms  surcoût {excess:6.1%}")
+
+
+def bench_bidirectional(sizes, n_queries: int, n_landmarks: int = DEFAULT_LANDMARKS):
+    """Recherche exacte avant vs bidirectionnelle: sans borne (Dijkstra), borne géodésique, repères ALT"""
+    print("=== A* exact: recherche avant vs bidirectionnelle ===")
+    params = OptimizationParams()
+    
+    for n in sizes:
+        graph, waypoints = synthetic_route_graph(n)
+        optimizer = WeightedAStarOptimizer(graph, waypoints, heuristic='landmarks')
+        queries = random_queries(waypoints, n_queries)
+        csr = optimizer.compiled_graph
+        costs = optimizer.edge_cost_vector(params)
+        landmarks = LandmarkIndex.build(csr, costs, n_landmarks)
+        print(f"  {n:>9,} nœuds")
+        
+        no_bound = LandmarkIndex.build(csr, costs, 0)
+        no_bound.geodesic_rate = 0.0
+        variants = [('Dijkstra', no_bound), ('borne seule', LandmarkIndex.build(csr, costs, 0)), ('ALT', landmarks)]
+        for label, index in variants:
+            optimizer.landmark_indexes[cost_params_key(params)] = index
+            path_costs = {}
+            for bidirectional in (False, True):
+                latencies, expanded, path_costs[bidirectional] = [], 0, []
+                for a, b in queries:
+                    start = time.perf_counter()
+                    path = optimizer.find_optimal_route(a, b, params, max_iterations=10 ** 9, bidirectional=bidirectional)
+                    latencies.append(time.perf_counter() - start)
+                    expanded += optimizer.last_search_stats['expanded']
+                    path_costs[bidirectional].append(costs[csr.path_edges([csr.index[node] for node in path])].sum())
+                mode = 'bidirect.' if bidirectional else 'avant'
+                print(f"    {label:<12} {mode:<10} {expanded / n_queries:>9,.0f} nœuds  "
+                      f"{np.mean(latencies) * 1e3:8.2f} ms  p99 {np.percentile(latencies, 99) * 1e3:8.2f} ms")
+            identical = np.isclose(path_costs[False], path_costs[True], rtol=1e-9).sum()
+            print(f"    {label:<12} coûts identiques {identical}/{n_queries}")
+
+
+def bench_hierarchy(sizes, n_queries: int):
+    """
+    Hiérarchie de contraction vs A* (heuristique historique, repères ALT): construction,
+    latence et coût; réseau maritime (toutes les paires de ports) puis graphes synthétiques
+    """
+    print("=== hiérarchie de contraction ===")
+    params = OptimizationParams()
+    graphs = [('réseau maritime', create_maritime_network(), None)]
+    graphs += [(f"{n:,} nœuds", synthetic_route_graph(n), n_queries) for n in sizes]
+    
+    for label, (graph, waypoints), count in graphs:
+        optimizer = WeightedAStarOptimizer(graph, waypoints)
+        csr = optimizer.compiled_graph
+        costs = optimizer.edge_cost_vector(params)
+        if count is None:
+            ports = [node for node, wp in waypoints.items() if wp.port_type == 'port']
+            queries = [(a, b) for a in ports for b in ports if a != b]
+        else:
+            queries = random_queries(waypoints, count)
+        start = time.perf_counter()
+        hierarchy = optimizer.build_contraction_hierarchies({'balanced': params})['balanced']
+        optimizer.build_landmarks({'balanced': params})
+        print(f"  {label}  construction {time.perf_counter() - start:6.1f}s  "
+              f"{hierarchy.n_shortcuts:,} raccourcis pour {csr.n_edges:,} arêtes")
+        
+        exact_costs = None
+        for mode, kwargs in [('CH', {}), ('A* ALT', {'heuristic': 'landmarks', 'hierarchy': False}),
+                             ('A* geodesic', {'hierarchy': False})]:
+            latencies, expanded, path_costs = [], 0, []
+            for a, b in queries:
+                start = time.perf_counter()
+                path = optimizer.find_optimal_route(a, b, params, max_iterations=10 ** 9, **kwargs)
+                latencies.append(time.perf_counter() - start)
+                expanded += optimizer.last_search_stats['expanded']
+                path_costs.append(costs[csr.path_edges([csr.index[node] for node in path])].sum() if path else np.inf)
+            exact_costs = exact_costs or path_costs
+            excess = np.mean([c / e for c, e in zip(path_costs, exact_costs) if np.isfinite(e) and e > 0]) - 1
+            print(f"    {mode:<12} {expanded / len(queries):>8,.0f} nœuds  {np.mean(latencies) * 1e3:8.3f} ms  "
+                  f"p99 {np.percentile(latencies, 99) * 1e3:8.3f} ms  surcoût {excess:6.1%}")
+
+
+def bench_route_cache(n_requests: int = 5000, seed: int = 0):
+    """
+    optimize_route avec et sans cache de routes, trafic concentré (loi de Zipf) sur les paires
+    de ports du réseau maritime et trois préréglages de poids
+    """
+    print("=== cache de routes: trafic concentré sur quelques paires de ports ===")
+    graph, waypoints = create_maritime_network()
+    ports = [node for node, wp in waypoints.items() if wp.port_type == 'port']
+    pairs = [(a, b) for a in ports for b in ports if a != b]
+    rng = np.random.default_rng(seed)
+    ranks = np.minimum(rng.zipf(1.5, size=n_requests), len(pairs) * len(STANDARD_PRESETS)) - 1
+    presets = list(STANDARD_PRESETS.values())
+    requests = [(pairs[r % len(pairs)], presets[r // len(pairs)]) for r in ranks]
+    
+    for label, cache in [('sans cache', None), ('avec cache', RouteCache())]:
+        optimizer = WeightedAStarOptimizer(graph, waypoints, route_cache=cache)
+        start = time.perf_counter()
+        for (a, b), params in requests:
+            optimizer.optimize_route(a, b, params)
+        elapsed = time.perf_counter() - start
+        stats = f"  {cache.info()}" if cache else ""
+        print(f"  {label:<11} {elapsed / n_requests * 1e6:8.1f} µs/requête{stats}")
+
+
+def bench_pareto(sizes, n_queries: int):
+    """
+    Front de Pareto (une recherche à étiquettes) vs trois A* à poids fixes (ancien /route/alternatives):
+    latence moyenne et nombre de routes distinctes obtenues
+    """
+    print("=== alternatives: front de Pareto vs trois préréglages de poids ===")
+    params = OptimizationParams()
+    networks = [('maritime', create_maritime_network())] + [(f"{n:,}", synthetic_route_graph(n)) for n in sizes]
+    
+    for label, (graph, waypoints) in networks:
+        optimizer = WeightedAStarOptimizer(graph, waypoints)
+        queries = random_queries(waypoints, n_queries)
+        optimizer.compiled_graph
+        for name, search in [
+            ('Pareto', lambda a, b: [path for path, _ in optimizer.pareto_routes(a, b, params)]),
+            ('3 poids', lambda a, b: {tuple(optimizer.find_optimal_route(a, b, preset, max_iterations=10 ** 9) or ())
+                                      for preset in STANDARD_PRESETS.values()} - {()}),
+        ]:
+            latencies, distinct = [], 0
+            for a, b in queries:
+                start = time.perf_counter()
+                distinct += len(search(a, b))
+                latencies.append(time.perf_counter() - start)
+            print(f"  {label:>9}  {name:<8} {np.mean(latencies) * 1e3:8.2f} ms  "
+                  f"{distinct / n_queries:5.1f} routes distinctes")
+
+
+def bench_k_shortest(sizes, n_queries: int, ks=(1, 2, 4, 8, 16, 32), baseline_ks=(1, 4)):
+    """
+    Latence de k_shortest_routes selon k (arbre de plus courts chemins partagé par les déviations),
+    sans filtre et avec max_similarity par défaut; référence: Yen de networkx (chaque déviation
+    repart de zéro), sur quelques requêtes
+    """
+    print("=== k plus courts chemins: arbre partagé vs Yen networkx ===")
+    params = OptimizationParams()
+    
+    for n in sizes:
+        graph, waypoints = synthetic_route_graph(n)
+        optimizer = WeightedAStarOptimizer(graph, waypoints)
+        queries = random_queries(waypoints, n_queries)
+        optimizer.edge_cost_vector(params)
+        print(f"  {n:>9,} nœuds")
+        for label, similarity in [('sans filtre', 1.0), (f"similarité ≤ {DEFAULT_MAX_SIMILARITY}", DEFAULT_MAX_SIMILARITY)]:
+            for k in ks:
+                latencies, found = [], 0
+                for a, b in queries:
+                    start = time.perf_counter()
+                    found += len(optimizer.k_shortest_routes(a, b, params, k=k, max_similarity=similarity))
+                    latencies.append(time.perf_counter() - start)
+                print(f"    {label:<16} k={k:<3} {np.mean(latencies) * 1e3:8.2f} ms  {found / n_queries:5.1f} routes")
+        
+        csr, costs = optimizer.compiled_graph, optimizer.edge_cost_vector(params)
+        for u, v in graph.edges:
+            graph.edges[u, v]['cost'] = costs[csr.edge_index(csr.index[u], csr.index[v])]
+        for k in baseline_ks:
+            latencies = []
+            for a, b in queries[:3]:
+                start = time.perf_counter()
+                list(islice(nx.shortest_simple_paths(graph, a, b, weight='cost'), k))
+                latencies.append(time.perf_counter() - start)
+            print(f"    {'networkx':<16} k={k:<3} {np.mean(latencies) * 1e3:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du routage A*")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000],
+                        help='Nombre de nœuds des graphes synthétiques')
+    parser.add_argument('--queries', type=int, default=20, help='Requêtes aléatoires par graphe')
+    parser.add_argument('--hierarchy-sizes', type=int, nargs='*', default=[5_000],
+                        help='Graphes synthétiques contractés (construction en Python pur, lente)')
+    parser.add_argument('--k-shortest-sizes', type=int, nargs='*', default=[10_000],
+                        help='Graphes synthétiques des k plus courts chemins')
+    parser.add_argument('--pareto-sizes', type=int, nargs='*', default=[2_000, 10_000],
+                        help='Graphes synthétiques du front de Pareto (en plus du réseau maritime)')
+    args = parser.parse_args()
+    
+    logging.disable(logging.WARNING)
+    bench_backends(args.sizes, args.queries)
+    bench_cost_vector(args.sizes)
+    bench_heuristic(args.sizes, args.queries)
+    bench_landmarks(args.sizes, args.queries)
+    bench_bidirectional(args.sizes, args.queries)
+    bench_hierarchy(args.hierarchy_sizes, args.queries)
+    bench_route_cache()
+    bench_pareto(args.pareto_sizes, args.queries)
+    bench_k_shortest(args.k_shortest_sizes, args.queries)
+
+
+if __name__ == "__main__":
+    main()
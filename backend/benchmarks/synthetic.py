@@ -0,0 +1,130 @@
+"""
+Générateurs de données synthétiques pour les benchmarks
+"""
+import numpy as np
+import pandas as pd
+
+
+def synthetic_ais_frame(n_pings: int, n_vessels: int = 2000, seed: int = 42) -> pd.DataFrame:
+    """
+    DataFrame AIS typé (format de sortie de load_ais_data)
+    Pings toutes les ~5 min avec quelques pertes de signal > 1h
+    """
+    rng = np.random.default_rng(seed)
+    
+    vessel = rng.integers(0, n_vessels, n_pings)
+    mmsi = vessel + 200_000_000
+    step_s = rng.choice([180, 300, 600, 5400], size=n_pings, p=[0.3, 0.5, 0.15, 0.05])
+    
+    # Horloge propre à chaque navire: somme cumulée des pas, remise à zéro par navire
+    order = np.argsort(vessel, kind='stable')
+    elapsed = np.cumsum(step_s[order])
+    counts = np.bincount(vessel, minlength=n_vessels)
+    group_start = np.repeat(np.cumsum(counts) - counts, counts)
+    offsets = np.empty(n_pings, dtype=np.int64)
+    offsets[order] = elapsed - elapsed[group_start] + step_s[order][group_start]
+    tstamp = np.datetime64('2024-01-01T00:00:00', 's') + offsets.astype('timedelta64[s]')
+    
+    names = pd.Categorical.from_codes(vessel, [f"VESSEL_{i}" for i in range(n_vessels)])
+    
+    frame = pd.DataFrame({
+        'MMSI': mmsi,
+        'NAME': names,
+        'TSTAMP': tstamp,
+        'LATITUDE': rng.uniform(-60, 60, n_pings),
+        'LONGITUDE': rng.uniform(-180, 180, n_pings),
+        'SOG': rng.uniform(0, 22, n_pings),
+        'COG': rng.uniform(0, 360, n_pings),
+        'DRAUGHT': rng.uniform(5, 15, n_pings),
+    })
+    
+    # Ordre d'un flux réel: chronologique, navires entrelacés
+    return frame.sort_values('TSTAMP', kind='stable', ignore_index=True)
+
+
+def synthetic_track_frame(n_pings: int, n_vessels: int = 200, seed: int = 42,
+                          noise_nm: float = 0.05) -> pd.DataFrame:
+    """
+    Traces réalistes: pings toutes les ~5 min le long de routes à cap constant,
+    avec un changement de cap toutes les ~12h et un bruit GPS de noise_nm
+    """
+    rng = np.random.default_rng(seed)
+    per_vessel = max(n_pings // n_vessels, 2)
+    vessel = np.repeat(np.arange(n_vessels), per_vessel)
+    n = len(vessel)
+    
+    step_h = rng.choice([4, 5, 6], size=n) / 60
+    first = np.arange(0, n, per_vessel)
+    step_h[first] = 0
+    hours = np.cumsum(step_h)
+    hours -= np.repeat(hours[first], per_vessel)
+    
+    # Cap constant par tronçon de 12h, vitesse constante par navire
+    leg = (hours // 12).astype(np.int64) + vessel * 10_000
+    _, leg_codes = np.unique(leg, return_inverse=True)
+    course = np.radians(rng.uniform(0, 360, leg_codes.max() + 1))[leg_codes]
+    sog = rng.uniform(10, 20, n_vessels)[vessel]
+    
+    dist = sog * step_h
+    d_lat = np.cumsum(dist * np.cos(course)) / 60
+    d_lon = np.cumsum(dist * np.sin(course)) / 60
+    d_lat -= np.repeat(d_lat[first], per_vessel)
+    d_lon -= np.repeat(d_lon[first], per_vessel)
+    lat = rng.uniform(-40, 40, n_vessels)[vessel] + d_lat + rng.normal(0, noise_nm / 60, n)
+    lon = rng.uniform(-170, 170, n_vessels)[vessel] + d_lon / np.cos(np.radians(lat)) \
+        + rng.normal(0, noise_nm / 60, n)
+    
+    return pd.DataFrame({
+        'MMSI': vessel + 300_000_000,
+        'NAME': pd.Categorical.from_codes(vessel, [f"TRACK_{i}" for i in range(n_vessels)]),
+        'TSTAMP': np.datetime64('2024-01-01T00:00:00', 's') + (hours * 3600).astype('timedelta64[s]'),
+        'LATITUDE': lat,
+        'LONGITUDE': lon,
+        'SOG': sog + rng.normal(0, 0.3, n),
+        'COG': (np.degrees(course) + rng.normal(0, 2, n)) % 360,
+        'DRAUGHT': np.full(n, 10.0),
+    })
+
+
+def synthetic_route_graph(n_nodes: int, k_neighbors: int = 6, seed: int = 42):
+    """
+    Graphe de routage synthétique: waypoints aléatoires (lat -60..60), chacun relié
+    dans les deux sens à ses k plus proches voisins; attributs au format de
+    MaritimeGraphBuilder.add_route (20 nœuds, 0.005 t/NM) et risques entiers 0-3
+    Retourne (graph, waypoints)
+    """
+    import networkx as nx
+    from scipy.spatial import cKDTree
+    
+    from data_engineering.geodesy import haversine_distance
+    from data_engineering.spatial_index import to_unit_vectors
+    from models import WayPoint
+    
+    rng = np.random.default_rng(seed)
+    lats = np.degrees(np.arcsin(rng.uniform(np.sin(np.radians(-60)), np.sin(np.radians(60)), n_nodes)))
+    lons = rng.uniform(-180, 180, n_nodes)
+    ids = [f"N{i}" for i in range(n_nodes)]
+    
+    _, neighbors = cKDTree(to_unit_vectors(lats, lons)).query(to_unit_vectors(lats, lons), k=k_neighbors + 1)
+    u = np.repeat(np.arange(n_nodes), k_neighbors)
+    v = neighbors[:, 1:].ravel()
+    u, v = np.concatenate([u, v]), np.concatenate([v, u])
+    pairs = np.unique(np.stack([u, v], axis=1), axis=0)
+    u, v = pairs[:, 0], pairs[:, 1]
+    
+    distance = haversine_distance(lats[u], lons[u], lats[v], lons[v])
+    weather = rng.integers(0, 4, len(u))
+    piracy = np.where(rng.random(len(u)) < 0.05, rng.integers(1, 4, len(u)), 0)
+    
+    graph = nx.DiGraph()
+    graph.add_nodes_from(ids)
+    graph.add_edges_from(
+        (ids[a], ids[b], {'distance_nm': d, 'time_hours': d / 20, 'fuel_tons': d * 0.005,
+                          'weather_risk': int(w), 'piracy_risk': int(p)})
+        for a, b, d, w, p in zip(u.tolist(), v.tolist(), distance.tolist(), weather.tolist(), piracy.tolist())
+    )
+    waypoints = {
+        ids[i]: WayPoint(ids[i], ids[i], float(lats[i]), float(lons[i]), 'waypoint')
+        for i in range(n_nodes)
+    }
+    return graph, waypoints
@@ -19,6 +19,13 @@ class Settings(BaseSettings):
     
     # Data
     AIS_DATA_PATH: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ais_data.json")
+    AIS_DATA_DIR: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "ais")  # Seuls fichiers AIS ingérables via l'API
+    AIS_CACHE_DIR: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "ais_cache")
+    TRAFFIC_DENSITY_DIR: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "traffic_density")
+    TRAFFIC_DENSITY_RESOLUTION_DEG: float = 0.1
+    TRAFFIC_DENSITY_TILE_CELLS: int = 256
+    TRAFFIC_DENSITY_CACHE_TILES: int = 512
+    AIS_HISTORY_DB: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "ais_history.sqlite")
     BATHYMETRY_PATH: str = "./data/bathymetry/gebco_2023.nc"
     WEATHER_API_KEY: Optional[str] = os.getenv("WEATHER_API_KEY")
     WEATHER_API_URL: str = "https://api.weatherapi.com/v1"
@@ -28,6 +35,13 @@ class Settings(BaseSettings):
     DEFAULT_WEIGHT_TIME: float = 1.0
     DEFAULT_WEIGHT_COST: float = 1.0
     DEFAULT_WEIGHT_RISK: float = 1.0
+    ROUTING_HEURISTIC: str = "geodesic"  # 'geodesic' ou 'landmarks' (A* exact, repères ALT)
+    ROUTING_LANDMARKS: int = 16
+    ROUTING_CONTRACTION: bool = False  # Hiérarchies de contraction des préréglages standards
+    ROUTE_CACHE_SIZE: int = 1024  # Routes conservées (0: cache désactivé)
+    ROUTE_CACHE_TTL_SECONDS: float = 900.0
+    ROUTE_ALTERNATIVES_MAX_K: int = 20  # k maximal de /route/alternatives (jusqu'à 20 * k déviations)
+    ROUTING_INDEX_DIR: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "routing_index")
     
     # Agent Configuration
     MONITORING_CHECK_INTERVAL_MINUTES: int = 5
@@ -0,0 +1,254 @@
+"""
+Cache colonnaire sur disque des données AIS parsées
+Chaque fichier source est converti une fois en un jeu de colonnes binaires
+mappées en mémoire (np.memmap). La clé d'invalidation est (chemin, taille, mtime).
+
+Usage CLI (depuis backend/):
+    python -m data_engineering.ais_cache /chemin/vers/ais --pattern "*.json"
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from data_engineering.ais_stream import DEFAULT_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 2  # 2: colonnes apparues après le premier chunk
+META_FILE = "meta.json"
+
+# Colonnes numériques connues; les autres colonnes sont encodées par dictionnaire
+NUMERIC_COLUMNS = ['TSTAMP', 'LATITUDE', 'LONGITUDE', 'SOG', 'COG', 'DRAUGHT']
+
+
+class AISColumnarCache:
+    """
+    Cache colonnaire des DataFrames AIS typés
+    - colonnes numériques/datetime: fichier binaire brut, relu via np.memmap
+    - colonnes texte (MMSI, NAME, ...): codes int32 + dictionnaire trié
+    """
+    
+    def __init__(self, cache_dir: Union[str, Path]):
+        self.cache_dir = Path(cache_dir)
+    
+    @staticmethod
+    def source_signature(source_path: Union[str, Path]) -> Dict:
+        """Signature d'invalidation d'un fichier source"""
+        path = Path(source_path).resolve()
+        stat = path.stat()
+        return {
+            'path': str(path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'version': CACHE_FORMAT_VERSION,
+        }
+    
+    def entry_dir(self, source_path: Union[str, Path]) -> Path:
+        """Répertoire du cache pour un fichier source (un seul par chemin)"""
+        digest = hashlib.sha1(str(Path(source_path).resolve()).encode()).hexdigest()[:16]
+        return self.cache_dir / digest
+    
+    def _read_meta(self, source_path: Union[str, Path]) -> Optional[Dict]:
+        meta_path = self.entry_dir(source_path) / META_FILE
+        if not meta_path.exists():
+            return None
+        with open(meta_path, 'r') as f:
+            return json.load(f)
+    
+    def is_valid(self, source_path: Union[str, Path]) -> bool:
+        """Le cache existe et correspond à la version actuelle du fichier source"""
+        meta = self._read_meta(source_path)
+        return meta is not None and meta['source'] == self.source_signature(source_path)
+    
+    def build(self, source_path: Union[str, Path], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Path:
+        """
+        Construit le cache d'un fichier source en flux (mémoire bornée)
+        L'écriture se fait dans un répertoire temporaire renommé à la fin
+        """
+        from data_engineering.ais_processor import AISDataProcessor
+        
+        start = time.perf_counter()
+        signature = self.source_signature(source_path)
+        target = self.entry_dir(source_path)
+        tmp_dir = target.with_name(target.name + f".tmp{os.getpid()}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+        
+        columns: Dict[str, Dict] = {}
+        handles = {}
+        dictionaries: Dict[str, Dict[str, int]] = {}
+        n_rows = 0
+        
+        try:
+            for chunk in AISDataProcessor(source_path).iter_ais_chunks(chunk_size):
+                # Schéma élargi aux colonnes absentes des chunks précédents (manquantes avant)
+                new = [name for name in chunk.columns if name not in columns]
+                if new:
+                    added = self._infer_schema(chunk[new], first_index=len(columns), nullable=n_rows > 0)
+                    for name, spec in added.items():
+                        handles[name] = open(tmp_dir / spec['file'], 'wb')
+                        if spec['kind'] == 'dictionary':
+                            dictionaries[name] = {}
+                        if n_rows:
+                            logger.info(f"Colonne AIS {name} apparue après {n_rows} lignes")
+                            handles[name].write(self._missing(spec, n_rows).tobytes())
+                    columns.update(added)
+                
+                for name, spec in columns.items():
+                    values = chunk[name] if name in chunk.columns else pd.Series(None, index=chunk.index)
+                    if spec['kind'] == 'dictionary':
+                        array = self._encode(values, dictionaries[name])
+                    else:
+                        array = values.to_numpy(dtype=spec['dtype'])
+                    handles[name].write(np.ascontiguousarray(array).tobytes())
+                
+                n_rows += len(chunk)
+        finally:
+            for handle in handles.values():
+                handle.close()
+        
+        # Dictionnaires triés: l'ordre des catégories suit l'ordre lexicographique
+        for name, mapping in dictionaries.items():
+            categories = np.array(list(mapping.keys()), dtype=object)
+            order = np.argsort(categories, kind='stable')
+            remap = np.empty(len(order) + 1, dtype=np.int32)
+            remap[order] = np.arange(len(order), dtype=np.int32)
+            remap[-1] = -1  # valeur manquante
+            codes = np.memmap(tmp_dir / columns[name]['file'], dtype=np.int32, mode='r+', shape=(n_rows,))
+            codes[:] = remap[codes]
+            codes.flush()
+            del codes
+            columns[name]['categories'] = categories[order].tolist()
+        
+        with open(tmp_dir / META_FILE, 'w') as f:
+            json.dump({'source': signature, 'rows': n_rows, 'columns': columns}, f)
+        
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp_dir, target)
+        
+        logger.info(
+            f"Cache AIS construit pour {source_path}: {n_rows} lignes, "
+            f"{len(columns)} colonnes en {time.perf_counter() - start:.2f}s"
+        )
+        return target
+    
+    @staticmethod
+    def _infer_schema(chunk: pd.DataFrame, first_index: int = 0, nullable: bool = False) -> Dict[str, Dict]:
+        """
+        Schéma du cache déduit des colonnes d'un chunk (fichiers c<first_index>.bin, ...)
+        nullable: colonne apparue en cours de fichier, entiers et booléens stockés en float64 (NaN)
+        """
+        columns = {}
+        for i, name in enumerate(chunk.columns, start=first_index):
+            if name in NUMERIC_COLUMNS or pd.api.types.is_numeric_dtype(chunk[name]):
+                dtype = chunk[name].to_numpy().dtype
+                if nullable and dtype.kind in 'iub':
+                    dtype = np.dtype(np.float64)
+                columns[name] = {'kind': 'array', 'dtype': dtype.str, 'file': f"c{i}.bin"}
+            else:
+                columns[name] = {'kind': 'dictionary', 'dtype': '<i4', 'file': f"c{i}.bin"}
+        return columns
+    
+    @staticmethod
+    def _missing(spec: Dict, n_rows: int) -> np.ndarray:
+        """n_rows valeurs manquantes d'une colonne (-1, NaN ou NaT)"""
+        dtype = np.dtype(spec['dtype'])
+        if spec['kind'] == 'dictionary':
+            return np.full(n_rows, -1, dtype=dtype)
+        if dtype.kind in 'mM':
+            return np.full(n_rows, np.datetime64('NaT'), dtype=dtype)
+        return np.full(n_rows, np.nan, dtype=dtype)
+    
+    @staticmethod
+    def _encode(values: pd.Series, mapping: Dict[str, int]) -> np.ndarray:
+        """Encodage par dictionnaire d'une colonne texte (-1 = manquant)"""
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        lookup = np.empty(len(uniques) + 1, dtype=np.int32)
+        for i, value in enumerate(uniques):
+            lookup[i] = mapping.setdefault(str(value), len(mapping))
+        lookup[-1] = -1
+        return lookup[codes]
+    
+    def load(self, source_path: Union[str, Path],
+             columns: Optional[Iterable[str]] = None) -> Optional[pd.DataFrame]:
+        """
+        Charge les colonnes demandées depuis le cache (None si absent/périmé)
+        Les colonnes numériques sont mappées en mémoire sans copie
+        """
+        if not self.is_valid(source_path):
+            return None
+        
+        meta = self._read_meta(source_path)
+        entry = self.entry_dir(source_path)
+        n_rows = meta['rows']
+        wanted = list(columns) if columns is not None else list(meta['columns'])
+        
+        data = {}
+        for name in wanted:
+            spec = meta['columns'].get(name)
+            if spec is None:
+                raise KeyError(f"Colonne absente du cache AIS: {name}")
+            
+            if n_rows == 0:
+                array = np.empty(0, dtype=spec['dtype'])
+            else:
+                array = np.memmap(entry / spec['file'], dtype=spec['dtype'], mode='r', shape=(n_rows,))
+            
+            if spec['kind'] == 'dictionary':
+                data[name] = pd.Categorical.from_codes(
+                    np.asarray(array), categories=spec['categories'], validate=False
+                )
+            else:
+                data[name] = array
+        
+        return pd.DataFrame(data, copy=False)
+    
+    def build_directory(self, directory: Union[str, Path], pattern: str = "*.json",
+                        chunk_size: int = DEFAULT_CHUNK_SIZE, force: bool = False) -> List[Path]:
+        """Pré-construit le cache pour tous les fichiers AIS d'un répertoire"""
+        built = []
+        for source in sorted(Path(directory).glob(pattern)):
+            if not source.is_file():
+                continue
+            if not force and self.is_valid(source):
+                logger.info(f"Cache AIS à jour: {source}")
+                continue
+            self.build(source, chunk_size)
+            built.append(source)
+        
+        logger.info(f"Cache AIS: {len(built)} fichier(s) reconstruit(s) dans {self.cache_dir}")
+        return built
+
+
+def main(argv: Optional[List[str]] = None):
+    from config import settings
+    
+    parser = argparse.ArgumentParser(description="Pré-construction du cache colonnaire AIS")
+    parser.add_argument('directory', help='Répertoire contenant les fichiers AIS')
+    parser.add_argument('--pattern', default='*.json', help='Motif des fichiers (default: *.json)')
+    parser.add_argument('--cache-dir', default=settings.AIS_CACHE_DIR,
+                        help=f'Répertoire du cache (default: {settings.AIS_CACHE_DIR})')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f'Enregistrements par chunk (default: {DEFAULT_CHUNK_SIZE})')
+    parser.add_argument('--force', action='store_true', help='Reconstruire même si le cache est à jour')
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.INFO)
+    built = AISColumnarCache(args.cache_dir).build_directory(
+        args.directory, args.pattern, args.chunk_size, args.force
+    )
+    print(f"✅ {len(built)} fichier(s) mis en cache dans {args.cache_dir}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
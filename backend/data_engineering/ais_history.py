@@ -0,0 +1,334 @@
+"""
+Historique AIS local et indexé (SQLite, sans service externe)
+Les pings sont regroupés en blocs (un navire, un jour UTC) stockés en binaire
+(tableau NumPy structuré). Chaque bloc est indexé deux fois:
+- R-tree SQLite sur (temps, latitude, longitude) pour les requêtes spatio-temporelles
+- B-tree sur (mmsi, jour) pour les requêtes par navire
+Une requête sélectionne les blocs via l'index puis filtre exactement leurs pings
+en NumPy: quelques milliers de blocs par an et par navire au lieu de millions de lignes.
+
+Usage CLI (depuis backend/):
+    python -m data_engineering.ais_history /chemin/vers/ais.json
+"""
+import argparse
+import logging
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from itertools import groupby, repeat
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from data_engineering.ais_processor import timestamp_values
+
+logger = logging.getLogger(__name__)
+
+NS_PER_SECOND = 1_000_000_000
+SECONDS_PER_DAY = 86_400
+
+# Format binaire d'un ping dans un bloc
+PING_DTYPE = np.dtype([
+    ('TSTAMP', '<i8'),     # epoch en nanosecondes
+    ('LATITUDE', '<f8'),
+    ('LONGITUDE', '<f8'),
+    ('SOG', '<f4'),
+    ('COG', '<f4'),
+    ('DRAUGHT', '<f4'),
+])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    id INTEGER PRIMARY KEY,
+    mmsi TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    n_pings INTEGER NOT NULL,
+    pings BLOB NOT NULL,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS blocks_by_vessel ON blocks (mmsi, day);
+CREATE VIRTUAL TABLE IF NOT EXISTS blocks_rtree USING rtree(
+    id, min_t, max_t, min_lat, max_lat, min_lon, max_lon
+);
+CREATE TABLE IF NOT EXISTS vessels (mmsi TEXT PRIMARY KEY, name TEXT);
+CREATE TABLE IF NOT EXISTS sources (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER);
+"""
+
+BBox = Tuple[float, float, float, float]  # (lat_min, lon_min, lat_max, lon_max)
+
+
+def _epoch_seconds(when: Union[datetime, str, np.datetime64]) -> float:
+    return pd.Timestamp(when).value / NS_PER_SECOND
+
+
+class AISHistoryStore:
+    """
+    Base historique AIS embarquée (un fichier SQLite en mode WAL)
+    Les écritures sont sérialisées par un verrou sur une connexion partagée entre threads;
+    les lectures passent par une connexion par thread et ne voient que les transactions
+    validées (jamais une ré-ingestion en cours)
+    """
+    
+    def __init__(self, db_path: Union[str, Path]):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        # Bases créées avant le suivi des sources: blocs sans source (jamais remplacés)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(blocks)")}
+        if 'source' not in columns:
+            self.conn.execute("ALTER TABLE blocks ADD COLUMN source TEXT")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS blocks_by_source ON blocks (source)")
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+    
+    def close(self):
+        with self._readers_lock:
+            for reader in self._readers:
+                reader.close()
+            self._readers.clear()
+        self.conn.close()
+    
+    def _reader(self) -> sqlite3.Connection:
+        """Connexion de lecture du thread courant (ouverte au premier appel)"""
+        reader = getattr(self._local, 'conn', None)
+        if reader is None:
+            reader = self._local.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            with self._readers_lock:
+                self._readers.append(reader)
+        return reader
+    
+    # ==================== INGESTION ====================
+    
+    def ingest(self, df: pd.DataFrame, source: Optional[str] = None) -> int:
+        """
+        Ajoute des pings typés (format load_ais_data); un bloc par (MMSI, jour UTC)
+        source: fichier d'origine des blocs (remplacés à sa ré-ingestion)
+        Retourne le nombre de blocs écrits
+        """
+        if df is None or df.empty:
+            return 0
+        with self._lock, self.conn:
+            return self._insert_blocks(df, source)
+    
+    def _insert_blocks(self, df: pd.DataFrame, source: Optional[str]) -> int:
+        """Écrit les blocs de df; à appeler sous le verrou, dans une transaction"""
+        if df.empty:
+            return 0
+        
+        df = df.sort_values(['MMSI', 'TSTAMP'], kind='mergesort')
+        mmsi = df['MMSI'].astype(str).to_numpy()
+        tstamp = timestamp_values(df['TSTAMP']).astype('datetime64[ns]').view(np.int64)
+        day = tstamp // (NS_PER_SECOND * SECONDS_PER_DAY)
+        
+        pings = np.empty(len(df), dtype=PING_DTYPE)
+        pings['TSTAMP'] = tstamp
+        for column in PING_DTYPE.names[1:]:
+            pings[column] = df[column].to_numpy(dtype=float) if column in df.columns else np.nan
+        
+        # Blocs: changement de navire ou de jour
+        starts = np.flatnonzero(np.concatenate([[True], (mmsi[1:] != mmsi[:-1]) | (day[1:] != day[:-1])]))
+        seconds = tstamp / NS_PER_SECOND
+        bounds = [
+            np.minimum.reduceat(seconds, starts), np.maximum.reduceat(seconds, starts),
+            np.minimum.reduceat(pings['LATITUDE'], starts), np.maximum.reduceat(pings['LATITUDE'], starts),
+            np.minimum.reduceat(pings['LONGITUDE'], starts), np.maximum.reduceat(pings['LONGITUDE'], starts),
+        ]
+        ends = np.append(starts[1:], len(df))
+        
+        first_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM blocks").fetchone()[0]
+        ids = range(first_id, first_id + len(starts))
+        self.conn.executemany(
+            "INSERT INTO blocks (id, mmsi, day, n_pings, pings, source) VALUES (?, ?, ?, ?, ?, ?)",
+            zip(ids, mmsi[starts].tolist(), day[starts].tolist(), (ends - starts).tolist(),
+                (pings[a:b].tobytes() for a, b in zip(starts, ends)), repeat(source)),
+        )
+        self.conn.executemany(
+            "INSERT INTO blocks_rtree VALUES (?, ?, ?, ?, ?, ?, ?)",
+            zip(ids, *(bound.tolist() for bound in bounds)),
+        )
+        if 'NAME' in df.columns:
+            last = ends - 1
+            names = df['NAME'].astype(str).to_numpy()
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO vessels (mmsi, name) VALUES (?, ?)",
+                dict(zip(mmsi[last].tolist(), names[last].tolist())).items(),
+            )
+        
+        return len(starts)
+    
+    def ingest_source(self, source_path: Union[str, Path], force: bool = False) -> int:
+        """
+        Ingestion en flux d'un fichier AIS; un fichier déjà ingéré (même taille et mtime)
+        est ignoré pour ne pas dupliquer ses pings. Sinon (fichier modifié ou force), ses
+        blocs précédents sont remplacés dans la même transaction. Retourne le nombre de pings écrits
+        """
+        from data_engineering.ais_processor import AISDataProcessor
+        from data_engineering.ais_cache import AISColumnarCache
+        
+        signature = AISColumnarCache.source_signature(source_path)
+        known = self.conn.execute(
+            "SELECT size, mtime_ns FROM sources WHERE path = ?", (signature['path'],)
+        ).fetchone()
+        if not force and known == (signature['size'], signature['mtime_ns']):
+            logger.info(f"Historique AIS déjà à jour pour {source_path}")
+            return 0
+        
+        n_pings = 0
+        with self._lock, self.conn:
+            self.conn.execute(
+                "DELETE FROM blocks_rtree WHERE id IN (SELECT id FROM blocks WHERE source = ?)",
+                (signature['path'],),
+            )
+            replaced = self.conn.execute("DELETE FROM blocks WHERE source = ?", (signature['path'],)).rowcount
+            for chunk in AISDataProcessor(source_path).iter_ais_chunks():
+                self._insert_blocks(chunk, signature['path'])
+                n_pings += len(chunk)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sources (path, size, mtime_ns) VALUES (?, ?, ?)",
+                (signature['path'], signature['size'], signature['mtime_ns']),
+            )
+        if replaced:
+            logger.info(f"Historique AIS: {replaced} blocs précédents de {source_path} remplacés")
+        logger.info(f"Historique AIS: {n_pings} pings de {source_path} ajoutés à {self.db_path}")
+        return n_pings
+    
+    # ==================== REQUÊTES ====================
+    
+    def query(self, mmsi: Optional[str] = None, start: Optional[datetime] = None,
+              end: Optional[datetime] = None, bbox: Optional[BBox] = None,
+              limit: Optional[int] = None) -> pd.DataFrame:
+        """
+        Pings filtrés par navire, fenêtre temporelle [start, end] et emprise, triés par
+        (MMSI, TSTAMP); limit tronque le résultat trié sans lire les blocs suivants
+        Avec un MMSI, les blocs viennent de l'index (mmsi, jour), sinon du R-tree
+        """
+        t_min = _epoch_seconds(start) if start is not None else -np.inf
+        t_max = _epoch_seconds(end) if end is not None else np.inf
+        lat_min, lon_min, lat_max, lon_max = bbox if bbox is not None else (-90.0, -180.0, 90.0, 180.0)
+        if lat_min > lat_max or lon_min > lon_max or t_min > t_max:
+            raise ValueError(f"Fenêtre de requête invalide: {start} -> {end}, {bbox}")
+        
+        reader = self._reader()
+        # Blocs par (MMSI, jour) croissants, même ordre que le résultat: avec limit, la lecture
+        # s'arrête au premier jour complet qui atteint limit pings retenus
+        if mmsi is not None:
+            day_min = np.floor(t_min / SECONDS_PER_DAY) if start is not None else -2 ** 62
+            day_max = np.floor(t_max / SECONDS_PER_DAY) if end is not None else 2 ** 62
+            blocks = reader.execute(
+                "SELECT id, mmsi, day FROM blocks WHERE mmsi = ? AND day BETWEEN ? AND ? ORDER BY day",
+                (str(mmsi), int(day_min), int(day_max)),
+            )
+        elif start is None and end is None and bbox is None:
+            blocks = reader.execute("SELECT id, mmsi, day FROM blocks ORDER BY mmsi, day")
+        else:
+            blocks = reader.execute(
+                "SELECT b.id, b.mmsi, b.day FROM blocks_rtree r JOIN blocks b ON b.id = r.id "
+                "WHERE r.max_t >= ? AND r.min_t <= ? AND r.max_lat >= ? AND r.min_lat <= ? "
+                "AND r.max_lon >= ? AND r.min_lon <= ? ORDER BY b.mmsi, b.day",
+                (max(t_min, -1e18), min(t_max, 1e18), lat_min, lat_max, lon_min, lon_max),
+            )
+        
+        parts: List[Tuple[np.ndarray, np.ndarray]] = []
+        n_kept = 0
+        pending: List[int] = []
+        
+        def load(ids: List[int]) -> int:
+            rows = reader.execute(
+                f"SELECT mmsi, n_pings, pings FROM blocks WHERE id IN ({','.join('?' * len(ids))})", ids
+            ).fetchall()
+            pings = np.frombuffer(b''.join(row[2] for row in rows), dtype=PING_DTYPE)
+            mmsi_values = np.repeat(np.array([row[0] for row in rows], dtype=object), [row[1] for row in rows])
+            seconds = pings['TSTAMP'] / NS_PER_SECOND
+            keep = (
+                (seconds >= t_min) & (seconds <= t_max)
+                & (pings['LATITUDE'] >= lat_min) & (pings['LATITUDE'] <= lat_max)
+                & (pings['LONGITUDE'] >= lon_min) & (pings['LONGITUDE'] <= lon_max)
+            )
+            parts.append((mmsi_values[keep], pings[keep]))
+            return int(keep.sum())
+        
+        # Sans limit, lots de 500 blocs pour rester sous la limite de paramètres SQLite
+        for _, group in groupby(blocks, key=lambda row: (row[1], row[2])):
+            pending.extend(row[0] for row in group)
+            if limit is None and len(pending) < 500:
+                continue
+            n_kept += load(pending)
+            pending = []
+            if limit is not None and n_kept >= limit:
+                break
+        blocks.close()
+        if pending:
+            load(pending)
+        
+        if not parts:
+            return self._frame(np.empty(0, dtype=object), np.empty(0, dtype=PING_DTYPE))
+        
+        mmsi_values = np.concatenate([part[0] for part in parts])
+        pings = np.concatenate([part[1] for part in parts])
+        order = np.lexsort((pings['TSTAMP'], mmsi_values.astype(str)))
+        if limit is not None:
+            order = order[:limit]
+        return self._frame(mmsi_values[order], pings[order])
+    
+    def _frame(self, mmsi: np.ndarray, pings: np.ndarray) -> pd.DataFrame:
+        """DataFrame au format load_ais_data (NAME depuis la table vessels)"""
+        names = self.vessel_names(np.unique(mmsi).tolist()) if len(mmsi) else {}
+        return pd.DataFrame({
+            'MMSI': mmsi,
+            'NAME': pd.Series(mmsi, dtype=object).map(names).to_numpy(),
+            'TSTAMP': pings['TSTAMP'].view('datetime64[ns]'),
+            'LATITUDE': pings['LATITUDE'],
+            'LONGITUDE': pings['LONGITUDE'],
+            'SOG': pings['SOG'],
+            'COG': pings['COG'],
+            'DRAUGHT': pings['DRAUGHT'],
+        })
+    
+    def vessel_names(self, mmsis: List[str]) -> Dict[str, str]:
+        names, reader = {}, self._reader()
+        # Lots de 500 pour rester sous la limite de paramètres SQLite
+        for i in range(0, len(mmsis), 500):
+            batch = mmsis[i:i + 500]
+            names.update(reader.execute(
+                f"SELECT mmsi, name FROM vessels WHERE mmsi IN ({','.join('?' * len(batch))})", batch
+            ).fetchall())
+        return names
+    
+    def stats(self) -> Dict:
+        n_blocks, n_pings, n_vessels, day_min, day_max = self._reader().execute(
+            "SELECT COUNT(*), COALESCE(SUM(n_pings), 0), COUNT(DISTINCT mmsi), MIN(day), MAX(day) FROM blocks"
+        ).fetchone()
+        return {
+            'blocks': n_blocks,
+            'pings': n_pings,
+            'vessels': n_vessels,
+            'first_day': str(np.datetime64(day_min, 'D')) if day_min is not None else None,
+            'last_day': str(np.datetime64(day_max, 'D')) if day_max is not None else None,
+        }
+
+
+def main(argv: Optional[List[str]] = None):
+    from config import settings
+    
+    parser = argparse.ArgumentParser(description="Ingestion de fichiers AIS dans l'historique local")
+    parser.add_argument('sources', nargs='+', help='Fichiers AIS à ingérer')
+    parser.add_argument('--db', default=settings.AIS_HISTORY_DB,
+                        help=f'Base SQLite (default: {settings.AIS_HISTORY_DB})')
+    parser.add_argument('--force', action='store_true', help='Ré-ingérer les fichiers déjà traités')
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.INFO)
+    store = AISHistoryStore(args.db)
+    n_pings = sum(store.ingest_source(source, args.force) for source in args.sources)
+    print(f"✅ {n_pings} pings ajoutés à {args.db} ({store.stats()})")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,7 +3,7 @@ import pandas as pd
 import numpy as np
 import networkx as nx
 from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterator, List, Tuple, Optional
 from pathlib import Path
 import logging
 
@@ -13,50 +13,336 @@ from models import (
     RiskLevel,
     NavigationStatus,
 )
+from data_engineering.ais_stream import iter_record_chunks, DEFAULT_CHUNK_SIZE
+from data_engineering.ais_cache import AISColumnarCache
+from data_engineering.geodesy import haversine_distance
+from data_engineering.spatial_index import WaypointIndex
+from data_engineering.graph_snapping import snap_edge_moments
+from data_engineering.graph_version import bump_graph_version
+from data_engineering.edge_profiles import EdgeProfiles
+from data_engineering.edge_statistics import (
+    aggregate_edge_moments,
+    merge_edge_moments,
+    edge_moments_to_dict,
+)
 
 logger = logging.getLogger(__name__)
 
 
+def coerce_ais_types(df: pd.DataFrame) -> pd.DataFrame:
+    """Conversion des types et nettoyage d'un DataFrame AIS brut"""
+    df['TSTAMP'] = pd.to_datetime(df['TSTAMP'], format='%Y-%m-%d %H:%M:%S GMT')
+    df['LATITUDE'] = pd.to_numeric(df['LATITUDE'], errors='coerce')
+    df['LONGITUDE'] = pd.to_numeric(df['LONGITUDE'], errors='coerce')
+    df['SOG'] = pd.to_numeric(df['SOG'], errors='coerce')
+    df['COG'] = pd.to_numeric(df['COG'], errors='coerce')
+    df['DRAUGHT'] = pd.to_numeric(df['DRAUGHT'], errors='coerce')
+    
+    return df.dropna(subset=['LATITUDE', 'LONGITUDE', 'MMSI'])
+
+
+SEGMENT_COLUMNS = [
+    'mmsi', 'vessel_name', 'from_lat', 'from_lon', 'to_lat', 'to_lon',
+    'time_hours', 'sog_knots', 'timestamp', 'draught',
+]
+
+
+def build_voyage_segments(df: pd.DataFrame, min_time_gap_hours: float = 1.0) -> pd.DataFrame:
+    """
+    Segmentation colonnaire des pings AIS
+    Tri stable par (MMSI, TSTAMP), colonnes décalées d'un rang et masque booléen
+    (même navire & gap <= seuil): aucune boucle Python par ligne
+    """
+    if df is None or len(df) < 2:
+        return pd.DataFrame(columns=SEGMENT_COLUMNS)
+    
+    df = df.sort_values(['MMSI', 'TSTAMP'], kind='mergesort')
+    
+    # Profil compact: MMSI catégoriel comparé par codes, TSTAMP en epoch int64 (ns)
+    mmsi = df['MMSI']
+    mmsi_key = vessel_keys(mmsi)
+    tstamp = timestamp_values(df['TSTAMP'])
+    
+    # Gap en heures entre chaque ping et le suivant
+    time_gap = (tstamp[1:] - tstamp[:-1]) / np.timedelta64(1, 's') / 3600
+    
+    mask = (mmsi_key[1:] == mmsi_key[:-1]) & (time_gap <= min_time_gap_hours)
+    idx_from = np.flatnonzero(mask)
+    idx_to = idx_from + 1
+    
+    return pd.DataFrame({
+        'mmsi': _take(mmsi, idx_from),
+        'vessel_name': _take(df['NAME'], idx_from),
+        'from_lat': df['LATITUDE'].to_numpy()[idx_from],
+        'from_lon': df['LONGITUDE'].to_numpy()[idx_from],
+        'to_lat': df['LATITUDE'].to_numpy()[idx_to],
+        'to_lon': df['LONGITUDE'].to_numpy()[idx_to],
+        'time_hours': time_gap[idx_from],
+        'sog_knots': df['SOG'].to_numpy()[idx_to],
+        'timestamp': tstamp[idx_from],
+        'draught': df['DRAUGHT'].to_numpy()[idx_from],
+    }, columns=SEGMENT_COLUMNS)
+
+
+def vessel_keys(mmsi: pd.Series) -> np.ndarray:
+    """Clés MMSI comparables par ==: codes pour un MMSI catégoriel, valeurs sinon"""
+    if isinstance(mmsi.dtype, pd.CategoricalDtype):
+        return mmsi.cat.codes.to_numpy()
+    return mmsi.to_numpy()
+
+
+def timestamp_values(series: pd.Series) -> np.ndarray:
+    """Horodatages en datetime64, y compris depuis un epoch int64 en nanosecondes"""
+    values = series.to_numpy()
+    if np.issubdtype(values.dtype, np.integer):
+        return values.astype(np.int64).view('datetime64[ns]')
+    return values
+
+
+def _take(series: pd.Series, indices: np.ndarray):
+    """Sélection positionnelle qui conserve l'encodage catégoriel (dictionnaire)"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.array.take(indices)
+    return series.to_numpy()[indices]
+
+
+def compact_ais_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Profil mémoire compact d'un DataFrame AIS typé
+    MMSI int64 (ou catégoriel si non numérique), NAME catégoriel,
+    cinématique en float32, TSTAMP en epoch int64 (ns)
+    """
+    compact = pd.DataFrame(index=df.index)
+    
+    for column in df.columns:
+        values = df[column]
+        if column == 'MMSI':
+            compact[column] = _compact_mmsi(values)
+        elif column == 'TSTAMP':
+            compact[column] = timestamp_values(values).astype('datetime64[ns]').view(np.int64)
+        elif column in ('LATITUDE', 'LONGITUDE', 'SOG', 'COG', 'DRAUGHT'):
+            compact[column] = values.astype(np.float32)
+        elif pd.api.types.is_numeric_dtype(values):
+            compact[column] = values
+        else:
+            compact[column] = values.astype('category')
+    
+    return compact
+
+
+def _compact_mmsi(values: pd.Series) -> pd.Series:
+    """MMSI en int64 si tous les identifiants sont numériques, sinon catégoriel"""
+    if pd.api.types.is_integer_dtype(values) and not isinstance(values.dtype, pd.CategoricalDtype):
+        return values.astype(np.int64)
+    
+    categorical = values.astype('category')
+    categories = categorical.cat.categories
+    numeric = pd.to_numeric(pd.Series(categories.astype(str)), errors='coerce').to_numpy()
+    codes = categorical.cat.codes.to_numpy()
+    
+    if len(categories) and not np.isnan(numeric).any() and (numeric == np.floor(numeric)).all() \
+            and (codes >= 0).all():
+        return pd.Series(numeric.astype(np.int64)[codes], index=values.index)
+    
+    return categorical
+
+
+def frame_bytes_per_million_rows(df: Optional[pd.DataFrame]) -> float:
+    """Empreinte mémoire (octets, chaînes comprises) rapportée à un million de lignes"""
+    if df is None or len(df) == 0:
+        return 0.0
+    return df.memory_usage(deep=True).sum() / len(df) * 1_000_000
+
+
+def last_ping_per_vessel(df: pd.DataFrame) -> pd.DataFrame:
+    """Dernier ping (chronologique) de chaque navire"""
+    df = df.sort_values(['MMSI', 'TSTAMP'], kind='mergesort')
+    return df.drop_duplicates('MMSI', keep='last')
+
+
 class AISDataProcessor:
     """Traitement des données AIS brutes"""
     
-    def __init__(self, ais_data_path: str):
+    def __init__(self, ais_data_path: str, cache_dir: Optional[str] = None,
+                 compact_dtypes: bool = False, quality_filter: bool = False):
         self.ais_data_path = Path(ais_data_path)
+        # Profil mémoire compact (voir compact_ais_frame)
+        self.compact_dtypes = compact_dtypes
+        # Filtre qualité (voir data_engineering.quality) et rejets cumulés par règle
+        self.quality_filter = quality_filter
+        self.quality_report: Dict[str, int] = {}
         self.raw_data: Optional[pd.DataFrame] = None
         self.processed_data: Optional[pd.DataFrame] = None
+        # Cache colonnaire optionnel (np.memmap) pour les démarrages à chaud
+        self.cache = AISColumnarCache(cache_dir) if cache_dir else None
+        # Mesures par shard du dernier traitement parallèle
+        self.shard_report: List[Dict] = []
+    
+    def load_ais_data(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Charge les données AIS JSON
+        Avec un cache configuré, relit uniquement les colonnes demandées depuis le disque
+        """
+        if self.cache is not None:
+            df = self.cache.load(self.ais_data_path, columns)
+            if df is None:
+                logger.info(f"Cache AIS absent ou périmé pour {self.ais_data_path}, reconstruction")
+                self.cache.build(self.ais_data_path)
+                df = self.cache.load(self.ais_data_path, columns)
+            
+            self.raw_data = self._prepare_frame(df)
+            logger.info(f"Données chargées depuis le cache: {len(self.raw_data)} enregistrements")
+            return self.raw_data
         
-    def load_ais_data(self) -> pd.DataFrame:
-        """Charge les données AIS JSON"""
         logger.info(f"Chargement des données AIS depuis {self.ais_data_path}")
         
         with open(self.ais_data_path, 'r') as f:
             data = json.load(f)
         
-        df = pd.DataFrame(data)
-        
-        # Conversion des types
-        df['TSTAMP'] = pd.to_datetime(df['TSTAMP'], format='%Y-%m-%d %H:%M:%S GMT')
-        df['LATITUDE'] = pd.to_numeric(df['LATITUDE'], errors='coerce')
-        df['LONGITUDE'] = pd.to_numeric(df['LONGITUDE'], errors='coerce')
-        df['SOG'] = pd.to_numeric(df['SOG'], errors='coerce')
-        df['COG'] = pd.to_numeric(df['COG'], errors='coerce')
-        df['DRAUGHT'] = pd.to_numeric(df['DRAUGHT'], errors='coerce')
+        df = coerce_ais_types(pd.DataFrame(data))
+        if columns is not None:
+            df = df[list(columns)]
         
-        # Nettoyage
-        df = df.dropna(subset=['LATITUDE', 'LONGITUDE', 'MMSI'])
+        self.raw_data = self._prepare_frame(df)
+        logger.info(f"Données chargées: {len(self.raw_data)} enregistrements")
         
-        self.raw_data = df
-        logger.info(f"Données chargées: {len(df)} enregistrements")
+        return self.raw_data
+    
+    def _prepare_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Filtre qualité puis profil de types, selon la configuration du processeur"""
+        if self.quality_filter:
+            df = self._filter_quality(df)
+        return self._apply_dtype_profile(df)
+    
+    def _filter_quality(self, df: pd.DataFrame, context: Optional[pd.DataFrame] = None,
+                        deferred: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """Filtre qualité (voir filter_ais_quality); rejets cumulés dans quality_report"""
+        from data_engineering.quality import filter_ais_quality
+        df, counts = filter_ais_quality(df, context=context, deferred=deferred)
+        for rule, count in counts.items():
+            self.quality_report[rule] = self.quality_report.get(rule, 0) + count
+        return df
+    
+    def _apply_dtype_profile(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Applique le profil compact si activé et journalise le gain mémoire"""
+        if not self.compact_dtypes:
+            return df
         
+        before = frame_bytes_per_million_rows(df)
+        df = compact_ais_frame(df)
+        after = frame_bytes_per_million_rows(df)
+        logger.info(
+            f"Profil compact: {before / 1e6:.1f} Mo -> {after / 1e6:.1f} Mo par million de lignes"
+        )
         return df
     
-    def create_voyage_segments(self, min_time_gap_hours: float = 1.0) -> pd.DataFrame:
+    def iter_ais_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+        """
+        Lecture en flux: NDJSON ou tableau JSON, par chunks typés de taille fixe
+        La mémoire reste bornée par chunk_size quelle que soit la taille du fichier
+        Avec le filtre qualité, les règles comparent aussi les pings d'un chunk à ceux du
+        précédent: le dernier ping accepté de chaque navire sert de contexte et le dernier
+        ping de chaque navire n'est jugé qu'au chunk suivant (pings d'un même navire supposés
+        dans l'ordre chronologique, comme iter_voyage_segments)
+        """
+        logger.info(f"Lecture en flux des données AIS depuis {self.ais_data_path} (chunks de {chunk_size})")
+        
+        context: Optional[pd.DataFrame] = None
+        pending: Optional[pd.DataFrame] = None
+        for records in iter_record_chunks(self.ais_data_path, chunk_size):
+            df = coerce_ais_types(pd.DataFrame(records))
+            if df.empty:
+                continue
+            if not self.quality_filter:
+                yield self._apply_dtype_profile(df)
+                continue
+            
+            if pending is not None:
+                df = pd.concat([pending, df], ignore_index=True)
+            deferred = np.zeros(len(df), dtype=bool)
+            deferred[last_ping_per_vessel(df.reset_index(drop=True)).index] = True
+            accepted = self._filter_quality(df, context, deferred)
+            pending = df[deferred]
+            context = last_ping_per_vessel(pd.concat([context, accepted]) if context is not None else accepted)
+            if not accepted.empty:
+                yield self._apply_dtype_profile(accepted)
+        
+        if pending is not None:
+            accepted = self._filter_quality(pending, context)
+            if not accepted.empty:
+                yield self._apply_dtype_profile(accepted)
+    
+    def iter_voyage_segments(self, min_time_gap_hours: float = 1.0,
+                             chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+        """
+        Segmentation en flux
+        Le dernier ping de chaque navire est reporté sur le chunk suivant afin que
+        les segments à cheval sur deux chunks ne soient pas perdus. Suppose que les
+        pings d'un même navire arrivent dans l'ordre chronologique.
+        """
+        carry: Optional[pd.DataFrame] = None
+        
+        for chunk in self.iter_ais_chunks(chunk_size):
+            if carry is not None:
+                chunk = pd.concat([carry, chunk], ignore_index=True)
+            
+            segments = build_voyage_segments(chunk, min_time_gap_hours)
+            if not segments.empty:
+                yield segments
+            
+            carry = last_ping_per_vessel(chunk)
+    
+    def compute_edge_statistics_streaming(self, min_time_gap_hours: float = 1.0,
+                                          chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                          min_observations: int = 3
+                                          ) -> Dict[Tuple[Tuple[float, float], Tuple[float, float]], Dict]:
+        """
+        Statistiques par arête en mémoire constante
+        Chaque chunk de segments est réduit en accumulateurs par arête,
+        fusionnés au fil de l'eau
+        """
+        logger.info("Calcul des statistiques par arête (flux)")
+        
+        moments: Optional[pd.DataFrame] = None
+        
+        for segments in self.iter_voyage_segments(min_time_gap_hours, chunk_size):
+            moments = merge_edge_moments(moments, aggregate_edge_moments(segments))
+        
+        aggregated = edge_moments_to_dict(moments, min_observations)
+        logger.info(f"Statistiques agrégées pour {len(aggregated)} arêtes")
+        
+        return aggregated
+    
+    def create_voyage_segments(self, min_time_gap_hours: float = 1.0,
+                               vectorized: bool = True, drop_raw: bool = False,
+                               simplify_tolerance_nm: Optional[float] = None) -> pd.DataFrame:
         """
         Crée des segments de voyage continus
         Groupe les points AIS consécutifs d'un même navire
+        vectorized=False conserve l'ancienne boucle ligne par ligne (référence)
+        drop_raw=True libère raw_data une fois les segments construits
+        simplify_tolerance_nm: simplifie d'abord chaque trace (Douglas-Peucker, voir trajectory)
         """
         logger.info(f"Création des segments de voyage (gap minimum: {min_time_gap_hours}h)")
         
+        if vectorized:
+            pings = self.raw_data
+            if simplify_tolerance_nm is not None:
+                from data_engineering.trajectory import simplify_tracks
+                pings = simplify_tracks(pings, simplify_tolerance_nm, max_span_hours=min_time_gap_hours)
+            self.processed_data = build_voyage_segments(pings, min_time_gap_hours)
+        else:
+            self.processed_data = self._create_voyage_segments_loop(min_time_gap_hours)
+        
+        logger.info(f"Créé {len(self.processed_data)} segments de voyage")
+        
+        if drop_raw:
+            self.raw_data = None
+        
+        return self.processed_data
+    
+    def _create_voyage_segments_loop(self, min_time_gap_hours: float) -> pd.DataFrame:
+        """Implémentation historique par itération (utilisée pour les tests de parité)"""
         df = self.raw_data.sort_values(['MMSI', 'TSTAMP'])
         segments = []
         
@@ -88,33 +374,94 @@ class AISDataProcessor:
                 
                 segments.append(segment)
         
-        self.processed_data = pd.DataFrame(segments)
-        logger.info(f"Créé {len(segments)} segments de voyage")
-        
-        return self.processed_data
+        return pd.DataFrame(segments)
     
     @staticmethod
     def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """
         Calcule la distance en nautical miles entre deux points
+        Accepte aussi des tableaux NumPy (voir data_engineering.geodesy)
         """
-        from math import radians, cos, sin, asin, sqrt
-        
-        lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-        dlon = lon2 - lon1
-        dlat = lat2 - lat1
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * asin(sqrt(a))
-        nm = c * 3440.065  # Rayon terrestre en nautical miles
-        return nm
+        return haversine_distance(lat1, lon1, lat2, lon2)
     
-    def compute_edge_statistics(self) -> Dict[Tuple[Tuple[float, float], Tuple[float, float]], Dict]:
+    def compute_edge_statistics(self, min_observations: int = 3,
+                                vectorized: bool = True
+                                ) -> Dict[Tuple[Tuple[float, float], Tuple[float, float]], Dict]:
         """
         Agrège les statistiques par arête (route)
         Retourne temps moyen, consommation moyenne, etc.
+        Seules les arêtes avec au moins min_observations sont conservées
         """
         logger.info("Calcul des statistiques par arête")
         
+        if vectorized:
+            aggregated = edge_moments_to_dict(
+                aggregate_edge_moments(self.processed_data), min_observations
+            )
+        else:
+            aggregated = self._compute_edge_statistics_loop(min_observations)
+        
+        logger.info(f"Statistiques agrégées pour {len(aggregated)} arêtes")
+        
+        return aggregated
+    
+    def compute_edge_statistics_parallel(self, n_workers: Optional[int] = None,
+                                         n_shards: Optional[int] = None,
+                                         min_time_gap_hours: float = 1.0,
+                                         min_observations: int = 3
+                                         ) -> Dict[Tuple[Tuple[float, float], Tuple[float, float]], Dict]:
+        """
+        Segmentation + agrégation par arête réparties par MMSI sur un pool de processus
+        Travaille directement sur raw_data; le détail par shard est dans shard_report
+        """
+        from data_engineering.parallel import compute_edge_moments_parallel, shard_skew
+        
+        logger.info(f"Calcul parallèle des statistiques par arête ({n_workers or 'auto'} workers)")
+        
+        moments, timings = compute_edge_moments_parallel(
+            self.raw_data, n_workers, n_shards, min_time_gap_hours
+        )
+        self.shard_report = [timing.__dict__ for timing in timings]
+        
+        skew = shard_skew(timings)
+        for timing in timings:
+            logger.info(
+                f"  Shard {timing.shard_id}: {timing.pings} pings, {timing.segments} segments, "
+                f"{timing.edges} arêtes en {timing.seconds:.2f}s"
+            )
+        logger.info(f"Déséquilibre des shards (max/moyenne): pings {skew['pings']:.2f}, temps {skew['seconds']:.2f}")
+        
+        aggregated = edge_moments_to_dict(moments, min_observations)
+        logger.info(f"Statistiques agrégées pour {len(aggregated)} arêtes")
+        
+        return aggregated
+    
+    def compute_edge_profiles(self, min_observations: int = 3) -> EdgeProfiles:
+        """Profils par heure de la semaine, mois et classe de tirant d'eau (voir edge_profiles)"""
+        return EdgeProfiles.from_segments(self.processed_data, min_observations)
+    
+    def detect_port_calls(self, ports: Dict[str, WayPoint], port_radius_nm: float = 30.0,
+                          berth_radius_nm: float = 3.0) -> pd.DataFrame:
+        """
+        Escales (mouillage, quai, attente, séjour) détectées sur raw_data (voir port_calls)
+        ports: waypoints du graphe; seuls ceux de type 'port' sont retenus
+        """
+        from data_engineering.port_calls import detect_port_calls
+        return detect_port_calls(self.raw_data, ports, port_radius_nm, berth_radius_nm)
+    
+    def snap_edges_to_graph(self, builder: "GeospatialGraphBuilder", radius_nm: float = 50,
+                            min_observations: int = 3) -> int:
+        """
+        Étape AIS -> graphe: agrège processed_data, rattache les arêtes aux waypoints
+        du builder et les ajoute en masse. Retourne le nombre d'arêtes du graphe écrites
+        """
+        moments = aggregate_edge_moments(self.processed_data)
+        snapped = snap_edge_moments(moments, builder, radius_nm, min_observations)
+        return builder.add_edges_from_snapped(snapped)
+    
+    def _compute_edge_statistics_loop(self, min_observations: int
+                                      ) -> Dict[Tuple[Tuple[float, float], Tuple[float, float]], Dict]:
+        """Implémentation historique par iterrows (utilisée pour les tests de parité)"""
         edge_stats = {}
         
         for _, row in self.processed_data.iterrows():
@@ -144,7 +491,7 @@ class AISDataProcessor:
         # Agrégation
         aggregated = {}
         for edge_key, stats in edge_stats.items():
-            if stats['count'] >= 3:  # Au moins 3 observations
+            if stats['count'] >= min_observations:
                 aggregated[edge_key] = {
                     'distance_nm': np.mean(stats['distances']),
                     'time_hours_avg': np.mean(stats['times']),
@@ -153,8 +500,6 @@ class AISDataProcessor:
                     'fuel_consumption_tons': np.mean(stats['distances']) * 0.015,  # Estimation: 0.015t par NM
                 }
         
-        logger.info(f"Statistiques agrégées pour {len(aggregated)} arêtes")
-        
         return aggregated
 
 
@@ -164,10 +509,13 @@ class GeospatialGraphBuilder:
     def __init__(self):
         self.graph = nx.DiGraph()
         self.waypoints: Dict[str, WayPoint] = {}
-        
+        # Index spatial reconstruit à la demande après modification des waypoints
+        self._spatial_index: Optional[WaypointIndex] = None
+    
     def add_waypoint(self, waypoint: WayPoint):
         """Ajoute un point d'intérêt (port, waypoint)"""
         self.waypoints[waypoint.id] = waypoint
+        self._spatial_index = None
         self.graph.add_node(
             waypoint.id,
             latitude=waypoint.latitude,
@@ -192,30 +540,106 @@ class GeospatialGraphBuilder:
             navigability=attributes.navigability,
             blocked=attributes.blocked,
         )
+        bump_graph_version(self.graph)
+    
+    def update_edge_from_ais(self, from_wp: WayPoint, to_wp: WayPoint,
+                             attributes: EdgeAttributes, observations: float = 0):
+        """
+        Met à jour en place les attributs AIS d'une arête (distance, temps, carburant)
+        Les risques et blocages déjà présents sont conservés; l'arête est créée si absente
+        """
+        if not self.graph.has_edge(from_wp.id, to_wp.id):
+            self.add_edge_from_ais(from_wp, to_wp, attributes)
+        
+        self.graph.edges[from_wp.id, to_wp.id].update(
+            weight=attributes.distance_nm,
+            time_hours=attributes.time_hours_avg,
+            fuel_tons=attributes.fuel_consumption_tons,
+            observations=observations,
+        )
+        bump_graph_version(self.graph)
+    
+    def add_edges_from_snapped(self, snapped: pd.DataFrame) -> int:
+        """
+        Ajout en masse des arêtes AIS rattachées (voir graph_snapping), en un seul add_edges_from
+        Les nouvelles arêtes reçoivent les attributs par défaut d'EdgeAttributes; pour les
+        arêtes existantes, seuls distance, temps, carburant, observations et edge_key
+        (clé des profils temporels) sont remplacés, sans tenir compte des valeurs en place:
+        chaque ligne doit agréger toutes les arêtes AIS de sa paire de waypoints (rattachement
+        de l'ensemble des accumulateurs, pas d'un sous-ensemble; voir push_to_graph)
+        """
+        if snapped is None or snapped.empty:
+            return 0
+        
+        defaults = EdgeAttributes(distance_nm=0, time_hours_avg=0, fuel_consumption_tons=0)
+        new_edge = {
+            'weather_risk': defaults.weather_risk.value,
+            'piracy_risk': defaults.piracy_risk.value,
+            'navigability': defaults.navigability,
+            'blocked': defaults.blocked,
+        }
+        
+        has_edge = self.graph.has_edge
+        edges = []
+        for from_id, to_id, observations, distance_nm, time_hours, fuel_tons, edge_key in zip(
+            *(snapped[column].tolist() for column in
+              ('from_id', 'to_id', 'observations', 'distance_nm', 'time_hours', 'fuel_tons', 'edge_key'))
+        ):
+            attributes = {'weight': distance_nm, 'time_hours': time_hours, 'fuel_tons': fuel_tons,
+                          'observations': observations, 'edge_key': edge_key}
+            if not has_edge(from_id, to_id):
+                attributes.update(new_edge)
+            edges.append((from_id, to_id, attributes))
+        
+        self.graph.add_edges_from(edges)
+        bump_graph_version(self.graph)
+        logger.info(f"{len(edges)} arêtes AIS ajoutées ou mises à jour dans le graphe")
+        return len(edges)
     
     def get_graph(self) -> nx.DiGraph:
         """Retourne le graphe NetworkX"""
         return self.graph
     
+    @property
+    def spatial_index(self) -> WaypointIndex:
+        """Index KD-tree des waypoints (reconstruit paresseusement)"""
+        if self._spatial_index is None or len(self._spatial_index) != len(self.waypoints):
+            wps = list(self.waypoints.values())
+            self._spatial_index = WaypointIndex(
+                [wp.id for wp in wps],
+                np.array([wp.latitude for wp in wps], dtype=float),
+                np.array([wp.longitude for wp in wps], dtype=float),
+            )
+        return self._spatial_index
+    
+    def nearest_waypoints(self, latitudes: np.ndarray, longitudes: np.ndarray, k: int = 1,
+                          radius_nm: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        k waypoints les plus proches de chaque position, en lot
+        Retourne (identifiants, distances NM) de forme (N, k); None / inf hors rayon
+        """
+        index = self.spatial_index
+        distances, indices = index.nearest(latitudes, longitudes, k, radius_nm)
+        ids = np.full(indices.shape, None, dtype=object)
+        found = indices >= 0
+        ids[found] = index.ids[indices[found]]
+        return ids, distances
+    
+    def waypoints_within_radius(self, latitudes: np.ndarray, longitudes: np.ndarray,
+                                radius_nm: float) -> List[List[str]]:
+        """Identifiants des waypoints à moins de radius_nm de chaque position (par distance)"""
+        index = self.spatial_index
+        return [index.ids[found].tolist() for found in index.within_radius(latitudes, longitudes, radius_nm)]
+    
     def get_waypoint_by_proximity(self, latitude: float, longitude: float, 
                                    radius_nm: float = 50) -> Optional[WayPoint]:
         """Trouve le waypoint le plus proche"""
-        from data_engineering.ais_processor import AISDataProcessor
-        
-        distances = {}
-        for wp_id, wp in self.waypoints.items():
-            dist = AISDataProcessor.haversine_distance(
-                latitude, longitude,
-                wp.latitude, wp.longitude
-            )
-            if dist <= radius_nm:
-                distances[wp_id] = dist
-        
-        if distances:
-            closest_id = min(distances, key=distances.get)
-            return self.waypoints[closest_id]
+        if not self.waypoints:
+            return None
         
-        return None
+        ids, _ = self.nearest_waypoints(latitude, longitude, k=1, radius_nm=radius_nm)
+        closest = ids[0, 0]
+        return self.waypoints[closest] if closest is not None else None
     
     def get_graph_statistics(self) -> Dict:
         """Retourne les statistiques du graphe"""
@@ -0,0 +1,82 @@
+"""
+Lecture en flux des fichiers AIS
+Supporte le NDJSON (un objet par ligne) et un tableau JSON de premier niveau,
+sans jamais charger le fichier complet en mémoire
+"""
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, List, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCK_SIZE = 1 << 20  # 1 Mo lu à la fois
+DEFAULT_CHUNK_SIZE = 100_000  # Enregistrements par chunk
+
+_WHITESPACE = ' \t\r\n'
+
+
+def iter_json_records(path: Union[str, Path], block_size: int = DEFAULT_BLOCK_SIZE) -> Iterator[Dict]:
+    """
+    Itère sur les enregistrements d'un fichier NDJSON ou d'un tableau JSON
+    Le buffer ne contient jamais plus d'un bloc plus un enregistrement partiel
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    in_array = False
+    started = False
+    eof = False
+    
+    with open(path, 'r') as f:
+        while True:
+            # Sauter séparateurs: espaces, virgules et crochets du tableau
+            while pos < len(buffer):
+                char = buffer[pos]
+                if char in _WHITESPACE or (in_array and char == ','):
+                    pos += 1
+                elif not started and char == '[':
+                    in_array = True
+                    started = True
+                    pos += 1
+                elif in_array and char == ']':
+                    return
+                else:
+                    break
+            
+            if pos < len(buffer):
+                started = True
+                try:
+                    record, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    record = None
+                
+                if record is not None:
+                    pos = end
+                    yield record
+                    continue
+            elif eof:
+                return
+            
+            # Enregistrement incomplet ou buffer vide: lire le bloc suivant
+            block = f.read(block_size)
+            buffer = buffer[pos:] + block
+            pos = 0
+            eof = not block
+
+
+def iter_record_chunks(path: Union[str, Path], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                       block_size: int = DEFAULT_BLOCK_SIZE) -> Iterator[List[Dict]]:
+    """Regroupe les enregistrements en listes de taille fixe"""
+    chunk: List[Dict] = []
+    
+    for record in iter_json_records(path, block_size):
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    
+    if chunk:
+        yield chunk
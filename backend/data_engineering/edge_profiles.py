@@ -0,0 +1,217 @@
+"""
+Profils temporels et saisonniers des arêtes AIS
+Pour chaque arête et chaque classe (heure de la semaine, mois, classe de tirant d'eau),
+effectif et sommes des temps et vitesses sont rangés dans des tableaux NumPy denses
+(arête x classe): une recherche est un accès indexé en O(1).
+
+Mémoire: ~3 Ko par arête (185 classes x 4 tableaux float32); seules les arêtes
+avec au moins min_observations segments sont profilées.
+"""
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from data_engineering.edge_statistics import encode_edge_keys
+
+logger = logging.getLogger(__name__)
+
+# Bornes (m) des classes de tirant d'eau: <6, 6-9, 9-12, 12-15, >=15
+DRAUGHT_CLASS_BOUNDS_M = np.array([6.0, 9.0, 12.0, 15.0])
+
+# Profil -> nombre de classes
+PROFILES = {
+    'hour_of_week': 168,  # lundi 00h = 0
+    'month': 12,          # janvier = 0
+    'draught_class': len(DRAUGHT_CLASS_BOUNDS_M) + 1,
+}
+
+# Effectif minimum d'une classe pour remplacer la moyenne de l'arête
+MIN_BUCKET_OBSERVATIONS = 3
+
+_ARRAYS = ('count', 'time_sum', 'speed_sum', 'speed_count')
+
+
+def profile_buckets(timestamps: np.ndarray, draught: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """Classe de chaque observation pour chaque profil (-1 = inconnue)"""
+    ts = np.asarray(timestamps).astype('datetime64[ns]')
+    missing = np.isnat(ts)
+    hours = ts.view(np.int64) // 3_600_000_000_000
+    # 1970-01-01 était un jeudi (3 avec lundi = 0)
+    hour_of_week = ((hours // 24 + 3) % 7) * 24 + hours % 24
+    month = ts.astype('datetime64[M]').view(np.int64) % 12
+    
+    buckets = {
+        'hour_of_week': np.where(missing, -1, hour_of_week),
+        'month': np.where(missing, -1, month),
+    }
+    if draught is None:
+        buckets['draught_class'] = np.full(len(ts), -1, dtype=np.int64)
+    else:
+        draught = np.asarray(draught, dtype=float)
+        classes = np.searchsorted(DRAUGHT_CLASS_BOUNDS_M, draught, side='right')
+        buckets['draught_class'] = np.where(np.isnan(draught), -1, classes)
+    return buckets
+
+
+def bucket_at(when: datetime, profile: str = 'hour_of_week') -> int:
+    """Classe temporelle d'un instant (heure de la semaine ou mois)"""
+    if profile == 'hour_of_week':
+        return when.weekday() * 24 + when.hour
+    if profile == 'month':
+        return when.month - 1
+    raise ValueError(f"Profil non temporel: {profile}")
+
+
+def draught_class(draught_m: float) -> int:
+    """Classe de tirant d'eau d'un navire"""
+    return int(np.searchsorted(DRAUGHT_CLASS_BOUNDS_M, draught_m, side='right'))
+
+
+class EdgeProfiles:
+    """
+    Tableaux denses (arête x classe) par profil: count, time_sum, speed_sum, speed_count
+    edge_keys: clés int64 triées (voir encode_edge_keys); l'identifiant d'une arête
+    est sa position dans ce tableau
+    """
+    
+    def __init__(self, edge_keys: np.ndarray, arrays: Dict[str, Dict[str, np.ndarray]],
+                 edge_count: np.ndarray, edge_time_sum: np.ndarray):
+        self.edge_keys = np.asarray(edge_keys, dtype=np.int64)
+        self.arrays = arrays
+        self.edge_count = edge_count
+        self.edge_time_sum = edge_time_sum
+        self._ids: Optional[Dict[int, int]] = None
+    
+    def __len__(self) -> int:
+        return len(self.edge_keys)
+    
+    @classmethod
+    def from_segments(cls, segments: pd.DataFrame, min_observations: int = 3,
+                      edge_keys: Optional[np.ndarray] = None) -> "EdgeProfiles":
+        """
+        Profils construits par bincount à partir des segments de create_voyage_segments
+        edge_keys: clé par segment (défaut: arête AIS arrondie à 0.01°)
+        """
+        if edge_keys is None:
+            edge_keys = encode_edge_keys(
+                segments['from_lat'].to_numpy(dtype=float), segments['from_lon'].to_numpy(dtype=float),
+                segments['to_lat'].to_numpy(dtype=float), segments['to_lon'].to_numpy(dtype=float),
+            )
+        edge_keys = np.asarray(edge_keys, dtype=np.int64)
+        
+        keys, edge_ids, totals = np.unique(edge_keys, return_inverse=True, return_counts=True)
+        profiled = totals >= min_observations
+        # Renumérotation des seules arêtes profilées
+        remap = np.full(len(keys), -1, dtype=np.int64)
+        remap[profiled] = np.arange(profiled.sum())
+        edge_ids = remap[edge_ids]
+        n_edges = int(profiled.sum())
+        
+        selected = edge_ids >= 0
+        edge_ids = edge_ids[selected]
+        time_hours = segments['time_hours'].to_numpy(dtype=float)[selected]
+        speed = segments['sog_knots'].to_numpy(dtype=float)[selected]
+        draught = segments['draught'].to_numpy(dtype=float)[selected] if 'draught' in segments.columns else None
+        buckets = profile_buckets(segments['timestamp'].to_numpy()[selected], draught)
+        
+        arrays = {}
+        for profile, n_buckets in PROFILES.items():
+            bucket = buckets[profile]
+            valid = bucket >= 0
+            flat = edge_ids[valid] * n_buckets + bucket[valid]
+            speed_valid = ~np.isnan(speed[valid])
+            
+            def dense(index, weights=None):
+                counts = np.bincount(index, weights=weights, minlength=n_edges * n_buckets)
+                return counts.reshape(n_edges, n_buckets).astype(np.float32)
+            
+            arrays[profile] = {
+                'count': dense(flat),
+                'time_sum': dense(flat, time_hours[valid]),
+                'speed_sum': dense(flat[speed_valid], speed[valid][speed_valid]),
+                'speed_count': dense(flat[speed_valid]),
+            }
+        
+        profiles = cls(
+            keys[profiled], arrays,
+            np.bincount(edge_ids, minlength=n_edges).astype(np.float64),
+            np.bincount(edge_ids, weights=time_hours, minlength=n_edges),
+        )
+        logger.info(f"Profils temporels: {n_edges} arêtes, {profiles.nbytes / 1e6:.1f} Mo")
+        return profiles
+    
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for arrays in self.arrays.values() for a in arrays.values())
+    
+    def edge_id(self, edge_key: int) -> int:
+        """Identifiant dense d'une arête (-1 si non profilée), via un dict construit à la demande"""
+        if self._ids is None:
+            self._ids = dict(zip(self.edge_keys.tolist(), range(len(self.edge_keys))))
+        return self._ids.get(int(edge_key), -1)
+    
+    def edge_ids(self, edge_keys: np.ndarray) -> np.ndarray:
+        """Identifiants denses d'un lot de clés (-1 si non profilées)"""
+        edge_keys = np.asarray(edge_keys, dtype=np.int64)
+        ids = np.full(len(edge_keys), -1, dtype=np.int64)
+        if len(self.edge_keys):
+            position = np.minimum(np.searchsorted(self.edge_keys, edge_keys), len(self.edge_keys) - 1)
+            found = self.edge_keys[position] == edge_keys
+            ids[found] = position[found]
+        return ids
+    
+    def mean_travel_time(self, edge_id: int) -> float:
+        """Temps moyen toutes classes confondues"""
+        return float(self.edge_time_sum[edge_id] / self.edge_count[edge_id])
+    
+    def travel_time(self, edge_id: int, profile: str, bucket: int,
+                    min_observations: int = MIN_BUCKET_OBSERVATIONS) -> float:
+        """Temps moyen de l'arête dans une classe, NaN si la classe est trop peu observée"""
+        arrays = self.arrays[profile]
+        count = arrays['count'][edge_id, bucket]
+        if count < min_observations:
+            return float('nan')
+        return float(arrays['time_sum'][edge_id, bucket] / count)
+    
+    def travel_time_at(self, edge_id: int, when: datetime) -> float:
+        """Temps attendu à un instant: heure de la semaine, sinon mois, sinon moyenne de l'arête"""
+        for profile in ('hour_of_week', 'month'):
+            value = self.travel_time(edge_id, profile, bucket_at(when, profile))
+            if not np.isnan(value):
+                return value
+        return self.mean_travel_time(edge_id)
+    
+    def time_factor(self, edge_key: int, when: datetime) -> float:
+        """Rapport temps attendu à cet instant / temps moyen (1.0 si l'arête n'est pas profilée)"""
+        edge_id = self.edge_id(edge_key)
+        if edge_id < 0:
+            return 1.0
+        return self.travel_time_at(edge_id, when) / self.mean_travel_time(edge_id)
+    
+    def mean_times(self, profile: str, min_observations: int = MIN_BUCKET_OBSERVATIONS) -> np.ndarray:
+        """Tableau (arête x classe) des temps moyens, NaN pour les classes trop peu observées"""
+        arrays = self.arrays[profile]
+        count = arrays['count']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(count >= min_observations, arrays['time_sum'] / count, np.nan)
+    
+    def save(self, path: Union[str, Path]):
+        """Persiste les tableaux au format npz (sans pickle)"""
+        np.savez(
+            path, edge_keys=self.edge_keys, edge_count=self.edge_count, edge_time_sum=self.edge_time_sum,
+            **{f"{profile}__{name}": array
+               for profile, arrays in self.arrays.items() for name, array in arrays.items()},
+        )
+    
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "EdgeProfiles":
+        with np.load(path) as data:
+            arrays = {
+                profile: {name: data[f"{profile}__{name}"] for name in _ARRAYS}
+                for profile in PROFILES
+            }
+            return cls(data['edge_keys'], arrays, data['edge_count'], data['edge_time_sum'])
@@ -0,0 +1,258 @@
+"""
+Agrégation vectorisée des statistiques par arête AIS
+Chaque arête (coordonnées arrondies à 0.01°) est résumée par des accumulateurs
+de taille fixe: effectif, moyenne, M2 (Welford/Chan), p50 et p90 par métrique.
+Les tables d'accumulateurs se fusionnent sans jamais conserver les observations.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data_engineering.geodesy import haversine_distance
+
+EdgeKey = Tuple[Tuple[float, float], Tuple[float, float]]
+
+# Métriques suivies par arête: nom -> colonne des segments
+METRICS = {
+    'distance': 'distance_nm',
+    'time': 'time_hours',
+    'speed': 'sog_knots',
+}
+QUANTILES = {'p50': 0.5, 'p90': 0.9}
+
+# Encodage d'une clé d'arête en int64: coordonnées en centièmes de degré
+_LAT_SPAN = 18001  # -90.00 .. 90.00
+_LON_SPAN = 36001  # -180.00 .. 180.00
+_POINT_SPAN = _LAT_SPAN * _LON_SPAN
+
+FUEL_TONS_PER_NM = 0.015  # Estimation: 0.015t par NM
+
+
+def encode_edge_keys(from_lat: np.ndarray, from_lon: np.ndarray,
+                     to_lat: np.ndarray, to_lon: np.ndarray) -> np.ndarray:
+    """Clé int64 unique par arête arrondie à 0.01°"""
+    def point_code(lat, lon):
+        lat_c = np.rint(np.asarray(lat, dtype=float) * 100).astype(np.int64) + 9000
+        lon_c = np.rint(np.asarray(lon, dtype=float) * 100).astype(np.int64) + 18000
+        return lat_c * _LON_SPAN + lon_c
+    
+    return point_code(from_lat, from_lon) * _POINT_SPAN + point_code(to_lat, to_lon)
+
+
+def decode_edge_keys(codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Inverse de encode_edge_keys -> (from_lat, from_lon, to_lat, to_lon)"""
+    codes = np.asarray(codes, dtype=np.int64)
+    from_code, to_code = np.divmod(codes, _POINT_SPAN)
+    from_lat, from_lon = np.divmod(from_code, _LON_SPAN)
+    to_lat, to_lon = np.divmod(to_code, _LON_SPAN)
+    return (
+        (from_lat - 9000) / 100, (from_lon - 18000) / 100,
+        (to_lat - 9000) / 100, (to_lon - 18000) / 100,
+    )
+
+
+def edge_observations(segments: pd.DataFrame) -> pd.DataFrame:
+    """Une ligne par segment: clé d'arête, distance, temps et vitesse"""
+    from_lat = segments['from_lat'].to_numpy(dtype=float)
+    from_lon = segments['from_lon'].to_numpy(dtype=float)
+    to_lat = segments['to_lat'].to_numpy(dtype=float)
+    to_lon = segments['to_lon'].to_numpy(dtype=float)
+    
+    return pd.DataFrame({
+        'edge_key': encode_edge_keys(from_lat, from_lon, to_lat, to_lon),
+        'distance_nm': haversine_distance(from_lat, from_lon, to_lat, to_lon),
+        'time_hours': segments['time_hours'].to_numpy(dtype=float),
+        'sog_knots': segments['sog_knots'].to_numpy(dtype=float),
+    })
+
+
+def aggregate_edge_moments(segments: pd.DataFrame) -> pd.DataFrame:
+    """
+    Réductions groupby vectorisées: une ligne d'accumulateurs par arête
+    Colonnes: count, puis <métrique>_count/_mean/_m2/_p50/_p90
+    """
+    observations = edge_observations(segments)
+    grouped = observations.groupby('edge_key', sort=True)
+    columns = list(METRICS.values())
+    
+    moments = pd.DataFrame({'count': grouped.size()})
+    counts = grouped[columns].count()
+    means = grouped[columns].mean()
+    variances = grouped[columns].var(ddof=0)
+    keys = observations['edge_key'].to_numpy()
+    
+    for metric, column in METRICS.items():
+        moments[f'{metric}_count'] = counts[column]
+        moments[f'{metric}_mean'] = means[column]
+        moments[f'{metric}_m2'] = variances[column] * counts[column]
+        quantiles = grouped_quantiles(keys, observations[column].to_numpy(), list(QUANTILES.values()))
+        for i, name in enumerate(QUANTILES):
+            moments[f'{metric}_{name}'] = quantiles[i].reindex(moments.index)
+    
+    moments.index.name = 'edge_key'
+    return moments
+
+
+def grouped_quantiles(keys: np.ndarray, values: np.ndarray, qs) -> list:
+    """
+    Quantiles par groupe (interpolation linéaire, comme pandas) via un tri lexicographique
+    unique: évite le chemin lent de groupby().quantile() avec beaucoup de groupes
+    """
+    valid = ~np.isnan(values)
+    keys, values = keys[valid], values[valid]
+    order = np.lexsort((values, keys))
+    keys, values = keys[order], values[order]
+    
+    group_keys, starts, sizes = np.unique(keys, return_index=True, return_counts=True)
+    results = []
+    for q in qs:
+        position = starts + q * (sizes - 1)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        fraction = position - lower
+        results.append(pd.Series(
+            values[lower] + (values[upper] - values[lower]) * fraction, index=group_keys
+        ))
+    return results
+
+
+def merge_edge_moments(left: Optional[pd.DataFrame],
+                       right: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """
+    Fusion de deux tables d'accumulateurs (formule parallèle de Chan)
+    Les quantiles sont combinés par moyenne pondérée par l'effectif (approximation)
+    """
+    if left is None or left.empty:
+        return right
+    if right is None or right.empty:
+        return left
+    
+    index = left.index.union(right.index)
+    a = left.reindex(index)
+    b = right.reindex(index)
+    
+    merged = pd.DataFrame(index=index)
+    merged['count'] = a['count'].fillna(0) + b['count'].fillna(0)
+    
+    for metric in METRICS:
+        n_a = a[f'{metric}_count'].fillna(0)
+        n_b = b[f'{metric}_count'].fillna(0)
+        n = n_a + n_b
+        mean_a = a[f'{metric}_mean'].fillna(0)
+        mean_b = b[f'{metric}_mean'].fillna(0)
+        safe_n = n.where(n > 0, 1)
+        delta = mean_b - mean_a
+        
+        merged[f'{metric}_count'] = n
+        merged[f'{metric}_mean'] = (mean_a + delta * n_b / safe_n).where(n > 0)
+        merged[f'{metric}_m2'] = (
+            a[f'{metric}_m2'].fillna(0) + b[f'{metric}_m2'].fillna(0) + delta ** 2 * n_a * n_b / safe_n
+        ).where(n > 0)
+        for name in QUANTILES:
+            q_a = a[f'{metric}_{name}'].fillna(0)
+            q_b = b[f'{metric}_{name}'].fillna(0)
+            merged[f'{metric}_{name}'] = ((q_a * n_a + q_b * n_b) / safe_n).where(n > 0)
+    
+    return merged
+
+
+def combine_edge_moments(tables: List[Optional[pd.DataFrame]]) -> Optional[pd.DataFrame]:
+    """
+    Fusion de N tables d'accumulateurs en une seule réduction groupby
+    (équivalent à des merge_edge_moments successifs, sans réalignement répété)
+    """
+    tables = [t for t in tables if t is not None and not t.empty]
+    if not tables:
+        return None
+    if len(tables) == 1:
+        return tables[0]
+    
+    stacked = pd.concat(tables)
+    by_edge = stacked.groupby(level=0, sort=True)
+    
+    combined = pd.DataFrame({'count': by_edge['count'].sum()})
+    for metric in METRICS:
+        n = stacked[f'{metric}_count']
+        mean = stacked[f'{metric}_mean'].fillna(0)
+        n_total = n.groupby(level=0, sort=True).sum()
+        safe_total = n_total.where(n_total > 0)
+        mean_total = (n * mean).groupby(level=0, sort=True).sum() / safe_total
+        
+        # Écart de chaque moyenne partielle à la moyenne globale
+        deviation = mean.to_numpy() - mean_total.reindex(stacked.index).fillna(0).to_numpy()
+        m2 = stacked[f'{metric}_m2'].fillna(0) + n * deviation ** 2
+        
+        combined[f'{metric}_count'] = n_total
+        combined[f'{metric}_mean'] = mean_total
+        combined[f'{metric}_m2'] = m2.groupby(level=0, sort=True).sum().where(n_total > 0)
+        for name in QUANTILES:
+            weighted = n * stacked[f'{metric}_{name}'].fillna(0)
+            combined[f'{metric}_{name}'] = weighted.groupby(level=0, sort=True).sum() / safe_total
+    
+    combined.index.name = 'edge_key'
+    return combined
+
+
+def decay_edge_moments(moments: Optional[pd.DataFrame], factor: float) -> Optional[pd.DataFrame]:
+    """
+    Décroissance exponentielle: les effectifs (et M2) sont multipliés par factor,
+    moyennes et quantiles sont inchangés
+    """
+    if moments is None or factor == 1.0:
+        return moments
+    
+    decayed = moments.copy()
+    decayed['count'] *= factor
+    for metric in METRICS:
+        decayed[f'{metric}_count'] *= factor
+        decayed[f'{metric}_m2'] *= factor
+    return decayed
+
+
+def edge_moments_to_dict(moments: Optional[pd.DataFrame],
+                         min_observations: float = 3) -> Dict[EdgeKey, Dict]:
+    """
+    Format historique de compute_edge_statistics, enrichi des variances et quantiles
+    Une vitesse manquante sur une observation rend speed_avg_knots NaN (comme np.mean)
+    """
+    aggregated: Dict[EdgeKey, Dict] = {}
+    
+    if moments is None or moments.empty:
+        return aggregated
+    
+    moments = moments[moments['count'] >= min_observations]
+    from_lat, from_lon, to_lat, to_lon = decode_edge_keys(moments.index.to_numpy())
+    
+    count = moments['count'].to_numpy()
+    # Tolérance: après décroissance, les effectifs sont des flottants
+    speed_complete = moments['speed_count'].to_numpy() >= count * (1 - 1e-9)
+    speed_avg = np.where(speed_complete, moments['speed_mean'].to_numpy(), np.nan)
+    variances = {
+        metric: moments[f'{metric}_m2'].to_numpy() / np.maximum(moments[f'{metric}_count'].to_numpy(), 1)
+        for metric in METRICS
+    }
+    distance_avg = moments['distance_mean'].to_numpy()
+    time_avg = moments['time_mean'].to_numpy()
+    quantiles = {
+        column: moments[column].to_numpy()
+        for column in ('time_p50', 'time_p90', 'speed_p50', 'speed_p90')
+    }
+    
+    for i in range(len(moments)):
+        aggregated[((from_lat[i], from_lon[i]), (to_lat[i], to_lon[i]))] = {
+            'distance_nm': distance_avg[i],
+            'time_hours_avg': time_avg[i],
+            'speed_avg_knots': speed_avg[i],
+            'observations': int(count[i]) if float(count[i]).is_integer() else float(count[i]),
+            'fuel_consumption_tons': distance_avg[i] * FUEL_TONS_PER_NM,
+            'distance_nm_var': variances['distance'][i],
+            'time_hours_var': variances['time'][i],
+            'time_hours_p50': quantiles['time_p50'][i],
+            'time_hours_p90': quantiles['time_p90'][i],
+            'speed_knots_var': variances['speed'][i],
+            'speed_knots_p50': quantiles['speed_p50'][i],
+            'speed_knots_p90': quantiles['speed_p90'][i],
+        }
+    
+    return aggregated
@@ -0,0 +1,181 @@
+"""
+Store persistant et incrémental des statistiques par arête
+Les nouveaux lots AIS sont fusionnés dans les accumulateurs existants sans
+retraiter l'historique; le dernier ping de chaque navire est conservé pour
+relier les segments à cheval sur deux lots.
+"""
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from data_engineering.ais_processor import (
+    AISDataProcessor,
+    GeospatialGraphBuilder,
+    build_voyage_segments,
+    last_ping_per_vessel,
+)
+from data_engineering.ais_stream import DEFAULT_CHUNK_SIZE
+from data_engineering.edge_statistics import (
+    aggregate_edge_moments,
+    decay_edge_moments,
+    edge_moments_to_dict,
+    merge_edge_moments,
+)
+from data_engineering.graph_snapping import snap_edge_moments
+
+logger = logging.getLogger(__name__)
+
+# Colonnes des pings nécessaires à la segmentation (état reporté entre lots)
+CARRY_COLUMNS = ['MMSI', 'NAME', 'TSTAMP', 'LATITUDE', 'LONGITUDE', 'SOG', 'DRAUGHT']
+
+
+class EdgeStatisticsStore:
+    """
+    Accumulateurs par arête mis à jour lot par lot
+    decay_half_life_hours: demi-vie de la décroissance exponentielle (None = aucune),
+    mesurée sur l'horodatage AIS entre deux lots
+    """
+    
+    def __init__(self, min_time_gap_hours: float = 1.0,
+                 decay_half_life_hours: Optional[float] = None):
+        self.min_time_gap_hours = min_time_gap_hours
+        self.decay_half_life_hours = decay_half_life_hours
+        self.moments: Optional[pd.DataFrame] = None
+        self.carry: Optional[pd.DataFrame] = None
+        self.last_timestamp: Optional[pd.Timestamp] = None
+    
+    def ingest(self, pings: pd.DataFrame) -> np.ndarray:
+        """
+        Fusionne un lot de pings AIS typés (format load_ais_data)
+        Retourne les clés des arêtes modifiées par ce lot
+        """
+        if pings is None or pings.empty:
+            return np.empty(0, dtype=np.int64)
+        
+        pings = pings[CARRY_COLUMNS]
+        if self.carry is not None:
+            pings = pd.concat([self.carry, pings], ignore_index=True)
+        
+        segments = build_voyage_segments(pings, self.min_time_gap_hours)
+        batch_timestamp = pings['TSTAMP'].max()
+        
+        self.moments = decay_edge_moments(self.moments, self._decay_factor(batch_timestamp))
+        batch = aggregate_edge_moments(segments)
+        self.moments = merge_edge_moments(self.moments, batch)
+        
+        self.carry = last_ping_per_vessel(pings).reset_index(drop=True)
+        if self.last_timestamp is None or batch_timestamp > self.last_timestamp:
+            self.last_timestamp = batch_timestamp
+        
+        logger.info(
+            f"Lot AIS fusionné: {len(segments)} segments, {len(batch)} arêtes modifiées, "
+            f"{0 if self.moments is None else len(self.moments)} arêtes au total"
+        )
+        return batch.index.to_numpy()
+    
+    def ingest_file(self, path: Union[str, Path], chunk_size: int = DEFAULT_CHUNK_SIZE) -> np.ndarray:
+        """Fusionne un fichier AIS complet en flux; retourne les clés modifiées"""
+        changed = [self.ingest(chunk) for chunk in AISDataProcessor(path).iter_ais_chunks(chunk_size)]
+        if not changed:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(changed))
+    
+    def _decay_factor(self, batch_timestamp: pd.Timestamp) -> float:
+        """Facteur 0.5 ** (Δt / demi-vie) entre le lot précédent et celui-ci"""
+        if not self.decay_half_life_hours or self.last_timestamp is None:
+            return 1.0
+        elapsed_hours = (batch_timestamp - self.last_timestamp).total_seconds() / 3600
+        if elapsed_hours <= 0:
+            return 1.0
+        return 0.5 ** (elapsed_hours / self.decay_half_life_hours)
+    
+    def statistics(self, min_observations: float = 3,
+                   edge_keys: Optional[Iterable[int]] = None) -> Dict:
+        """Statistiques au format compute_edge_statistics (éventuellement filtrées)"""
+        moments = self.moments
+        if moments is not None and edge_keys is not None:
+            moments = moments[moments.index.isin(np.asarray(list(edge_keys), dtype=np.int64))]
+        return edge_moments_to_dict(moments, min_observations)
+    
+    def push_to_graph(self, builder: GeospatialGraphBuilder,
+                      edge_keys: Optional[Iterable[int]] = None,
+                      min_observations: float = 3, radius_nm: float = 50) -> int:
+        """
+        Répercute les statistiques (modifiées) sur un graphe en cours d'utilisation
+        Les extrémités sont rattachées au waypoint le plus proche; plusieurs arêtes
+        AIS rattachées à la même paire de waypoints sont moyennées par observations.
+        Avec edge_keys, seules les paires touchées par ces arêtes sont réécrites, chacune
+        avec toutes les arêtes AIS qui s'y rattachent (modifiées ou non).
+        Retourne le nombre d'arêtes du graphe mises à jour.
+        """
+        if self.moments is None:
+            return 0
+        
+        snapped = snap_edge_moments(self.moments, builder, radius_nm, min_observations)
+        if edge_keys is not None:
+            changed = self.moments[self.moments.index.isin(np.asarray(list(edge_keys), dtype=np.int64))]
+            touched = snap_edge_moments(changed, builder, radius_nm, min_observations)
+            pairs = pd.MultiIndex.from_frame(touched[['from_id', 'to_id']])
+            snapped = snapped[pd.MultiIndex.from_frame(snapped[['from_id', 'to_id']]).isin(pairs)]
+        
+        updated = builder.add_edges_from_snapped(snapped)
+        
+        logger.info(f"{updated} arêtes du graphe mises à jour depuis le store AIS")
+        return updated
+    
+    def save(self, directory: Union[str, Path]):
+        """Persiste accumulateurs, pings reportés et métadonnées (sans pickle)"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        
+        if self.moments is not None:
+            np.savez(
+                directory / "moments.npz",
+                edge_key=self.moments.index.to_numpy(),
+                **{column: self.moments[column].to_numpy() for column in self.moments.columns},
+            )
+        if self.carry is not None:
+            np.savez(directory / "carry.npz", **{
+                column: self._plain_array(self.carry[column]) for column in CARRY_COLUMNS
+            })
+        
+        with open(directory / "meta.json", 'w') as f:
+            json.dump({
+                'min_time_gap_hours': self.min_time_gap_hours,
+                'decay_half_life_hours': self.decay_half_life_hours,
+                'last_timestamp': None if self.last_timestamp is None else self.last_timestamp.isoformat(),
+            }, f)
+    
+    @staticmethod
+    def _plain_array(values: pd.Series) -> np.ndarray:
+        """Tableau NumPy sans objets Python (les textes deviennent des chaînes unicode)"""
+        array = values.to_numpy()
+        if array.dtype == object or isinstance(values.dtype, pd.CategoricalDtype) \
+                or pd.api.types.is_string_dtype(values.dtype):
+            return np.asarray(values.astype(str).to_numpy(), dtype=str)
+        return array
+    
+    @classmethod
+    def load(cls, directory: Union[str, Path]) -> "EdgeStatisticsStore":
+        """Recharge un store persisté par save()"""
+        directory = Path(directory)
+        with open(directory / "meta.json", 'r') as f:
+            meta = json.load(f)
+        
+        store = cls(meta['min_time_gap_hours'], meta['decay_half_life_hours'])
+        if meta['last_timestamp']:
+            store.last_timestamp = pd.Timestamp(meta['last_timestamp'])
+        
+        if (directory / "moments.npz").exists():
+            with np.load(directory / "moments.npz") as data:
+                columns = {name: data[name] for name in data.files if name != 'edge_key'}
+                store.moments = pd.DataFrame(columns, index=pd.Index(data['edge_key'], name='edge_key'))
+        if (directory / "carry.npz").exists():
+            with np.load(directory / "carry.npz") as data:
+                store.carry = pd.DataFrame({name: data[name] for name in CARRY_COLUMNS})
+        
+        return store
@@ -0,0 +1,82 @@
+"""
+Noyau géodésique partagé
+Distances orthodromiques (haversine) et cap initial, en scalaire ou par lots NumPy
+"""
+from math import radians, cos, sin, asin, sqrt, atan2, degrees
+from typing import Union
+
+import numpy as np
+
+# Rayon terrestre moyen selon l'unité de sortie
+EARTH_RADIUS = {
+    'nm': 3440.065,  # Milles nautiques
+    'km': 6371.0,
+    'm': 6371000.0,
+}
+
+ArrayLike = Union[float, np.ndarray]
+
+_SCALAR_TYPES = (int, float, np.integer, np.floating)
+
+
+def _radius(unit: str) -> float:
+    try:
+        return EARTH_RADIUS[unit]
+    except KeyError:
+        raise ValueError(f"Unité inconnue: {unit} (attendu: {', '.join(EARTH_RADIUS)})")
+
+
+def _all_scalars(*values) -> bool:
+    """Vrai si toutes les entrées sont des nombres Python (chemin rapide via math)"""
+    return all(isinstance(v, _SCALAR_TYPES) for v in values)
+
+
+def haversine_distance(lat1: ArrayLike, lon1: ArrayLike, lat2: ArrayLike, lon2: ArrayLike,
+                       unit: str = 'nm') -> ArrayLike:
+    """
+    Distance haversine élément par élément (broadcasting NumPy)
+    Les entrées scalaires passent par math et retournent un float
+    """
+    radius = _radius(unit)
+    
+    if _all_scalars(lat1, lon1, lat2, lon2):
+        lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
+        a = sin((lat2 - lat1) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2) ** 2
+        return 2 * asin(sqrt(min(a, 1.0))) * radius
+    
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=float)) for x in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0))) * radius
+
+
+def haversine_one_to_many(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray,
+                          unit: str = 'nm') -> np.ndarray:
+    """Distances d'un point vers N points -> tableau (N,)"""
+    return haversine_distance(
+        np.asarray(lat, dtype=float), np.asarray(lon, dtype=float),
+        np.asarray(lats, dtype=float), np.asarray(lons, dtype=float), unit
+    )
+
+
+def haversine_matrix(lats1: np.ndarray, lons1: np.ndarray, lats2: np.ndarray, lons2: np.ndarray,
+                     unit: str = 'nm') -> np.ndarray:
+    """Matrice des distances entre N points et M points -> tableau (N, M)"""
+    lats1 = np.asarray(lats1, dtype=float)[:, None]
+    lons1 = np.asarray(lons1, dtype=float)[:, None]
+    lats2 = np.asarray(lats2, dtype=float)[None, :]
+    lons2 = np.asarray(lons2, dtype=float)[None, :]
+    return haversine_distance(lats1, lons1, lats2, lons2, unit)
+
+
+def initial_bearing(lat1: ArrayLike, lon1: ArrayLike, lat2: ArrayLike, lon2: ArrayLike) -> ArrayLike:
+    """Cap initial (degrés, 0-360, 0 = Nord) du point 1 vers le point 2"""
+    if _all_scalars(lat1, lon1, lat2, lon2):
+        lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+        x = sin(lon2 - lon1) * cos(lat2)
+        y = cos(lat1) * sin(lat2) - sin(lat1) * cos(lat2) * cos(lon2 - lon1)
+        return (degrees(atan2(x, y)) + 360.0) % 360.0
+    
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    x = np.sin(lon2 - lon1) * np.cos(lat2)
+    y = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(lon2 - lon1)
+    return (np.degrees(np.arctan2(x, y)) + 360.0) % 360.0
@@ -0,0 +1,105 @@
+"""
+Rattachement en masse des statistiques AIS au graphe de routage
+Les extrémités des arêtes AIS (coordonnées arrondies) sont rattachées au waypoint
+le plus proche via l'index spatial; les arêtes AIS qui tombent sur la même paire
+de waypoints sont fusionnées (moyennes pondérées par le nombre d'observations).
+La moyenne d'une paire ne porte que sur les arêtes passées: pour l'écrire dans le graphe
+(add_edges_from_snapped), passer toutes les arêtes AIS qui se rattachent à cette paire.
+"""
+import logging
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from data_engineering.edge_statistics import FUEL_TONS_PER_NM, decode_edge_keys, encode_edge_keys
+
+logger = logging.getLogger(__name__)
+
+# Colonnes de la table d'arêtes rattachées (une ligne par paire de waypoints)
+# edge_key: arête AIS la plus observée parmi celles fusionnées (clé des profils temporels)
+SNAPPED_COLUMNS = ['from_id', 'to_id', 'observations', 'distance_nm', 'time_hours',
+                   'speed_knots', 'fuel_tons', 'edge_key']
+
+
+def snap_edge_moments(moments: Optional[pd.DataFrame], builder, radius_nm: float = 50,
+                      min_observations: float = 3) -> pd.DataFrame:
+    """
+    Rattache une table d'accumulateurs (aggregate_edge_moments) aux waypoints du graphe
+    builder: GeospatialGraphBuilder (index spatial des waypoints)
+    """
+    if moments is None or moments.empty or not builder.waypoints:
+        return pd.DataFrame(columns=SNAPPED_COLUMNS)
+    
+    moments = moments[moments['count'] >= min_observations]
+    from_lat, from_lon, to_lat, to_lon = decode_edge_keys(moments.index.to_numpy())
+    
+    return _snap(
+        builder, radius_nm, moments.index.to_numpy(), from_lat, from_lon, to_lat, to_lon,
+        observations=moments['count'].to_numpy(dtype=float),
+        distance_nm=moments['distance_mean'].to_numpy(dtype=float),
+        time_hours=moments['time_mean'].to_numpy(dtype=float),
+        speed_knots=moments['speed_mean'].to_numpy(dtype=float),
+    )
+
+
+def snap_edge_statistics(statistics: Dict, builder, radius_nm: float = 50) -> pd.DataFrame:
+    """Même rattachement pour le format dict de compute_edge_statistics"""
+    if not statistics or not builder.waypoints:
+        return pd.DataFrame(columns=SNAPPED_COLUMNS)
+    
+    keys = np.array([(f[0], f[1], t[0], t[1]) for f, t in statistics], dtype=float)
+    values = list(statistics.values())
+    
+    return _snap(
+        builder, radius_nm, encode_edge_keys(keys[:, 0], keys[:, 1], keys[:, 2], keys[:, 3]),
+        keys[:, 0], keys[:, 1], keys[:, 2], keys[:, 3],
+        observations=np.array([v['observations'] for v in values], dtype=float),
+        distance_nm=np.array([v['distance_nm'] for v in values], dtype=float),
+        time_hours=np.array([v['time_hours_avg'] for v in values], dtype=float),
+        speed_knots=np.array([v['speed_avg_knots'] for v in values], dtype=float),
+    )
+
+
+def _snap(builder, radius_nm: float, edge_keys, from_lat, from_lon, to_lat, to_lon,
+          observations, distance_nm, time_hours, speed_knots) -> pd.DataFrame:
+    """Requêtes spatiales en lot puis fusion des doublons par groupby"""
+    from_ids, _ = builder.nearest_waypoints(from_lat, from_lon, k=1, radius_nm=radius_nm)
+    to_ids, _ = builder.nearest_waypoints(to_lat, to_lon, k=1, radius_nm=radius_nm)
+    from_ids, to_ids = from_ids[:, 0], to_ids[:, 0]
+    
+    # Extrémités hors rayon ou rattachées au même waypoint: arête ignorée
+    keep = (from_ids != None) & (to_ids != None) & (from_ids != to_ids)  # noqa: E711
+    
+    weights = observations[keep]
+    speed_valid = ~np.isnan(speed_knots[keep])
+    frame = pd.DataFrame({
+        'from_id': from_ids[keep].astype(str),
+        'to_id': to_ids[keep].astype(str),
+        'observations': weights,
+        'distance_sum': weights * distance_nm[keep],
+        'time_sum': weights * time_hours[keep],
+        'speed_sum': np.where(speed_valid, weights * speed_knots[keep], 0.0),
+        'speed_weight': np.where(speed_valid, weights, 0.0),
+        'edge_key': np.asarray(edge_keys, dtype=np.int64)[keep],
+    })
+    
+    pairs = frame.groupby(['from_id', 'to_id'], sort=True)
+    sums = pairs[['observations', 'distance_sum', 'time_sum', 'speed_sum', 'speed_weight']].sum().reset_index()
+    dominant = frame['edge_key'].to_numpy()[pairs['observations'].idxmax().to_numpy()]
+    snapped = pd.DataFrame({
+        'from_id': sums['from_id'],
+        'to_id': sums['to_id'],
+        'observations': sums['observations'],
+        'distance_nm': sums['distance_sum'] / sums['observations'],
+        'time_hours': sums['time_sum'] / sums['observations'],
+        'speed_knots': sums['speed_sum'] / sums['speed_weight'].where(sums['speed_weight'] > 0),
+    }, columns=SNAPPED_COLUMNS)
+    snapped['fuel_tons'] = snapped['distance_nm'] * FUEL_TONS_PER_NM
+    snapped['edge_key'] = dominant
+    
+    logger.info(
+        f"Rattachement AIS: {len(observations)} arêtes -> {len(snapped)} arêtes du graphe "
+        f"({int((~keep).sum())} ignorées hors rayon ou boucles)"
+    )
+    return snapped
@@ -0,0 +1,19 @@
+"""
+Version partagée d'un graphe networkx (attribut graph.graph['version'])
+Les mises à jour en place des arêtes (builder, store AIS) l'incrémentent; l'optimiseur la compare
+à la dernière vue pour invalider graphe compilé, vecteurs de coût, heuristiques et cache de routes
+"""
+import networkx as nx
+
+GRAPH_VERSION_KEY = 'version'
+
+
+def graph_version(graph: nx.DiGraph) -> int:
+    """Version courante (0 si le graphe n'a jamais été modifié en place)"""
+    return graph.graph.get(GRAPH_VERSION_KEY, 0)
+
+
+def bump_graph_version(graph: nx.DiGraph) -> int:
+    """À appeler après toute modification en place des arêtes; retourne la nouvelle version"""
+    graph.graph[GRAPH_VERSION_KEY] = graph_version(graph) + 1
+    return graph.graph[GRAPH_VERSION_KEY]
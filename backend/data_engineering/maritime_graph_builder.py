@@ -8,9 +8,9 @@ import networkx as nx
 from typing import Dict, List, Tuple
 from pathlib import Path
 import logging
-from math import radians, cos, sin, asin, sqrt
 
 from models import WayPoint
+from data_engineering.geodesy import haversine_distance
 
 logger = logging.getLogger(__name__)
 
@@ -25,12 +25,7 @@ class MaritimeGraphBuilder:
     @staticmethod
     def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Distance entre deux points en milles nautiques"""
-        lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-        dlon = lon2 - lon1
-        dlat = lat2 - lat1
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * asin(sqrt(a))
-        return c * 3440.065  # Milles nautiques
+        return haversine_distance(lat1, lon1, lat2, lon2)
     
     def add_waypoint(self, waypoint_id: str, name: str, latitude: float, 
                      longitude: float, port_type: str = "port", 
@@ -0,0 +1,93 @@
+"""
+Traitement AIS parallèle, partitionné par MMSI
+Chaque shard (partition par hash du MMSI) est segmenté et agrégé dans un
+processus séparé; les accumulateurs partiels sont ensuite fusionnés.
+"""
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data_engineering.ais_processor import build_voyage_segments
+from data_engineering.edge_statistics import aggregate_edge_moments, combine_edge_moments
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ShardTiming:
+    """Mesures d'exécution d'un shard"""
+    shard_id: int
+    pings: int
+    segments: int
+    edges: int
+    seconds: float
+
+
+def shard_by_mmsi(df: pd.DataFrame, n_shards: int) -> List[pd.DataFrame]:
+    """
+    Partition par hash du MMSI: tous les pings d'un navire vont dans le même shard
+    pd.util.hash_array est déterministe d'un processus à l'autre
+    """
+    mmsi = df['MMSI'].astype(str).to_numpy(dtype=object)
+    shard_ids = pd.util.hash_array(mmsi) % np.uint64(n_shards)
+    order = np.argsort(shard_ids, kind='stable')
+    bounds = np.searchsorted(shard_ids[order], np.arange(n_shards + 1, dtype=np.uint64))
+    return [df.iloc[order[bounds[i]:bounds[i + 1]]] for i in range(n_shards)]
+
+
+def _process_shard(shard_id: int, pings: pd.DataFrame,
+                   min_time_gap_hours: float) -> Tuple[pd.DataFrame, ShardTiming]:
+    """Segmentation + agrégation partielle d'un shard (exécuté dans un worker)"""
+    start = time.perf_counter()
+    segments = build_voyage_segments(pings, min_time_gap_hours)
+    moments = aggregate_edge_moments(segments)
+    timing = ShardTiming(shard_id, len(pings), len(segments), len(moments),
+                         time.perf_counter() - start)
+    return moments, timing
+
+
+def compute_edge_moments_parallel(pings: pd.DataFrame, n_workers: Optional[int] = None,
+                                  n_shards: Optional[int] = None,
+                                  min_time_gap_hours: float = 1.0
+                                  ) -> Tuple[Optional[pd.DataFrame], List[ShardTiming]]:
+    """
+    Accumulateurs par arête calculés dans un pool de processus
+    n_workers: nombre de processus (défaut: nombre de cœurs)
+    n_shards: nombre de partitions MMSI (défaut: n_workers)
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    n_shards = n_shards or n_workers
+    shards = shard_by_mmsi(pings, n_shards)
+    
+    if n_workers == 1:
+        results = [_process_shard(i, shard, min_time_gap_hours) for i, shard in enumerate(shards)]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            futures = [
+                pool.submit(_process_shard, i, shard, min_time_gap_hours)
+                for i, shard in enumerate(shards)
+            ]
+            results = [future.result() for future in futures]
+    
+    moments = combine_edge_moments([partial for partial, _ in results])
+    timings = [timing for _, timing in results]
+    return moments, timings
+
+
+def shard_skew(timings: List[ShardTiming]) -> Dict[str, float]:
+    """Déséquilibre entre shards: max / moyenne (1.0 = parfaitement équilibré)"""
+    if not timings:
+        return {'pings': 1.0, 'seconds': 1.0}
+    
+    pings = np.array([t.pings for t in timings], dtype=float)
+    seconds = np.array([t.seconds for t in timings], dtype=float)
+    return {
+        'pings': float(pings.max() / pings.mean()) if pings.mean() > 0 else 1.0,
+        'seconds': float(seconds.max() / seconds.mean()) if seconds.mean() > 0 else 1.0,
+    }
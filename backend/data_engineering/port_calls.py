@@ -0,0 +1,196 @@
+"""
+Détection des escales et des temps d'attente à partir des traces AIS
+Passes vectorisées: arrêts (SOG faible prolongée) -> rattachement au port le plus
+proche (mouillage ou quai) -> escales (file d'attente puis séjour à quai) ->
+historique au format de CongestionForecastingAgent.register_port_history.
+"""
+import logging
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from models import WayPoint
+from data_engineering.ais_processor import timestamp_values, vessel_keys
+from data_engineering.spatial_index import WaypointIndex
+
+logger = logging.getLogger(__name__)
+
+STOP_SOG_KNOTS = 1.0       # SOG maximale d'un navire à l'arrêt
+MIN_STOP_HOURS = 1.0       # durée minimale d'un arrêt
+MAX_STOP_GAP_HOURS = 6.0   # trou de signal toléré à l'intérieur d'un arrêt
+PORT_RADIUS_NM = 30.0      # zone d'approche d'un port (mouillages compris)
+BERTH_RADIUS_NM = 3.0      # au-delà: mouillage, en deçà: quai
+
+STOP_COLUMNS = ['mmsi', 'start', 'end', 'duration_hours', 'latitude', 'longitude', 'pings', 'vessel_type']
+CALL_COLUMNS = ['mmsi', 'port_id', 'queue_entry', 'queue_exit', 'berth_start', 'berth_end',
+                'wait_hours', 'dwell_hours', 'vessel_type']
+
+
+def detect_stops(df: pd.DataFrame, max_sog_knots: float = STOP_SOG_KNOTS,
+                 min_duration_hours: float = MIN_STOP_HOURS,
+                 max_gap_hours: float = MAX_STOP_GAP_HOURS,
+                 vessel_type_column: str = 'VESSEL_TYPE') -> pd.DataFrame:
+    """
+    Arrêts: suites de pings consécutifs d'un navire avec SOG <= max_sog_knots
+    Position de l'arrêt = barycentre des pings (longitude en moyenne circulaire)
+    """
+    if df is None or df.empty:
+        return pd.DataFrame(columns=STOP_COLUMNS)
+    
+    df = df.sort_values(['MMSI', 'TSTAMP'], kind='mergesort')
+    keys = vessel_keys(df['MMSI'])
+    tstamp = timestamp_values(df['TSTAMP']).astype('datetime64[ns]')
+    sog = df['SOG'].to_numpy(dtype=float)
+    
+    stationary = sog <= max_sog_knots
+    gap_hours = np.diff(tstamp) / np.timedelta64(1, 'h')
+    continues = np.zeros(len(df), dtype=bool)
+    continues[1:] = stationary[1:] & stationary[:-1] & (keys[1:] == keys[:-1]) & (gap_hours <= max_gap_hours)
+    
+    # Pings à l'arrêt, découpés en suites contiguës
+    rows = np.flatnonzero(stationary)
+    if len(rows) == 0:
+        return pd.DataFrame(columns=STOP_COLUMNS)
+    offsets = np.flatnonzero(~continues[rows])
+    last = np.append(offsets[1:], len(rows)) - 1
+    
+    lat = np.radians(df['LATITUDE'].to_numpy(dtype=float)[rows])
+    lon = np.radians(df['LONGITUDE'].to_numpy(dtype=float)[rows])
+    pings = np.diff(np.append(offsets, len(rows)))
+    mean_lon = np.arctan2(np.add.reduceat(np.sin(lon), offsets), np.add.reduceat(np.cos(lon), offsets))
+    
+    start = tstamp[rows[offsets]]
+    end = tstamp[rows[last]]
+    vessel_type = (df[vessel_type_column].to_numpy()[rows[offsets]]
+                   if vessel_type_column in df.columns else np.full(len(offsets), None, dtype=object))
+    
+    stops = pd.DataFrame({
+        'mmsi': df['MMSI'].to_numpy()[rows[offsets]],
+        'start': start,
+        'end': end,
+        'duration_hours': (end - start) / np.timedelta64(1, 'h'),
+        'latitude': np.degrees(np.add.reduceat(lat, offsets) / pings),
+        'longitude': np.degrees(mean_lon),
+        'pings': pings,
+        'vessel_type': vessel_type,
+    }, columns=STOP_COLUMNS)
+    return stops[stops['duration_hours'] >= min_duration_hours].reset_index(drop=True)
+
+
+def assign_stops_to_ports(stops: pd.DataFrame, ports: Dict[str, WayPoint],
+                          port_radius_nm: float = PORT_RADIUS_NM,
+                          berth_radius_nm: float = BERTH_RADIUS_NM) -> pd.DataFrame:
+    """
+    Rattache chaque arrêt au port le plus proche (waypoints de type 'port')
+    kind: 'berth' à moins de berth_radius_nm, sinon 'anchorage'; hors zone: arrêt écarté
+    """
+    port_wps = [wp for wp in ports.values() if wp.port_type == 'port']
+    if stops.empty or not port_wps:
+        return stops.assign(port_id=pd.Series(dtype=object), distance_nm=pd.Series(dtype=float),
+                            kind=pd.Series(dtype=object)).iloc[0:0]
+    
+    index = WaypointIndex(
+        [wp.id for wp in port_wps],
+        np.array([wp.latitude for wp in port_wps]),
+        np.array([wp.longitude for wp in port_wps]),
+    )
+    distances, found = index.nearest(stops['latitude'].to_numpy(), stops['longitude'].to_numpy(),
+                                     k=1, max_distance_nm=port_radius_nm)
+    distances, found = distances[:, 0], found[:, 0]
+    near_port = found >= 0
+    
+    assigned = stops[near_port].copy()
+    assigned['port_id'] = index.ids[found[near_port]]
+    assigned['distance_nm'] = distances[near_port]
+    assigned['kind'] = np.where(distances[near_port] <= berth_radius_nm, 'berth', 'anchorage')
+    return assigned.reset_index(drop=True)
+
+
+def extract_port_calls(port_stops: pd.DataFrame) -> pd.DataFrame:
+    """
+    Regroupe les arrêts rattachés en escales: mouillage(s) éventuel(s) puis quai
+    Une nouvelle escale commence au changement de navire ou de port, ou sur un
+    mouillage qui suit un passage à quai
+    - queue_entry: début du premier mouillage (ou arrivée à quai si accostage direct)
+    - queue_exit: accostage (ou fin du dernier mouillage si le navire repart sans accoster)
+    - wait_hours = queue_exit - queue_entry, dwell_hours = durée à quai (NaN sans quai)
+    """
+    if port_stops.empty:
+        return pd.DataFrame(columns=CALL_COLUMNS)
+    
+    stops = port_stops.sort_values(['mmsi', 'start'], kind='mergesort').reset_index(drop=True)
+    mmsi = stops['mmsi'].to_numpy()
+    port = stops['port_id'].to_numpy()
+    berth = (stops['kind'] == 'berth').to_numpy()
+    
+    new_call = np.ones(len(stops), dtype=bool)
+    new_call[1:] = (mmsi[1:] != mmsi[:-1]) | (port[1:] != port[:-1]) | (berth[:-1] & ~berth[1:])
+    call_id = np.cumsum(new_call) - 1
+    
+    start, end = stops['start'], stops['end']
+    grouped = pd.DataFrame({
+        'call_id': call_id,
+        'mmsi': mmsi,
+        'port_id': port,
+        'vessel_type': stops['vessel_type'].to_numpy(),
+        'anchorage_start': start.where(~berth),
+        'anchorage_end': end.where(~berth),
+        'berth_start': start.where(berth),
+        'berth_end': end.where(berth),
+    }).groupby('call_id', sort=True)
+    
+    calls = grouped.agg(
+        mmsi=('mmsi', 'first'), port_id=('port_id', 'first'), vessel_type=('vessel_type', 'first'),
+        anchorage_start=('anchorage_start', 'min'), anchorage_end=('anchorage_end', 'max'),
+        berth_start=('berth_start', 'min'), berth_end=('berth_end', 'max'),
+    )
+    calls['queue_entry'] = calls['anchorage_start'].fillna(calls['berth_start'])
+    calls['queue_exit'] = calls['berth_start'].fillna(calls['anchorage_end'])
+    calls['wait_hours'] = (calls['queue_exit'] - calls['queue_entry']) / pd.Timedelta(hours=1)
+    calls['dwell_hours'] = (calls['berth_end'] - calls['berth_start']) / pd.Timedelta(hours=1)
+    return calls[CALL_COLUMNS].reset_index(drop=True)
+
+
+def port_history_from_calls(calls: pd.DataFrame) -> Dict[str, List[Dict]]:
+    """
+    Historique par port au format de register_port_history:
+    [{timestamp, queue_length, wait_hours, vessel_type, mmsi, dwell_hours}]
+    queue_length: navires déjà en attente au port à l'entrée en file de chaque escale
+    """
+    history: Dict[str, List[Dict]] = {}
+    
+    for port_id, port_calls in calls.groupby('port_id', sort=True):
+        port_calls = port_calls.sort_values('queue_entry', kind='mergesort')
+        entries = port_calls['queue_entry'].to_numpy()
+        exits = np.sort(port_calls['queue_exit'].to_numpy())
+        # Entrés avant cet instant, moins ceux déjà sortis
+        queue = np.searchsorted(entries, entries, side='left') - np.searchsorted(exits, entries, side='right')
+        
+        history[port_id] = pd.DataFrame({
+            'timestamp': port_calls['queue_entry'].to_numpy(),
+            'queue_length': np.maximum(queue, 0),
+            'wait_hours': port_calls['wait_hours'].to_numpy(),
+            'vessel_type': port_calls['vessel_type'].to_numpy(),
+            'mmsi': port_calls['mmsi'].to_numpy(),
+            'dwell_hours': port_calls['dwell_hours'].to_numpy(),
+        }).to_dict('records')
+    
+    return history
+
+
+def detect_port_calls(df: pd.DataFrame, ports: Dict[str, WayPoint],
+                      port_radius_nm: float = PORT_RADIUS_NM,
+                      berth_radius_nm: float = BERTH_RADIUS_NM,
+                      max_sog_knots: float = STOP_SOG_KNOTS,
+                      min_duration_hours: float = MIN_STOP_HOURS) -> pd.DataFrame:
+    """Chaîne complète: pings AIS -> escales"""
+    stops = detect_stops(df, max_sog_knots, min_duration_hours)
+    port_stops = assign_stops_to_ports(stops, ports, port_radius_nm, berth_radius_nm)
+    calls = extract_port_calls(port_stops)
+    
+    logger.info(
+        f"Escales AIS: {len(stops)} arrêts, {len(port_stops)} dans une zone portuaire, "
+        f"{len(calls)} escales sur {calls['port_id'].nunique()} ports"
+    )
+    return calls
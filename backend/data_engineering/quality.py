@@ -0,0 +1,129 @@
+"""
+Filtre qualité vectorisé des pings AIS
+Écarte doublons, valeurs hors plage et sauts GPS avant la segmentation.
+Chaque ping rejeté est compté sous la première règle qui l'écarte.
+"""
+import logging
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data_engineering.ais_processor import timestamp_values, vessel_keys
+from data_engineering.geodesy import haversine_distance
+
+logger = logging.getLogger(__name__)
+
+# Règles dans l'ordre d'application
+QUALITY_RULES = (
+    'duplicate',       # même MMSI, horodatage et position (hash 64 bits)
+    'position_range',  # latitude / longitude hors plage (91 / 181 = non disponible)
+    'sog_range',       # SOG négative ou au-delà de max_sog_knots (102.3 = non disponible)
+    'cog_range',       # COG hors [0, 360[ (360 = non disponible)
+    'zero_time_gap',   # deux positions différentes au même horodatage pour un navire
+    'implied_speed',   # pic isolé: vitesse implicite impossible à l'arrivée et au départ
+)
+
+MAX_SOG_KNOTS = 50.0
+MAX_IMPLIED_SPEED_KNOTS = 50.0
+
+DUPLICATE_KEY = ['MMSI', 'TSTAMP', 'LATITUDE', 'LONGITUDE']
+
+
+def filter_ais_quality(df: pd.DataFrame, max_sog_knots: float = MAX_SOG_KNOTS,
+                       max_implied_speed_knots: float = MAX_IMPLIED_SPEED_KNOTS,
+                       max_passes: int = 3, context: Optional[pd.DataFrame] = None,
+                       deferred: Optional[np.ndarray] = None) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """
+    Pings conservés (ordre d'origine) et nombre de rejets par règle
+    Les SOG/COG manquants (NaN) ne sont pas rejetés
+    max_passes: passes du filtre de vitesse implicite (un pic retiré peut en révéler un autre)
+    Filtrage en flux (voir AISDataProcessor.iter_ais_chunks):
+    - context: derniers pings acceptés de chaque navire dans les chunks précédents
+    - deferred: masque des pings de df jugés au chunk suivant
+    Ces pings servent de voisins aux règles mais ne sont ni rejetés, ni comptés, ni rendus
+    """
+    counts = dict.fromkeys(QUALITY_RULES, 0)
+    if df is None or df.empty:
+        return df, counts
+    
+    n_context = 0 if context is None else len(context)
+    rows = pd.concat([context, df], ignore_index=True) if n_context else df
+    keep = np.ones(len(rows), dtype=bool)
+    fixed = np.zeros(len(rows), dtype=bool)
+    fixed[:n_context] = True
+    if deferred is not None:
+        fixed[n_context:] |= deferred
+    
+    def reject(rule: str, mask: np.ndarray):
+        mask = mask & keep & ~fixed
+        counts[rule] += int(mask.sum())
+        keep[mask] = False
+    
+    key = [column for column in DUPLICATE_KEY if column in rows.columns]
+    hashes = pd.util.hash_pandas_object(rows[key], index=False)
+    reject('duplicate', hashes.duplicated().to_numpy())
+    
+    lat = rows['LATITUDE'].to_numpy(dtype=float)
+    lon = rows['LONGITUDE'].to_numpy(dtype=float)
+    reject('position_range', ~((np.abs(lat) <= 90) & (np.abs(lon) <= 180)))
+    
+    if 'SOG' in rows.columns:
+        sog = rows['SOG'].to_numpy(dtype=float)
+        reject('sog_range', (sog < 0) | (sog > max_sog_knots))
+    if 'COG' in rows.columns:
+        cog = rows['COG'].to_numpy(dtype=float)
+        reject('cog_range', (cog < 0) | (cog >= 360))
+    
+    # Règles séquentielles: pings de chaque navire dans l'ordre chronologique
+    hours = timestamp_values(rows['TSTAMP']).astype('datetime64[ns]').view(np.int64) / 3.6e12
+    keys, _ = pd.factorize(vessel_keys(rows['MMSI']))
+    order = np.lexsort((hours, keys))
+    order = order[keep[order]]
+    
+    same_instant = (keys[order][1:] == keys[order][:-1]) & (hours[order][1:] == hours[order][:-1])
+    reject('zero_time_gap', _at(order[1:][same_instant], len(rows)))
+    
+    for _ in range(max_passes):
+        order = order[keep[order]]
+        spikes = _speed_spikes(keys[order], hours[order], lat[order], lon[order], max_implied_speed_knots)
+        if not spikes.any():
+            break
+        reject('implied_speed', _at(order[spikes], len(rows)))
+    
+    judged = ~fixed[n_context:]
+    accepted = keep[n_context:] & judged
+    logger.info(
+        f"Filtre qualité AIS: {int(accepted.sum())}/{int(judged.sum())} pings conservés "
+        f"({', '.join(f'{rule}={count}' for rule, count in counts.items() if count)})"
+    )
+    return df[accepted], counts
+
+
+def _at(positions: np.ndarray, size: int) -> np.ndarray:
+    """Masque booléen de taille size, vrai aux positions données"""
+    mask = np.zeros(size, dtype=bool)
+    mask[positions] = True
+    return mask
+
+
+def _speed_spikes(keys: np.ndarray, hours: np.ndarray, lat: np.ndarray, lon: np.ndarray,
+                  max_speed_knots: float) -> np.ndarray:
+    """
+    Pings (triés par navire puis temps) dont la vitesse implicite est impossible à la fois
+    depuis le ping précédent et vers le suivant; le dernier ping d'une trace n'a besoin
+    que d'une arrivée impossible
+    """
+    n = len(keys)
+    if n < 2:
+        return np.zeros(n, dtype=bool)
+    
+    same_vessel = keys[1:] == keys[:-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        speed = haversine_distance(lat[:-1], lon[:-1], lat[1:], lon[1:]) / (hours[1:] - hours[:-1])
+    jump = same_vessel & (speed > max_speed_knots)
+    
+    arrival = np.concatenate([[False], jump])
+    departure = np.concatenate([jump, [False]])
+    last_of_track = np.concatenate([~same_vessel, [True]])
+    return arrival & (departure | last_of_track)
@@ -0,0 +1,89 @@
+"""
+Index spatial des waypoints (KD-tree sur la sphère unité)
+Les positions sont projetées en vecteurs 3D unitaires: la distance euclidienne
+(corde) est monotone avec la distance orthodromique, ce qui permet d'utiliser
+un KD-tree classique pour les requêtes k plus proches voisins et par rayon.
+"""
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from data_engineering.geodesy import EARTH_RADIUS, haversine_distance
+
+
+def to_unit_vectors(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Latitudes/longitudes (degrés) -> vecteurs unitaires (N, 3)"""
+    lat = np.radians(np.asarray(lats, dtype=float))
+    lon = np.radians(np.asarray(lons, dtype=float))
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+
+def chord_length(distance: float, unit: str = 'nm') -> float:
+    """Longueur de corde sur la sphère unité pour une distance orthodromique"""
+    angle = min(distance / EARTH_RADIUS[unit], np.pi)
+    return 2 * np.sin(angle / 2)
+
+
+class WaypointIndex:
+    """
+    KD-tree immuable sur un ensemble de positions
+    Les requêtes sont vectorisées; les distances retournées sont des haversines exactes
+    """
+    
+    def __init__(self, ids: Sequence[str], lats: np.ndarray, lons: np.ndarray):
+        self.ids = np.asarray(list(ids), dtype=object)
+        self.lats = np.asarray(lats, dtype=float)
+        self.lons = np.asarray(lons, dtype=float)
+        self.tree = cKDTree(to_unit_vectors(self.lats, self.lons)) if len(self.ids) else None
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def nearest(self, lats: np.ndarray, lons: np.ndarray, k: int = 1,
+                max_distance_nm: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        k plus proches voisins de chaque requête -> (distances NM, indices), formes (N, k)
+        Les voisins absents ou au-delà de max_distance_nm ont l'indice -1 et une distance inf
+        """
+        lats = np.atleast_1d(np.asarray(lats, dtype=float))
+        lons = np.atleast_1d(np.asarray(lons, dtype=float))
+        distances = np.full((len(lats), k), np.inf)
+        indices = np.full((len(lats), k), -1, dtype=np.int64)
+        if self.tree is None or len(lats) == 0:
+            return distances, indices
+        
+        _, found = self.tree.query(to_unit_vectors(lats, lons), k=k)
+        found = np.asarray(found, dtype=np.int64).reshape(len(lats), k)
+        valid = found < len(self.ids)  # cKDTree renvoie n quand k > n
+        
+        safe = np.where(valid, found, 0)
+        exact = haversine_distance(lats[:, None], lons[:, None], self.lats[safe], self.lons[safe])
+        if max_distance_nm is not None:
+            valid &= exact <= max_distance_nm
+        
+        distances[valid] = exact[valid]
+        indices[valid] = found[valid]
+        return distances, indices
+    
+    def within_radius(self, lats: np.ndarray, lons: np.ndarray,
+                      radius_nm: float) -> List[np.ndarray]:
+        """Indices des positions à moins de radius_nm de chaque requête (triés par distance)"""
+        lats = np.atleast_1d(np.asarray(lats, dtype=float))
+        lons = np.atleast_1d(np.asarray(lons, dtype=float))
+        if self.tree is None:
+            return [np.empty(0, dtype=np.int64) for _ in range(len(lats))]
+        
+        # Rayon de corde légèrement élargi, puis filtrage exact par haversine
+        candidates = self.tree.query_ball_point(
+            to_unit_vectors(lats, lons), chord_length(radius_nm) * (1 + 1e-9)
+        )
+        results = []
+        for lat, lon, found in zip(lats, lons, candidates):
+            found = np.asarray(found, dtype=np.int64)
+            distances = haversine_distance(lat, lon, self.lats[found], self.lons[found])
+            keep = distances <= radius_nm
+            order = np.argsort(distances[keep], kind='stable')
+            results.append(found[keep][order])
+        return results
@@ -0,0 +1,388 @@
+"""
+Rasters de densité de trafic AIS
+Les pings (ou les milieux de segments) sont comptés sur une grille lat/lon globale
+par histogramme 2D vectorisé (bincount), un raster par jour. Chaque raster est découpé
+en tuiles carrées; seules les tuiles non vides sont écrites (.npy float32, relues via
+np.load(mmap_mode='r')). Une plage de dates se somme tuile par tuile sans relire l'AIS.
+La contribution de chaque fichier AIS ingéré est gardée à part: elle est retranchée des
+rasters avant une ré-ingestion (fichier modifié ou force) pour ne pas compter deux fois.
+
+Arborescence: <root>/meta.json, <root>/<AAAA-MM-JJ>/<ligne>_<colonne>.npy,
+<root>/_sources/<clé du fichier>/<AAAA-MM-JJ>/<ligne>_<colonne>.npy
+
+Usage CLI (depuis backend/):
+    python -m data_engineering.traffic_density /chemin/vers/ais.json
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+from collections import OrderedDict
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from data_engineering.ais_processor import timestamp_values
+from data_engineering.ais_stream import DEFAULT_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+DENSITY_FORMAT_VERSION = 1
+META_FILE = "meta.json"
+SOURCES_DIR = "_sources"
+
+DEFAULT_RESOLUTION_DEG = 0.1
+DEFAULT_TILE_CELLS = 256       # tuile de 256 x 256 cellules (256 Ko en float32)
+DEFAULT_CACHE_TILES = 512
+DEFAULT_BUFFER_TILES = 1024    # tuiles cumulées en mémoire par ingest_source (256 Mo) avant écriture
+
+BBox = Tuple[float, float, float, float]  # (lat_min, lon_min, lat_max, lon_max)
+
+
+class LRUTileCache:
+    """Cache LRU des tuiles ouvertes (tableaux mappés en mémoire)"""
+    
+    def __init__(self, max_tiles: int = DEFAULT_CACHE_TILES):
+        self.max_tiles = max_tiles
+        self._tiles: "OrderedDict[Tuple[str, int, int], np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self) -> int:
+        return len(self._tiles)
+    
+    def get(self, key: Tuple[str, int, int], loader) -> np.ndarray:
+        if key in self._tiles:
+            self._tiles.move_to_end(key)
+            self.hits += 1
+            return self._tiles[key]
+        
+        self.misses += 1
+        tile = loader(key)
+        self._tiles[key] = tile
+        if len(self._tiles) > self.max_tiles:
+            self._tiles.popitem(last=False)
+        return tile
+    
+    def invalidate(self, key: Tuple[str, int, int]):
+        self._tiles.pop(key, None)
+    
+    def clear(self):
+        self._tiles.clear()
+    
+    def info(self) -> Dict[str, int]:
+        return {'tiles': len(self._tiles), 'max_tiles': self.max_tiles, 'hits': self.hits, 'misses': self.misses}
+
+
+class TrafficDensityStore:
+    """
+    Rasters journaliers tuilés de densité de trafic
+    La grille (résolution, taille des tuiles) est fixée à la création du répertoire
+    """
+    
+    def __init__(self, root: Union[str, Path], resolution_deg: float = DEFAULT_RESOLUTION_DEG,
+                 tile_cells: int = DEFAULT_TILE_CELLS, cache_tiles: int = DEFAULT_CACHE_TILES,
+                 buffer_tiles: int = DEFAULT_BUFFER_TILES):
+        self.root = Path(root)
+        self.meta = self._read_meta() or {
+            'version': DENSITY_FORMAT_VERSION,
+            'resolution_deg': resolution_deg,
+            'tile_cells': tile_cells,
+            'sources': {},
+        }
+        if (self.meta['resolution_deg'], self.meta['tile_cells']) != (resolution_deg, tile_cells):
+            raise ValueError(
+                f"Grille existante incompatible dans {self.root}: "
+                f"{self.meta['resolution_deg']}° / {self.meta['tile_cells']} cellules par tuile"
+            )
+        
+        self.resolution_deg = resolution_deg
+        self.tile_cells = tile_cells
+        self.n_rows = int(np.ceil(180 / resolution_deg))
+        self.n_cols = int(np.ceil(360 / resolution_deg))
+        self.n_tile_rows = -(-self.n_rows // tile_cells)
+        self.n_tile_cols = -(-self.n_cols // tile_cells)
+        self.cache = LRUTileCache(cache_tiles)
+        self._day_tiles: Dict[str, set] = {}
+        # Tuiles en attente d'écriture pendant ingest_source: (source, jour, ligne, colonne) -> histogramme
+        self._buffer: Optional[Dict[Tuple[Optional[str], str, int, int], np.ndarray]] = None
+        self.buffer_tiles = buffer_tiles
+    
+    def _read_meta(self) -> Optional[Dict]:
+        meta_path = self.root / META_FILE
+        if not meta_path.exists():
+            return None
+        with open(meta_path, 'r') as f:
+            return json.load(f)
+    
+    def _write_meta(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.root / (META_FILE + f".tmp{os.getpid()}")
+        with open(tmp_path, 'w') as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, self.root / META_FILE)
+    
+    def cell_indices(self, lats: np.ndarray, lons: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Ligne (depuis -90°) et colonne (depuis -180°) de la grille"""
+        # Tolérance d'arrondi: 103.9 / 0.1 doit tomber dans la cellule 1039, pas 1038
+        rows = np.floor((np.asarray(lats, dtype=float) + 90.0) / self.resolution_deg + 1e-9).astype(np.int64)
+        cols = np.floor((np.asarray(lons, dtype=float) + 180.0) / self.resolution_deg + 1e-9).astype(np.int64)
+        return np.clip(rows, 0, self.n_rows - 1), cols % self.n_cols
+    
+    def tile_path(self, day: str, tile_row: int, tile_col: int) -> Path:
+        return self.root / day / f"{tile_row}_{tile_col}.npy"
+    
+    def source_dir(self, source: str) -> Path:
+        """Répertoire des tuiles apportées par un fichier AIS"""
+        return self.root / SOURCES_DIR / hashlib.sha1(source.encode('utf-8')).hexdigest()[:16]
+    
+    # ==================== INGESTION ====================
+    
+    def add_points(self, lats: np.ndarray, lons: np.ndarray, timestamps: np.ndarray,
+                   weights: Optional[np.ndarray] = None, source: Optional[str] = None) -> int:
+        """
+        Ajoute des observations aux rasters de leur jour
+        Un seul bincount par (jour, tuile) touchée; retourne le nombre de points comptés
+        source: fichier d'origine, dont la contribution est gardée pour être retranchée
+        """
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        days = np.asarray(timestamps).astype('datetime64[D]')
+        valid = ~np.isnat(days) & (np.abs(lats) <= 90) & (np.abs(lons) <= 180)
+        if weights is not None:
+            weights = np.asarray(weights, dtype=float)[valid]
+        lats, lons, days = lats[valid], lons[valid], days[valid]
+        if len(lats) == 0:
+            return 0
+        
+        rows, cols = self.cell_indices(lats, lons)
+        tile_cells = self.tile_cells
+        tile_key = (days.view(np.int64) * self.n_tile_rows + rows // tile_cells) * self.n_tile_cols \
+            + cols // tile_cells
+        local = (rows % tile_cells) * tile_cells + cols % tile_cells
+        
+        order = np.argsort(tile_key, kind='stable')
+        tile_key, local = tile_key[order], local[order]
+        if weights is not None:
+            weights = weights[order]
+        bounds = np.concatenate([[0], np.flatnonzero(np.diff(tile_key)) + 1, [len(tile_key)]])
+        
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            key = int(tile_key[start])
+            day_index, tile_col = divmod(key, self.n_tile_cols)
+            day_index, tile_row = divmod(day_index, self.n_tile_rows)
+            counts = np.bincount(
+                local[start:end], weights=None if weights is None else weights[start:end],
+                minlength=tile_cells * tile_cells,
+            )
+            day = str(np.datetime64(day_index, 'D'))
+            counts = counts.reshape(tile_cells, tile_cells)
+            if self._buffer is None:
+                self._write_tile(source, day, tile_row, tile_col, counts)
+                continue
+            buffered = self._buffer.get((source, day, tile_row, tile_col))
+            if buffered is None:
+                self._buffer[(source, day, tile_row, tile_col)] = counts.astype(np.float32)
+            else:
+                buffered += counts
+        
+        if self._buffer is not None and len(self._buffer) > self.buffer_tiles:
+            self._flush()
+        self._write_meta()
+        return len(lats)
+    
+    def _write_tile(self, source: Optional[str], day: str, tile_row: int, tile_col: int, counts: np.ndarray):
+        """Ajoute un histogramme à la tuile du jour et à la contribution de sa source"""
+        self._accumulate(self.tile_path(day, tile_row, tile_col), counts)
+        if source is not None:
+            self._accumulate(self.source_dir(source) / day / f"{tile_row}_{tile_col}.npy", counts)
+        self.cache.invalidate((day, tile_row, tile_col))
+        self._day_tiles.pop(day, None)
+    
+    def _flush(self):
+        """Écrit les histogrammes accumulés en mémoire (une écriture par tuile)"""
+        buffer, self._buffer = self._buffer, {}
+        for (source, day, tile_row, tile_col), counts in sorted(buffer.items(), key=lambda item: item[0][1:]):
+            self._write_tile(source, day, tile_row, tile_col, counts)
+    
+    @staticmethod
+    def _accumulate(path: Path, counts: np.ndarray):
+        """Ajoute un histogramme à une tuile (écriture atomique par renommage); tuile vide supprimée"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tile = counts.astype(np.float32)
+        if path.exists():
+            tile += np.load(path)
+        if not tile.any():
+            path.unlink(missing_ok=True)
+            return
+        tmp_path = path.with_name(path.stem + f".tmp{os.getpid()}.npy")
+        np.save(tmp_path, tile)
+        os.replace(tmp_path, path)
+    
+    def ingest_pings(self, df: pd.DataFrame, source: Optional[str] = None) -> int:
+        """Densité de pings (TSTAMP, LATITUDE, LONGITUDE)"""
+        if df is None or df.empty:
+            return 0
+        return self.add_points(
+            df['LATITUDE'].to_numpy(dtype=float), df['LONGITUDE'].to_numpy(dtype=float),
+            timestamp_values(df['TSTAMP']), source=source,
+        )
+    
+    def ingest_segments(self, segments: pd.DataFrame) -> int:
+        """Densité de segments (create_voyage_segments), comptés à leur milieu"""
+        if segments is None or segments.empty:
+            return 0
+        from_lon = segments['from_lon'].to_numpy(dtype=float)
+        delta_lon = (segments['to_lon'].to_numpy(dtype=float) - from_lon + 180.0) % 360.0 - 180.0
+        mid_lon = (from_lon + delta_lon / 2 + 180.0) % 360.0 - 180.0
+        mid_lat = (segments['from_lat'].to_numpy(dtype=float) + segments['to_lat'].to_numpy(dtype=float)) / 2
+        return self.add_points(mid_lat, mid_lon, timestamp_values(segments['timestamp']))
+    
+    def ingest_source(self, source_path: Union[str, Path], force: bool = False,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        Ingestion en flux d'un fichier AIS; un fichier déjà ingéré (même taille et mtime)
+        est ignoré pour ne pas compter deux fois ses pings. Sinon (fichier modifié ou force),
+        sa contribution précédente est d'abord retranchée des rasters
+        """
+        from data_engineering.ais_processor import AISDataProcessor
+        from data_engineering.ais_cache import AISColumnarCache
+        
+        signature = AISColumnarCache.source_signature(source_path)
+        if not force and self.meta['sources'].get(signature['path']) == signature:
+            logger.info(f"Densité AIS déjà à jour pour {source_path}")
+            return 0
+        
+        if signature['path'] in self.meta['sources']:
+            self.remove_source(signature['path'])
+        
+        # Histogrammes cumulés en mémoire sur tout le fichier, écrits une fois par tuile
+        self._buffer = {}
+        try:
+            n_points = sum(
+                self.ingest_pings(chunk, source=signature['path'])
+                for chunk in AISDataProcessor(source_path).iter_ais_chunks(chunk_size)
+            )
+            self._flush()
+        finally:
+            self._buffer = None
+        self.meta['sources'][signature['path']] = signature
+        self._write_meta()
+        
+        logger.info(f"Densité AIS: {n_points} pings de {source_path} répartis dans {self.root}")
+        return n_points
+    
+    def remove_source(self, source: str):
+        """Retranche des rasters la contribution d'un fichier AIS ingéré (chemin absolu)"""
+        source_dir = self.source_dir(source)
+        if not source_dir.exists():
+            logger.warning(f"Contribution de {source} inconnue (ingérée avant son suivi): non retranchée")
+        else:
+            for path in sorted(source_dir.glob('*/*_*.npy')):
+                day = path.parent.name
+                tile_row, tile_col = (int(i) for i in path.stem.split('_'))
+                self._accumulate(self.tile_path(day, tile_row, tile_col), -np.load(path))
+                self.cache.invalidate((day, tile_row, tile_col))
+                self._day_tiles.pop(day, None)
+            shutil.rmtree(source_dir)
+        
+        self.meta['sources'].pop(source, None)
+        self._write_meta()
+        logger.info(f"Densité AIS: contribution de {source} retranchée")
+    
+    # ==================== REQUÊTES ====================
+    
+    def days(self, start: Optional[date] = None, end: Optional[date] = None) -> List[str]:
+        """Jours disponibles (AAAA-MM-JJ) dans [start, end]"""
+        if not self.root.exists():
+            return []
+        days = sorted(p.name for p in self.root.iterdir() if p.is_dir() and p.name != SOURCES_DIR)
+        if start is not None:
+            days = [d for d in days if d >= start.isoformat()]
+        if end is not None:
+            days = [d for d in days if d <= end.isoformat()]
+        return days
+    
+    def tiles_of_day(self, day: str) -> set:
+        """Tuiles (ligne, colonne) non vides d'un jour, listées une fois par jour"""
+        if day not in self._day_tiles:
+            self._day_tiles[day] = {
+                tuple(int(i) for i in p.stem.split('_')) for p in (self.root / day).glob('*_*.npy')
+                if '.tmp' not in p.name
+            }
+        return self._day_tiles[day]
+    
+    def _load_tile(self, key: Tuple[str, int, int]) -> np.ndarray:
+        return np.load(self.tile_path(*key), mmap_mode='r')
+    
+    def query(self, start: Union[date, datetime], end: Union[date, datetime],
+              bbox: BBox = (-90.0, -180.0, 90.0, 180.0)) -> Tuple[np.ndarray, BBox]:
+        """
+        Somme des rasters journaliers de start à end inclus sur une emprise
+        Retourne le raster (ligne 0 = sud) et l'emprise exacte des cellules couvertes
+        """
+        lat_min, lon_min, lat_max, lon_max = bbox
+        if lat_min > lat_max or lon_min > lon_max:
+            raise ValueError(f"Emprise invalide: {bbox}")
+        start = start.date() if isinstance(start, datetime) else start
+        end = end.date() if isinstance(end, datetime) else end
+        
+        (row0, row1), (col0, col1) = self.cell_indices([lat_min, lat_max], [lon_min, lon_max])
+        if lon_max >= 180.0:
+            col1 = self.n_cols - 1
+        raster = np.zeros((row1 - row0 + 1, col1 - col0 + 1), dtype=np.float64)
+        
+        tile_cells = self.tile_cells
+        tiles = [
+            (tile_row, tile_col)
+            for tile_row in range(row0 // tile_cells, row1 // tile_cells + 1)
+            for tile_col in range(col0 // tile_cells, col1 // tile_cells + 1)
+        ]
+        for day in self.days(start, end):
+            present = self.tiles_of_day(day)
+            for tile_row, tile_col in tiles:
+                if (tile_row, tile_col) not in present:
+                    continue
+                tile = self.cache.get((day, tile_row, tile_col), self._load_tile)
+                # Intersection tuile / emprise en coordonnées de grille
+                r0, r1 = max(row0, tile_row * tile_cells), min(row1, (tile_row + 1) * tile_cells - 1)
+                c0, c1 = max(col0, tile_col * tile_cells), min(col1, (tile_col + 1) * tile_cells - 1)
+                raster[r0 - row0:r1 - row0 + 1, c0 - col0:c1 - col0 + 1] += tile[
+                    r0 - tile_row * tile_cells:r1 - tile_row * tile_cells + 1,
+                    c0 - tile_col * tile_cells:c1 - tile_col * tile_cells + 1,
+                ]
+        
+        resolution = self.resolution_deg
+        extent = tuple(round(value, 9) for value in (
+            row0 * resolution - 90.0, col0 * resolution - 180.0,
+            (row1 + 1) * resolution - 90.0, (col1 + 1) * resolution - 180.0,
+        ))
+        return raster, extent
+
+
+def main(argv: Optional[List[str]] = None):
+    from config import settings
+    
+    parser = argparse.ArgumentParser(description="Rasters journaliers de densité de trafic AIS")
+    parser.add_argument('sources', nargs='+', help='Fichiers AIS à ingérer')
+    parser.add_argument('--density-dir', default=settings.TRAFFIC_DENSITY_DIR,
+                        help=f'Répertoire des rasters (default: {settings.TRAFFIC_DENSITY_DIR})')
+    parser.add_argument('--force', action='store_true', help='Ré-ingérer les fichiers déjà traités')
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.INFO)
+    store = TrafficDensityStore(
+        args.density_dir, settings.TRAFFIC_DENSITY_RESOLUTION_DEG, settings.TRAFFIC_DENSITY_TILE_CELLS
+    )
+    n_points = sum(store.ingest_source(source, args.force) for source in args.sources)
+    print(f"✅ {n_points} pings ajoutés aux rasters de {args.density_dir}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+Simplification des trajectoires AIS avant segmentation
+Douglas-Peucker vectorisé: toutes les traces (MMSI) sont simplifiées ensemble,
+un niveau de récursion à la fois, sur des tableaux NumPy plats.
+
+Garanties (par trace continue, c.-à-d. sans gap > max_span_hours):
+- premier et dernier ping conservés: le temps total des segments est inchangé
+- chaque ping supprimé est à moins de tolerance_nm du segment qui le remplace:
+  la distance totale ne diminue que des zigzags contenus dans ce couloir
+- aucun segment simplifié ne dure plus de max_span_hours (il n'est donc pas
+  écarté par la segmentation)
+"""
+import logging
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from data_engineering.ais_processor import timestamp_values, vessel_keys
+from data_engineering.geodesy import EARTH_RADIUS
+
+logger = logging.getLogger(__name__)
+
+NM_PER_DEGREE = EARTH_RADIUS['nm'] * np.pi / 180
+
+DEFAULT_TOLERANCE_NM = 0.5
+# Garde-fous de manœuvre: un changement plus fort entre deux pings est toujours conservé
+DEFAULT_SPEED_CHANGE_KNOTS = 3.0
+DEFAULT_COURSE_CHANGE_DEG = 20.0
+
+
+def cross_track_distance_nm(lat: np.ndarray, lon: np.ndarray,
+                            lat_a: np.ndarray, lon_a: np.ndarray,
+                            lat_b: np.ndarray, lon_b: np.ndarray) -> np.ndarray:
+    """
+    Distance (NM) d'un point au segment [A, B]
+    Projection équirectangulaire locale centrée sur A: précise pour des segments
+    de quelques dizaines de milles, ce qui couvre les intervalles AIS
+    """
+    scale = np.cos(np.radians(lat_a))
+    bx = _wrap_longitude(lon_b - lon_a) * scale
+    by = lat_b - lat_a
+    px = _wrap_longitude(lon - lon_a) * scale
+    py = lat - lat_a
+    
+    length2 = bx * bx + by * by
+    u = np.clip((px * bx + py * by) / np.where(length2 > 0, length2, 1.0), 0.0, 1.0)
+    return np.hypot(px - u * bx, py - u * by) * NM_PER_DEGREE
+
+
+def _wrap_longitude(delta: np.ndarray) -> np.ndarray:
+    return (delta + 180.0) % 360.0 - 180.0
+
+
+def simplify_tracks(df: pd.DataFrame, tolerance_nm: float = DEFAULT_TOLERANCE_NM,
+                    max_span_hours: float = 1.0,
+                    speed_change_knots: Optional[float] = DEFAULT_SPEED_CHANGE_KNOTS,
+                    course_change_deg: Optional[float] = DEFAULT_COURSE_CHANGE_DEG) -> pd.DataFrame:
+    """
+    Sous-ensemble des pings (trié par MMSI puis TSTAMP) après Douglas-Peucker par trace
+    max_span_hours: doit valoir le min_time_gap_hours de la segmentation qui suit
+    speed_change_knots / course_change_deg: None désactive le garde-fou correspondant
+    """
+    if df is None or len(df) < 3:
+        return df
+    
+    df = df.sort_values(['MMSI', 'TSTAMP'], kind='mergesort')
+    keys = vessel_keys(df['MMSI'])
+    hours = timestamp_values(df['TSTAMP']).astype('datetime64[ns]').view(np.int64) / 3.6e12
+    lat = df['LATITUDE'].to_numpy(dtype=float)
+    lon = df['LONGITUDE'].to_numpy(dtype=float)
+    
+    # Ruptures de trace: changement de navire ou gap que la segmentation écartera
+    breaks = (keys[1:] != keys[:-1]) | ~(np.diff(hours) <= max_span_hours)
+    run_id = np.concatenate([[0], np.cumsum(breaks)])
+    
+    keep = np.zeros(len(df), dtype=bool)
+    keep[[0, -1]] = True
+    keep[1:] |= breaks
+    keep[:-1] |= breaks
+    keep |= _manoeuvre_guard(df, breaks, speed_change_knots, course_change_deg)
+    
+    keep = _douglas_peucker(lat, lon, hours, run_id, keep, tolerance_nm, max_span_hours)
+    
+    logger.info(
+        f"Simplification des trajectoires (tolérance {tolerance_nm} NM): "
+        f"{len(df)} -> {int(keep.sum())} pings"
+    )
+    return df[keep]
+
+
+def _manoeuvre_guard(df: pd.DataFrame, breaks: np.ndarray,
+                     speed_change_knots: Optional[float],
+                     course_change_deg: Optional[float]) -> np.ndarray:
+    """Pings qui suivent un changement de vitesse ou de cap au-delà des seuils"""
+    guard = np.zeros(len(df), dtype=bool)
+    same_track = ~breaks
+    
+    if speed_change_knots is not None and 'SOG' in df.columns:
+        sog = df['SOG'].to_numpy(dtype=float)
+        guard[1:] |= same_track & (np.abs(np.diff(sog)) > speed_change_knots)
+    
+    if course_change_deg is not None and 'COG' in df.columns:
+        cog = df['COG'].to_numpy(dtype=float)
+        guard[1:] |= same_track & (np.abs(_wrap_longitude(np.diff(cog))) > course_change_deg)
+    
+    return guard
+
+
+def _douglas_peucker(lat: np.ndarray, lon: np.ndarray, hours: np.ndarray, run_id: np.ndarray,
+                     keep: np.ndarray, tolerance_nm: float, max_span_hours: float) -> np.ndarray:
+    """
+    Douglas-Peucker itératif: à chaque passe, tous les intervalles ouverts de toutes
+    les traces sont évalués d'un bloc; ceux qui dépassent la tolérance sont coupés au
+    ping le plus éloigné, ceux qui durent plus de max_span_hours au milieu temporel
+    """
+    anchors = np.flatnonzero(keep)
+    start, end = anchors[:-1], anchors[1:]
+    same_run = run_id[start] == run_id[end]
+    start, end = start[same_run], end[same_run]
+    
+    while True:
+        is_open = end - start > 1
+        start, end = start[is_open], end[is_open]
+        if len(start) == 0:
+            break
+        
+        # Pings intérieurs de chaque intervalle, à plat
+        lengths = end - start - 1
+        offsets = np.cumsum(lengths) - lengths
+        group = np.repeat(np.arange(len(start)), lengths)
+        interior = np.arange(lengths.sum()) - offsets[group] + start[group] + 1
+        
+        deviation = cross_track_distance_nm(
+            lat[interior], lon[interior],
+            lat[start][group], lon[start][group], lat[end][group], lon[end][group],
+        )
+        deviation = np.nan_to_num(deviation, nan=0.0)
+        too_far = np.maximum.reduceat(deviation, offsets) > tolerance_nm
+        too_long = hours[end] - hours[start] > max_span_hours
+        split = too_far | too_long
+        
+        midpoint = (hours[start] + hours[end]) / 2
+        score = np.where(too_far[group], deviation, -np.abs(hours[interior] - midpoint[group]))
+        pivot = interior[_group_argmax(np.nan_to_num(score, nan=-np.inf), group, offsets)][split]
+        
+        keep[pivot] = True
+        start, end = np.concatenate([start[split], pivot]), np.concatenate([pivot, end[split]])
+    
+    return keep
+
+
+def _group_argmax(values: np.ndarray, group: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """Position (dans values) du premier maximum de chaque groupe contigu"""
+    group_max = np.maximum.reduceat(values, offsets)
+    candidates = np.flatnonzero(values == group_max[group])
+    # Les candidats sont triés: le premier de chaque groupe suit un changement de groupe
+    first = np.diff(group[candidates], prepend=-1) != 0
+    return candidates[first]
@@ -2,5 +2,8 @@
 Fichier init pour le package optimization_engine
 """
 from .optimizer import WeightedAStarOptimizer, PathNode
+from .csr_graph import CSRGraph
+from .landmarks import LandmarkIndex
+from .contraction import ContractionHierarchy
 
-__all__ = ["WeightedAStarOptimizer", "PathNode"]
+__all__ = ["WeightedAStarOptimizer", "PathNode", "CSRGraph", "LandmarkIndex", "ContractionHierarchy"]
@@ -0,0 +1,251 @@
+"""
+Hiérarchies de contraction (CH) pour les requêtes port à port
+Les nœuds sont contractés par importance croissante (différence d'arêtes, mise à jour
+paresseuse); un raccourci u -> w remplace u -> v -> w sauf s'il existe un chemin témoin
+plus court. Requête: recherche bidirectionnelle montante, raccourcis dépliés en nœuds
+d'origine. Un index par jeu de poids, persisté en .npy
+"""
+import heapq
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from optimization_engine.csr_graph import CSRGraph
+from optimization_engine.landmarks import graph_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Nœuds fixés par recherche de témoin (au-delà: raccourci ajouté, toujours correct)
+WITNESS_SETTLE_LIMIT = 500
+
+ARRAYS = ('rank', 'sources', 'targets', 'costs', 'middles')
+
+
+def _adjacency(sources: np.ndarray, targets: np.ndarray, costs: np.ndarray,
+               n_nodes: int) -> Tuple[List[int], List[int], List[float]]:
+    """Adjacence CSR en listes Python (offsets, cibles, coûts)"""
+    order = np.argsort(sources, kind='stable')
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(sources, minlength=n_nodes))])
+    return offsets.tolist(), targets[order].tolist(), costs[order].tolist()
+
+
+class ContractionHierarchy:
+    """
+    Index CH d'un jeu de poids
+    - rank[v]: ordre de contraction du nœud v
+    - sources, targets, costs, middles: arêtes d'origine et raccourcis, une par couple
+      (middles: nœud contourné par le raccourci, -1 pour une arête d'origine)
+    - version: version du graphe compilé pour laquelle l'index est valide
+    """
+    
+    def __init__(self, rank: np.ndarray, sources: np.ndarray, targets: np.ndarray, costs: np.ndarray,
+                 middles: np.ndarray, fingerprint: str, version: int = 0):
+        self.rank = np.asarray(rank, dtype=np.int64)
+        self.sources = np.asarray(sources, dtype=np.int64)
+        self.targets = np.asarray(targets, dtype=np.int64)
+        self.costs = np.asarray(costs, dtype=float)
+        self.middles = np.asarray(middles, dtype=np.int64)
+        self.fingerprint = fingerprint
+        self.version = version
+        
+        # Recherche avant: arêtes montantes u -> w; arrière: arêtes descendantes u -> w lues depuis w
+        n = len(self.rank)
+        upward = self.rank[self.sources] < self.rank[self.targets]
+        self.up = _adjacency(self.sources[upward], self.targets[upward], self.costs[upward], n)
+        self.down = _adjacency(self.targets[~upward], self.sources[~upward], self.costs[~upward], n)
+        # Raccourci (u, w) -> nœud contourné, pour le dépliage des chemins
+        shortcut = self.middles >= 0
+        self._middle: Dict[Tuple[int, int], int] = dict(zip(
+            zip(self.sources[shortcut].tolist(), self.targets[shortcut].tolist()), self.middles[shortcut].tolist()
+        ))
+    
+    @property
+    def n_shortcuts(self) -> int:
+        return int((self.middles >= 0).sum())
+    
+    @classmethod
+    def build(cls, csr: CSRGraph, costs: np.ndarray,
+              witness_limit: int = WITNESS_SETTLE_LIMIT) -> "ContractionHierarchy":
+        """Contraction de tous les nœuds (arêtes de coût infini ignorées)"""
+        n = csr.n_nodes
+        out_edges: List[Dict[int, float]] = [{} for _ in range(n)]
+        in_edges: List[Dict[int, float]] = [{} for _ in range(n)]
+        for u, w, cost in zip(csr.sources.tolist(), csr.targets.tolist(), costs.tolist()):
+            if u != w and cost < out_edges[u].get(w, float('inf')):
+                out_edges[u][w] = cost
+                in_edges[w][u] = cost
+        middles: Dict[Tuple[int, int], int] = {}
+        
+        def witness_distances(source: int, skip: int, max_cost: float, goals: set) -> Dict[int, float]:
+            """Dijkstra limité depuis source sans passer par skip"""
+            dist = {source: 0.0}
+            heap = [(0.0, source)]
+            settled = 0
+            while heap and goals and settled < witness_limit:
+                d, node = heapq.heappop(heap)
+                if d > dist[node]:
+                    continue
+                if d > max_cost:
+                    break
+                goals.discard(node)
+                settled += 1
+                for neighbor, cost in out_edges[node].items():
+                    if neighbor != skip and d + cost < dist.get(neighbor, float('inf')):
+                        dist[neighbor] = d + cost
+                        heapq.heappush(heap, (d + cost, neighbor))
+            return dist
+        
+        def shortcuts(v: int) -> List[Tuple[int, int, float]]:
+            """Raccourcis nécessaires si v était contracté maintenant"""
+            needed = []
+            for u, cost_in in in_edges[v].items():
+                through = {w: cost_in + cost_out for w, cost_out in out_edges[v].items() if w != u}
+                if not through:
+                    continue
+                dist = witness_distances(u, v, max(through.values()), set(through))
+                needed.extend((u, w, cost) for w, cost in through.items() if dist.get(w, float('inf')) > cost)
+            return needed
+        
+        # Voisins déjà contractés et profondeur dans la hiérarchie: répartissent la contraction
+        deleted_neighbors = [0] * n
+        level = [0] * n
+        
+        def priority(v: int, needed: List[Tuple[int, int, float]]) -> int:
+            return 2 * (len(needed) - len(in_edges[v]) - len(out_edges[v])) + deleted_neighbors[v] + level[v]
+        
+        heap = [(priority(v, shortcuts(v)), v) for v in range(n)]
+        heapq.heapify(heap)
+        rank = np.zeros(n, dtype=np.int64)
+        edges: List[Tuple[int, int, float, int]] = []
+        order = 0
+        while heap:
+            _, v = heapq.heappop(heap)
+            needed = shortcuts(v)
+            current = priority(v, needed)
+            if heap and current > heap[0][0]:
+                heapq.heappush(heap, (current, v))
+                continue
+            
+            rank[v] = order
+            order += 1
+            # Les arêtes restantes de v mènent à des nœuds de rang supérieur: elles entrent dans l'index
+            for w, cost in out_edges[v].items():
+                edges.append((v, w, cost, middles.get((v, w), -1)))
+                del in_edges[w][v]
+                deleted_neighbors[w] += 1
+                level[w] = max(level[w], level[v] + 1)
+            for u, cost in in_edges[v].items():
+                edges.append((u, v, cost, middles.get((u, v), -1)))
+                del out_edges[u][v]
+                deleted_neighbors[u] += 1
+                level[u] = max(level[u], level[v] + 1)
+            for u, w, cost in needed:
+                if cost < out_edges[u].get(w, float('inf')):
+                    out_edges[u][w] = cost
+                    in_edges[w][u] = cost
+                    middles[(u, w)] = v
+        
+        columns = list(zip(*edges)) or [(), (), (), ()]
+        index = cls(rank, np.array(columns[0], dtype=np.int64), np.array(columns[1], dtype=np.int64),
+                    np.array(columns[2], dtype=float), np.array(columns[3], dtype=np.int64),
+                    graph_fingerprint(csr, costs), csr.version)
+        logger.info(f"Hiérarchie de contraction: {n} nœuds, {len(edges)} arêtes dont {index.n_shortcuts} raccourcis")
+        return index
+    
+    def save(self, directory: str):
+        """rank, sources, targets, costs, middles (.npy) et meta.json dans directory"""
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump({'fingerprint': self.fingerprint, 'n_nodes': len(self.rank),
+                       'n_edges': len(self.sources), 'n_shortcuts': self.n_shortcuts}, f)
+    
+    @classmethod
+    def load(cls, directory: str, fingerprint: Optional[str] = None,
+             version: int = 0) -> Optional["ContractionHierarchy"]:
+        """Index persisté, ou None s'il est absent ou construit pour un autre graphe / jeu de poids"""
+        meta_path = os.path.join(directory, 'meta.json')
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if fingerprint is not None and meta['fingerprint'] != fingerprint:
+            logger.info(f"Hiérarchie de contraction périmée dans {directory}: empreinte différente")
+            return None
+        arrays = [np.load(os.path.join(directory, f"{name}.npy")) for name in ARRAYS]
+        return cls(*arrays, meta['fingerprint'], version)
+    
+    def query(self, source: int, target: int) -> Tuple[float, Optional[List[int]], Dict[str, int]]:
+        """
+        Recherche bidirectionnelle montante
+        Retourne (coût, chemin en indices de nœuds d'origine, compteurs); (inf, None, ...) sans chemin
+        """
+        inf = float('inf')
+        graphs = (self.up, self.down)
+        dist = ({source: 0.0}, {target: 0.0})
+        parents: Tuple[Dict[int, int], Dict[int, int]] = ({}, {})
+        heaps = ([(0.0, source)], [(0.0, target)])
+        best, meeting = (0.0, source) if source == target else (inf, None)
+        settled = relaxed = 0
+        
+        while True:
+            # Une direction s'arrête dès que sa plus petite clé atteint le meilleur coût
+            top_forward = heaps[0][0][0] if heaps[0] else inf
+            top_backward = heaps[1][0][0] if heaps[1] else inf
+            if top_forward >= best and top_backward >= best:
+                break
+            side = 0 if top_forward <= top_backward else 1
+            d, node = heapq.heappop(heaps[side])
+            if d > dist[side][node]:
+                continue
+            settled += 1
+            other = dist[1 - side].get(node)
+            if other is not None and d + other < best:
+                best, meeting = d + other, node
+            
+            # Stall-on-demand: un voisin de rang supérieur atteint node plus court, inutile de relâcher
+            side_dist, parent = dist[side], parents[side]
+            offsets, targets, costs = graphs[1 - side]
+            if any(side_dist.get(targets[i], inf) + costs[i] < d for i in range(offsets[node], offsets[node + 1])):
+                continue
+            
+            offsets, targets, costs = graphs[side]
+            relaxed += offsets[node + 1] - offsets[node]
+            for i in range(offsets[node], offsets[node + 1]):
+                neighbor, nd = targets[i], d + costs[i]
+                if nd < side_dist.get(neighbor, inf):
+                    side_dist[neighbor] = nd
+                    parent[neighbor] = node
+                    heapq.heappush(heaps[side], (nd, neighbor))
+        
+        stats = {'settled': settled, 'relaxed': relaxed}
+        if meeting is None:
+            return inf, None, stats
+        
+        forward = [meeting]
+        while forward[-1] in parents[0]:
+            forward.append(parents[0][forward[-1]])
+        forward.reverse()
+        backward = [meeting]
+        while backward[-1] in parents[1]:
+            backward.append(parents[1][backward[-1]])
+        return best, self.unpack(forward + backward[1:]), stats
+    
+    def unpack(self, path: List[int]) -> List[int]:
+        """Remplace chaque raccourci du chemin par les nœuds qu'il contourne"""
+        unpacked = [path[0]]
+        for u, w in zip(path[:-1], path[1:]):
+            stack = [(u, w)]
+            while stack:
+                a, b = stack.pop()
+                middle = self._middle.get((a, b), -1)
+                if middle < 0:
+                    unpacked.append(b)
+                else:
+                    stack.append((middle, b))
+                    stack.append((a, middle))
+        return unpacked
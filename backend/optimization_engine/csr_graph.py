@@ -0,0 +1,138 @@
+"""
+Représentation compilée du graphe de routage
+Nœuds indexés par des entiers, adjacence au format CSR (offsets / cibles) dans les
+deux sens, attributs d'arêtes rangés dans des tableaux NumPy parallèles.
+Construit une fois depuis le networkx.DiGraph; la boucle de recherche n'accède plus
+qu'à des listes indexées par entier (pas de hachage de chaînes par arête).
+"""
+import logging
+import math
+from typing import Dict, List, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+
+from models import WayPoint
+
+logger = logging.getLogger(__name__)
+
+# Attribut compilé -> attributs networkx lus dans l'ordre (défaut 0)
+EDGE_ATTRIBUTES = {
+    'time_hours': ('time_hours',),
+    'fuel_tons': ('fuel_tons',),
+    'distance_nm': ('weight', 'distance_nm'),
+    'weather_risk': ('weather_risk',),
+    'piracy_risk': ('piracy_risk',),
+}
+
+
+class CSRGraph:
+    """
+    Graphe orienté compilé
+    - offsets[i]:offsets[i+1]: arêtes sortantes du nœud i (targets, attributs)
+    - in_offsets[i]:in_offsets[i+1]: arêtes entrantes (in_sources, in_edges = indices d'arête)
+    """
+    
+    def __init__(self, node_ids: List[str], lats: np.ndarray, lons: np.ndarray,
+                 sources: np.ndarray, targets: np.ndarray, attributes: Dict[str, np.ndarray],
+                 blocked: np.ndarray, edge_keys: np.ndarray, version: int = 0):
+        self.node_ids = list(node_ids)
+        self.index: Dict[str, int] = {node_id: i for i, node_id in enumerate(self.node_ids)}
+        self.lats = np.asarray(lats, dtype=float)
+        self.lons = np.asarray(lons, dtype=float)
+        self.version = version
+        
+        # Arêtes triées par source (ordre stable: ordre d'insertion networkx)
+        order = np.argsort(sources, kind='stable')
+        self.sources = np.asarray(sources, dtype=np.int64)[order]
+        self.targets = np.asarray(targets, dtype=np.int64)[order]
+        self.attributes = {name: np.asarray(values, dtype=float)[order] for name, values in attributes.items()}
+        self.blocked = np.asarray(blocked, dtype=bool)[order]
+        self.edge_keys = np.asarray(edge_keys, dtype=np.int64)[order]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(self.sources, minlength=self.n_nodes))])
+        
+        # Adjacence inverse (prédécesseurs), pour les recherches arrière
+        in_order = np.argsort(self.targets, kind='stable')
+        self.in_edges = in_order
+        self.in_sources = self.sources[in_order]
+        self.in_offsets = np.concatenate([[0], np.cumsum(np.bincount(self.targets, minlength=self.n_nodes))])
+        
+        # Copies en listes Python: l'indexation d'une liste coûte bien moins qu'un scalaire NumPy
+        self.offsets_list: List[int] = self.offsets.tolist()
+        self.targets_list: List[int] = self.targets.tolist()
+        self.in_offsets_list: List[int] = self.in_offsets.tolist()
+        self.in_sources_list: List[int] = self.in_sources.tolist()
+        self.in_edges_list: List[int] = self.in_edges.tolist()
+        self._lists: Dict[str, list] = {}
+    
+    @property
+    def n_nodes(self) -> int:
+        return len(self.node_ids)
+    
+    @property
+    def n_edges(self) -> int:
+        return len(self.targets)
+    
+    @classmethod
+    def from_networkx(cls, graph: nx.DiGraph, waypoints: Optional[Dict[str, WayPoint]] = None,
+                      version: int = 0) -> "CSRGraph":
+        """Compilation en une passe sur graph.edges(data=True)"""
+        node_ids = list(graph.nodes)
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+        waypoints = waypoints or {}
+        
+        def coordinate(node_id, name):
+            if node_id in waypoints:
+                return getattr(waypoints[node_id], name)
+            return graph.nodes[node_id].get(name, np.nan)
+        
+        lats = np.array([coordinate(n, 'latitude') for n in node_ids], dtype=float)
+        lons = np.array([coordinate(n, 'longitude') for n in node_ids], dtype=float)
+        
+        sources, targets, blocked, edge_keys = [], [], [], []
+        columns: Dict[str, list] = {name: [] for name in EDGE_ATTRIBUTES}
+        for u, v, data in graph.edges(data=True):
+            sources.append(index[u])
+            targets.append(index[v])
+            for name, keys in EDGE_ATTRIBUTES.items():
+                columns[name].append(next((data[key] for key in keys if key in data), 0))
+            blocked.append(bool(data.get('blocked', False)))
+            edge_keys.append(data.get('edge_key', -1))
+        
+        compiled = cls(node_ids, lats, lons, np.array(sources, dtype=np.int64), np.array(targets, dtype=np.int64),
+                       columns, np.array(blocked, dtype=bool), np.array(edge_keys, dtype=np.int64), version)
+        logger.info(f"Graphe compilé (CSR): {compiled.n_nodes} nœuds, {compiled.n_edges} arêtes")
+        return compiled
+    
+    def as_list(self, name: str) -> list:
+        """
+        Colonne en liste Python, convertie une fois par compilation
+        name: attribut d'arête, 'blocked', 'edge_keys', 'lats' ou 'lons'
+        """
+        if name not in self._lists:
+            array = self.attributes[name] if name in self.attributes else getattr(self, name)
+            self._lists[name] = array.tolist()
+        return self._lists[name]
+    
+    def trig_lists(self) -> Tuple[List[float], List[float], List[float]]:
+        """
+        Latitudes et longitudes en radians et cosinus des latitudes, calculés une fois
+        via math (valeurs identiques à celles du haversine scalaire de geodesy)
+        """
+        if 'cos_lat' not in self._lists:
+            self._lists['lat_rad'] = [math.radians(lat) for lat in self.as_list('lats')]
+            self._lists['lon_rad'] = [math.radians(lon) for lon in self.as_list('lons')]
+            self._lists['cos_lat'] = [math.cos(lat) for lat in self._lists['lat_rad']]
+        return self._lists['lat_rad'], self._lists['lon_rad'], self._lists['cos_lat']
+    
+    def edge_index(self, from_index: int, to_index: int) -> int:
+        """Indice de l'arête from -> to (-1 si absente)"""
+        start, end = self.offsets_list[from_index], self.offsets_list[from_index + 1]
+        for edge in range(start, end):
+            if self.targets_list[edge] == to_index:
+                return edge
+        return -1
+    
+    def path_edges(self, path: List[int]) -> List[int]:
+        """Indices des arêtes d'un chemin de nœuds"""
+        return [self.edge_index(u, v) for u, v in zip(path[:-1], path[1:])]
@@ -0,0 +1,185 @@
+"""
+K plus courts chemins sans boucle (Yen, variante de Lawler), classés par coût pondéré
+L'arbre des plus courts chemins vers l'arrivée (un Dijkstra arrière) est calculé une fois et
+partagé par toutes les recherches de déviation: il donne une heuristique exacte à l'A* de
+déviation, qui s'arrête dès qu'il atteint une branche de l'arbre évitant les nœuds retirés.
+Les chemins trop semblables à un chemin déjà retenu (max_similarity) sont écartés
+"""
+import heapq
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from optimization_engine.csr_graph import CSRGraph
+
+logger = logging.getLogger(__name__)
+
+# Part maximale du coût d'un chemin partagée avec un chemin déjà retenu
+DEFAULT_MAX_SIMILARITY = 0.8
+# Chemins candidats examinés au plus par chemin demandé (chemins trop semblables compris)
+CANDIDATES_PER_PATH = 20
+
+
+def shortest_path_tree(csr: CSRGraph, costs: np.ndarray, goal: int) -> Tuple[List[float], List[int]]:
+    """
+    Arbre des plus courts chemins vers goal: (distance à goal, arête suivante vers goal)
+    par nœud; distance inf et arête -1 si goal est inaccessible
+    """
+    n = csr.n_nodes
+    finite = np.isfinite(costs)
+    edges = np.flatnonzero(finite)
+    reverse = csr_matrix((costs[finite], (csr.targets[finite], csr.sources[finite])), shape=(n, n))
+    dist, predecessors = dijkstra(reverse, indices=goal, return_predecessors=True)
+    
+    # Prédécesseur dans le graphe inversé = successeur vers goal (une arête par couple de nœuds)
+    next_edge = np.full(n, -1, dtype=np.int64)
+    has_next = predecessors >= 0
+    pair = csr.sources[edges].astype(np.int64) * n + csr.targets[edges]
+    order = np.argsort(pair)
+    pair, edges = pair[order], edges[order]
+    wanted = np.flatnonzero(has_next) * n + predecessors[has_next]
+    next_edge[has_next] = edges[np.searchsorted(pair, wanted)]
+    return dist.tolist(), next_edge.tolist()
+
+
+def path_similarity(edges: List[int], other: Set[int], costs: List[float]) -> float:
+    """Part du coût de edges empruntée aussi par other (1.0 pour un chemin de coût nul)"""
+    total = sum(costs[edge] for edge in edges)
+    if total <= 0:
+        return 1.0
+    return sum(costs[edge] for edge in edges if edge in other) / total
+
+
+def k_shortest_paths(csr: CSRGraph, costs: np.ndarray, cost_list: List[float], start: int, goal: int, k: int,
+                     max_similarity: float = DEFAULT_MAX_SIMILARITY,
+                     max_candidates: Optional[int] = None) -> Tuple[List[Tuple[List[int], float]], Dict[str, int]]:
+    """
+    Au plus k chemins sans boucle de start à goal par coût croissant, chacun partageant au plus
+    max_similarity de son coût avec chacun des précédents (1.0: pas de filtre)
+    costs, cost_list: coût pondéré des arêtes (vecteur et liste, inf si bloquée)
+    Retourne ([(chemin en indices de nœuds, coût)], compteurs)
+    """
+    stats = {'candidates': 0, 'spur_searches': 0, 'expanded': 0}
+    dist, next_edge = shortest_path_tree(csr, costs, goal)
+    if start == goal or dist[start] == float('inf') or k <= 0:
+        return ([([start], 0.0)] if start == goal and k > 0 else []), stats
+    
+    offsets, targets = csr.offsets_list, csr.targets_list
+    inf = float('inf')
+    max_candidates = max_candidates or CANDIDATES_PER_PATH * k
+    
+    def tree_path(node: int) -> Tuple[List[int], List[int]]:
+        nodes, edges = [node], []
+        while node != goal:
+            edge = next_edge[node]
+            edges.append(edge)
+            node = targets[edge]
+            nodes.append(node)
+        return nodes, edges
+    
+    def spur_path(spur: int, blocked: Set[int],
+                  removed_edges: Set[int]) -> Optional[Tuple[List[int], List[int]]]:
+        """
+        A* de spur à goal sans repasser par blocked (racine du chemin, spur compris) ni emprunter
+        removed_edges; heuristique = distance dans l'arbre
+        """
+        # clean[v]: la branche de l'arbre issue de v évite les nœuds de la racine
+        clean: Dict[int, bool] = {goal: True}
+        
+        def is_clean(node: int) -> bool:
+            chain = []
+            while node not in clean:
+                if node in blocked or next_edge[node] < 0:
+                    clean[node] = False
+                    break
+                chain.append(node)
+                node = targets[next_edge[node]]
+            result = clean[node]
+            for visited in chain:
+                clean[visited] = result
+            return result
+        
+        stats['spur_searches'] += 1
+        g_costs = {spur: 0.0}
+        came_from: Dict[int, Tuple[int, int]] = {}
+        closed = set()
+        open_set = [(dist[spur], spur)]
+        while open_set:
+            _, node = heapq.heappop(open_set)
+            if node in closed:
+                continue
+            closed.add(node)
+            # Heuristique exacte: la branche propre de l'arbre termine un chemin de coût minimal
+            if node != spur and is_clean(node):
+                stats['expanded'] += len(closed)
+                nodes, edges = tree_path(node)
+                while node != spur:
+                    node, edge = came_from[node]
+                    nodes.insert(0, node)
+                    edges.insert(0, edge)
+                return nodes, edges
+            g = g_costs[node]
+            for edge in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[edge]
+                cost = cost_list[edge]
+                if cost == inf or neighbor in closed or neighbor in blocked or edge in removed_edges:
+                    continue
+                new_g = g + cost
+                if new_g < g_costs.get(neighbor, inf) and dist[neighbor] < inf:
+                    g_costs[neighbor] = new_g
+                    came_from[neighbor] = (node, edge)
+                    heapq.heappush(open_set, (new_g + dist[neighbor], neighbor))
+        stats['expanded'] += len(closed)
+        return None
+    
+    # Candidats: (coût, ordre, nœuds, arêtes, indice de déviation)
+    nodes, edges = tree_path(start)
+    candidates = [(dist[start], 0, nodes, edges, 0)]
+    seen = {tuple(nodes)}
+    counter = 1
+    # Préfixes des chemins déjà sortis: nœud du graphe -> (suite, arêtes quittant ce préfixe)
+    found: Dict[int, Tuple[dict, Set[int]]] = {}
+    accepted: List[Tuple[List[int], float]] = []
+    accepted_edges: List[Set[int]] = []
+    
+    while candidates and len(accepted) < k and stats['candidates'] < max_candidates:
+        cost, _, nodes, edges, deviation = heapq.heappop(candidates)
+        stats['candidates'] += 1
+        children = found
+        for i, node in enumerate(nodes):
+            children, branches = children.setdefault(node, ({}, set()))
+            if i < len(edges):
+                branches.add(edges[i])
+        if all(path_similarity(edges, other, cost_list) <= max_similarity for other in accepted_edges):
+            accepted.append((nodes, cost))
+            accepted_edges.append(set(edges))
+            if len(accepted) == k:
+                break
+        
+        # Déviations à partir de l'indice où ce chemin a quitté son parent (Lawler)
+        # Arêtes retirées au nœud i: celles des chemins sortis partageant la racine nodes[:i + 1]
+        root_cost = sum(cost_list[edge] for edge in edges[:deviation])
+        root_nodes = set(nodes[:deviation])
+        children = found
+        for node in nodes[:deviation]:
+            children = children[node][0]
+        for i in range(deviation, len(nodes) - 1):
+            children, removed_edges = children[nodes[i]]
+            root_nodes.add(nodes[i])
+            spur = spur_path(nodes[i], root_nodes, removed_edges)
+            if spur is not None:
+                spur_nodes, spur_edges = spur
+                path = nodes[:i] + spur_nodes
+                key = tuple(path)
+                if key not in seen:
+                    seen.add(key)
+                    path_edges = edges[:i] + spur_edges
+                    path_cost = root_cost + sum(cost_list[edge] for edge in spur_edges)
+                    heapq.heappush(candidates, (path_cost, counter, path, path_edges, i))
+                    counter += 1
+            root_cost += cost_list[edges[i]]
+    
+    return accepted, stats
@@ -0,0 +1,177 @@
+"""
+Bornes inférieures ALT (A*, Landmarks, inégalité triangulaire)
+Repères choisis par point le plus éloigné, distances avant/arrière calculées par Dijkstra
+(scipy.sparse.csgraph) sur le vecteur de coût d'un jeu de poids, tables persistées en .npy.
+Pour tout repère L: d(v, t) >= d(L, t) - d(L, v) et d(v, t) >= d(v, L) - d(t, L)
+"""
+import hashlib
+import json
+import logging
+import os
+from array import array
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from data_engineering.geodesy import haversine_distance
+from optimization_engine.csr_graph import CSRGraph
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LANDMARKS = 16
+# Repères retenus par requête (les plus informatifs entre départ et arrivée)
+ACTIVE_LANDMARKS = 4
+# Distance stockée pour un nœud hors d'atteinte (inf - inf donnerait nan dans les bornes)
+UNREACHABLE = 1e300
+
+
+def graph_fingerprint(csr: CSRGraph, costs: np.ndarray) -> str:
+    """Empreinte (nœuds, arêtes, coûts): une table persistée n'est réutilisée que si elle correspond"""
+    digest = hashlib.sha1('\0'.join(csr.node_ids).encode())
+    for values in (csr.sources, csr.targets, costs):
+        digest.update(np.ascontiguousarray(values).tobytes())
+    return digest.hexdigest()
+
+
+def geodesic_rate(csr: CSRGraph, costs: np.ndarray) -> float:
+    """
+    Coût minimal par mille orthodromique sur les arêtes du graphe
+    rate * distance(v, t) minore le coût de tout chemin de v à t (inégalité triangulaire)
+    """
+    finite = np.isfinite(costs)
+    lengths = haversine_distance(csr.lats[csr.sources[finite]], csr.lons[csr.sources[finite]],
+                                 csr.lats[csr.targets[finite]], csr.lons[csr.targets[finite]])
+    positive = lengths > 0
+    if not positive.any():
+        return 0.0
+    return max(0.0, float(np.min(costs[finite][positive] / lengths[positive])))
+
+
+class LandmarkIndex:
+    """
+    Tables de distances d'un jeu de poids
+    - forward[j, v] = d(L_j, v), backward[j, v] = d(v, L_j)
+    - geodesic_rate: borne géodésique admissible associée (coût / NM)
+    - version: version du graphe compilé pour laquelle les tables sont valides
+    """
+    
+    def __init__(self, landmarks: np.ndarray, forward: np.ndarray, backward: np.ndarray,
+                 rate: float, fingerprint: str, version: int = 0):
+        self.landmarks = np.asarray(landmarks, dtype=np.int64)
+        self.forward = np.asarray(forward, dtype=float)
+        self.backward = np.asarray(backward, dtype=float)
+        self.geodesic_rate = rate
+        self.fingerprint = fingerprint
+        self.version = version
+        self._columns: Optional[List[tuple]] = None
+    
+    @property
+    def n_landmarks(self) -> int:
+        return len(self.landmarks)
+    
+    @classmethod
+    def build(cls, csr: CSRGraph, costs: np.ndarray, n_landmarks: int = DEFAULT_LANDMARKS) -> "LandmarkIndex":
+        """
+        Sélection par point le plus éloigné: chaque nouveau repère maximise la distance
+        aller-retour au repère le plus proche; un Dijkstra avant et arrière par repère
+        """
+        n = csr.n_nodes
+        finite = np.isfinite(costs)
+        matrix = csr_matrix((costs[finite], (csr.sources[finite], csr.targets[finite])), shape=(n, n))
+        reverse = matrix.T.tocsr()
+        
+        landmarks, forward, backward = [], [], []
+        if n:
+            # Premier repère: le nœud atteignable le plus éloigné du nœud 0
+            seed = dijkstra(matrix, indices=0)
+            candidate = int(np.argmax(np.where(np.isfinite(seed), seed, -1.0)))
+            nearest = np.full(n, np.inf)
+            while len(landmarks) < min(n_landmarks, n):
+                landmarks.append(candidate)
+                forward.append(dijkstra(matrix, indices=candidate))
+                backward.append(dijkstra(reverse, indices=candidate))
+                nearest = np.minimum(nearest, forward[-1] + backward[-1])
+                candidate = int(np.argmax(nearest))
+                if nearest[candidate] == 0:
+                    break
+        
+        shape = (len(landmarks), n)
+        forward = np.nan_to_num(np.array(forward).reshape(shape), posinf=UNREACHABLE)
+        backward = np.nan_to_num(np.array(backward).reshape(shape), posinf=UNREACHABLE)
+        index = cls(np.array(landmarks), forward, backward, geodesic_rate(csr, costs),
+                    graph_fingerprint(csr, costs), csr.version)
+        logger.info(f"Repères ALT: {index.n_landmarks} repères sur {n} nœuds")
+        return index
+    
+    def save(self, directory: str):
+        """landmarks.npy, forward.npy, backward.npy et meta.json dans directory"""
+        os.makedirs(directory, exist_ok=True)
+        for name in ('landmarks', 'forward', 'backward'):
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump({'fingerprint': self.fingerprint, 'geodesic_rate': self.geodesic_rate,
+                       'n_landmarks': self.n_landmarks, 'n_nodes': self.forward.shape[1]}, f)
+    
+    @classmethod
+    def load(cls, directory: str, fingerprint: Optional[str] = None,
+             version: int = 0) -> Optional["LandmarkIndex"]:
+        """Tables persistées, ou None si absentes ou calculées pour un autre graphe / jeu de poids"""
+        meta_path = os.path.join(directory, 'meta.json')
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if fingerprint is not None and meta['fingerprint'] != fingerprint:
+            logger.info(f"Repères ALT périmés dans {directory}: empreinte différente")
+            return None
+        arrays = [np.load(os.path.join(directory, f"{name}.npy")) for name in ('landmarks', 'forward', 'backward')]
+        return cls(*arrays, meta['geodesic_rate'], meta['fingerprint'], version)
+    
+    def active_landmarks(self, source: int, goal: int, n_active: int = ACTIVE_LANDMARKS) -> Tuple[int, ...]:
+        """Repères donnant les bornes les plus fortes pour source -> goal (les autres sont ignorés)"""
+        bounds = np.maximum(self.forward[:, goal] - self.forward[:, source],
+                            self.backward[:, source] - self.backward[:, goal])
+        return tuple(sorted(np.argsort(-bounds, kind='stable')[:n_active].tolist()))
+    
+    def _active_columns(self, active: Optional[Tuple[int, ...]]) -> List[tuple]:
+        if self._columns is None:
+            # array('d'): indexation rapide depuis Python, 8 octets par valeur
+            self._columns = [(array('d', f.tobytes()), array('d', b.tobytes()))
+                             for f, b in zip(self.forward, self.backward)]
+        return self._columns if active is None else [self._columns[j] for j in active]
+    
+    def lower_bound(self, goal: int, active: Optional[Tuple[int, ...]] = None) -> Callable[[int], float]:
+        """Borne ALT vers goal: fonction nœud -> max sur les repères actifs (tous par défaut)"""
+        terms = [(f, f[goal], b, b[goal]) for f, b in self._active_columns(active)]
+        
+        def bound(node: int) -> float:
+            best = 0.0
+            for f, f_goal, b, b_goal in terms:
+                d = f_goal - f[node]
+                if d > best:
+                    best = d
+                d = b[node] - b_goal
+                if d > best:
+                    best = d
+            return best
+        
+        return bound
+    
+    def lower_bound_from(self, source: int, active: Optional[Tuple[int, ...]] = None) -> Callable[[int], float]:
+        """Borne ALT depuis source: d(s, v) >= d(L, v) - d(L, s) et d(s, v) >= d(s, L) - d(v, L)"""
+        terms = [(f, f[source], b, b[source]) for f, b in self._active_columns(active)]
+        
+        def bound(node: int) -> float:
+            best = 0.0
+            for f, f_source, b, b_source in terms:
+                d = f[node] - f_source
+                if d > best:
+                    best = d
+                d = b_source - b[node]
+                if d > best:
+                    best = d
+            return best
+        
+        return bound
@@ -1,11 +1,23 @@
 import heapq
 import math
-from typing import Dict, List, Tuple, Optional, Set
+from collections import OrderedDict
+from typing import Callable, Dict, List, Tuple, Optional, Set
 from datetime import datetime, timedelta
 import networkx as nx
+import numpy as np
 from dataclasses import dataclass
 import logging
+import os
 
+from data_engineering.geodesy import EARTH_RADIUS, haversine_distance
+from data_engineering.edge_profiles import EdgeProfiles
+from data_engineering.graph_version import graph_version
+from optimization_engine.contraction import ContractionHierarchy
+from optimization_engine.csr_graph import CSRGraph
+from optimization_engine.route_cache import RouteCache
+from optimization_engine.landmarks import DEFAULT_LANDMARKS, LandmarkIndex, geodesic_rate, graph_fingerprint
+from optimization_engine.k_shortest import DEFAULT_MAX_SIMILARITY, k_shortest_paths
+from optimization_engine.pareto import DEFAULT_EPSILON, DEFAULT_MAX_LABELS, edge_objectives, pareto_front
 from models import (
     WayPoint,
     EdgeAttributes,
@@ -17,6 +29,31 @@ from models import (
 
 logger = logging.getLogger(__name__)
 
+# Vecteurs de coût conservés (un par jeu de poids: les préréglages standards tiennent tous)
+COST_CACHE_SIZE = 8
+# Tables d'heuristique conservées (une par destination et jeu de poids)
+HEURISTIC_CACHE_SIZE = 32
+
+# Jeux de poids standards (ceux de /route/alternatives): index précalculés par préréglage
+STANDARD_PRESETS: Dict[str, OptimizationParams] = {
+    'balanced': OptimizationParams(weight_time=1.0, weight_cost=1.0, weight_risk=1.0),
+    'time': OptimizationParams(weight_time=2.0, weight_cost=1.0, weight_risk=1.0),
+    'safety': OptimizationParams(weight_time=1.0, weight_cost=1.0, weight_risk=2.0),
+}
+
+
+def cost_params_key(params: OptimizationParams) -> Tuple[float, float, float, float]:
+    """Champs de OptimizationParams qui entrent dans le coût d'une arête"""
+    return (float(params.weight_time), float(params.weight_cost),
+            float(params.weight_risk), float(params.fuel_price_per_ton))
+
+
+def _shallow_copy(obj):
+    """Copie superficielle d'une instance de dataclass (sans passer par __init__ ni copy)"""
+    clone = object.__new__(type(obj))
+    clone.__dict__.update(obj.__dict__)
+    return clone
+
 
 @dataclass
 class PathNode:
@@ -40,22 +77,254 @@ class WeightedAStarOptimizer:
     """
     Optimisation A* pondérée pour le routage maritime
     Minimise: W_time * time + W_cost * cost + W_risk * risk
+    backend: 'csr' (graphe compilé, voir csr_graph) ou 'networkx' (parcours historique)
+    heuristic: 'geodesic' (distance * 15 kn / $20 par NM) ou 'landmarks' (bornes ALT exactes,
+    voir build_landmarks; backend CSR uniquement)
     """
     
-    def __init__(self, graph: nx.DiGraph, waypoints: Dict[str, WayPoint]):
+    BACKENDS = ('csr', 'networkx')
+    HEURISTICS = ('geodesic', 'landmarks')
+    
+    def __init__(self, graph: nx.DiGraph, waypoints: Dict[str, WayPoint],
+                 edge_profiles: Optional[EdgeProfiles] = None, backend: str = 'csr',
+                 heuristic: str = 'geodesic', route_cache: Optional[RouteCache] = None):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Backend inconnu: {backend} (attendu: {', '.join(self.BACKENDS)})")
+        if heuristic not in self.HEURISTICS:
+            raise ValueError(f"Heuristique inconnue: {heuristic} (attendu: {', '.join(self.HEURISTICS)})")
         self.graph = graph
         self.waypoints = waypoints
+        # Profils temporels AIS: module le temps des arêtes portant un edge_key
+        self.edge_profiles = edge_profiles
+        self.backend = backend
+        self.heuristic = heuristic
+        # Routes déjà construites (optimize_route), invalidées arête par arête
+        self.route_cache = route_cache
+        # Incrémentée à chaque modification du graphe (invalide le graphe compilé), voir graph_version
+        self._graph_version = 0
+        # Version partagée (graph.graph['version']) et taille du graphe networkx à la dernière synchronisation
+        self._shared_version = graph_version(graph)
+        self._n_nodes = graph.number_of_nodes()
+        self._compiled: Optional[CSRGraph] = None
+        # Vecteurs de coût par (poids, version du graphe), du plus ancien au plus récent
+        self._cost_cache: "OrderedDict[Tuple, Tuple[np.ndarray, List[float]]]" = OrderedDict()
+        self.cost_cache_stats: Dict[str, int] = {'hits': 0, 'misses': 0}
+        # Tables nœud -> heuristique par (destination, poids, version du graphe)
+        self._heuristic_cache: "OrderedDict[Tuple, List[Optional[float]]]" = OrderedDict()
+        self.heuristic_cache_stats: Dict[str, int] = {'hits': 0, 'misses': 0}
+        # Repères ALT et hiérarchies de contraction par jeu de poids (cost_params_key)
+        self.landmark_indexes: Dict[Tuple, LandmarkIndex] = {}
+        self.contraction_hierarchies: Dict[Tuple, ContractionHierarchy] = {}
+        # Coût minimal par mille orthodromique par (poids, version du graphe)
+        self._geodesic_rates: Dict[Tuple, float] = {}
+        # Compteurs de la dernière recherche (itérations, nœuds développés, arêtes relâchées)
+        self.last_search_stats: Dict[str, int] = {}
+    
+    @property
+    def graph_version(self) -> int:
+        """
+        Version du graphe: graphe compilé, vecteurs de coût, heuristiques, index et cache de routes
+        n'en servent que la valeur courante. Incrémentée par mark_graph_changed / set_edge_blocked /
+        update_edge, et dès que le graphe networkx a été modifié en place (version partagée
+        incrémentée par GeospatialGraphBuilder, voir graph_version.bump_graph_version) ou a changé
+        de nombre de nœuds (number_of_edges est en O(n))
+        """
+        self._sync_graph_version()
+        return self._graph_version
+    
+    def _sync_graph_version(self):
+        """Nouvelle version (cache de routes vidé) si le graphe networkx a changé hors de l'optimiseur"""
+        shared, n_nodes = graph_version(self.graph), self.graph.number_of_nodes()
+        if shared != self._shared_version or n_nodes != self._n_nodes:
+            self._shared_version, self._n_nodes = shared, n_nodes
+            self.mark_graph_changed()
+    
+    @property
+    def compiled_graph(self) -> CSRGraph:
+        """Graphe CSR, recompilé si le graphe a changé depuis la dernière compilation"""
+        version = self.graph_version
+        if self._compiled is None or self._compiled.version != version:
+            self._compiled = CSRGraph.from_networkx(self.graph, self.waypoints, version)
+        return self._compiled
+    
+    def mark_graph_changed(self):
+        """
+        À appeler après toute modification des arêtes du graphe networkx faite hors de
+        GeospatialGraphBuilder (ou bump_graph_version); vide le cache de routes
+        """
+        self._graph_version += 1
+        if self.route_cache is not None:
+            self.route_cache.clear()
+    
+    def set_edge_blocked(self, from_node_id: str, to_node_id: str, blocked: bool = True):
+        """Bloque (ou débloque) une arête: elle n'est plus empruntée par la recherche"""
+        self.graph[from_node_id][to_node_id]['blocked'] = blocked
+        self._edge_changed(from_node_id, to_node_id, may_shorten=not blocked)
+    
+    def update_edge(self, from_node_id: str, to_node_id: str, **attributes):
+        """Modifie les attributs d'une arête (time_hours, fuel_tons, weather_risk, piracy_risk...)"""
+        data = self.graph[from_node_id][to_node_id]
+        may_shorten = any(isinstance(value, (int, float)) and value < data.get(name, 0)
+                          for name, value in attributes.items())
+        data.update(attributes)
+        self._edge_changed(from_node_id, to_node_id, may_shorten)
+    
+    def _edge_changed(self, from_node_id: str, to_node_id: str, may_shorten: bool):
+        """
+        Nouvelle version du graphe après modification d'une arête
+        Arête renchérie ou bloquée: seules les routes en cache qui l'empruntent sont invalidées.
+        Arête moins chère: toute route peut être améliorée, le cache est vidé
+        """
+        self._sync_graph_version()
+        if self.route_cache is None or may_shorten:
+            self.mark_graph_changed()
+            return
+        # Les clés du cache ne portent pas la version: les autres routes restent servies
+        self.route_cache.invalidate_edge(from_node_id, to_node_id)
+        self._graph_version += 1
+    
+    def edge_cost_vector(self, params: OptimizationParams) -> np.ndarray:
+        """
+        Coût pondéré de toutes les arêtes du graphe compilé (inf si bloquée), en une passe
+        Même formule que compute_edge_cost hors profils temporels; mémoïsé par
+        (poids, prix du carburant) et version du graphe
+        """
+        return self._edge_costs(params)[0]
+    
+    def edge_cost_list(self, params: OptimizationParams) -> List[float]:
+        """edge_cost_vector en liste Python (accès par arête dans la boucle de recherche)"""
+        return self._edge_costs(params)[1]
+    
+    def _edge_costs(self, params: OptimizationParams) -> Tuple[np.ndarray, List[float]]:
+        csr = self.compiled_graph
+        key = (cost_params_key(params), csr.version)
+        cached = self._cost_cache.get(key)
+        if cached is not None:
+            self._cost_cache.move_to_end(key)
+            self.cost_cache_stats['hits'] += 1
+            return cached
         
+        self.cost_cache_stats['misses'] += 1
+        attributes = csr.attributes
+        risk = (attributes['weather_risk'] + attributes['piracy_risk']) / 2.0
+        costs = (
+            params.weight_time * (attributes['time_hours'] + risk * 2.0) +
+            params.weight_cost * (attributes['fuel_tons'] * params.fuel_price_per_ton) +
+            params.weight_risk * risk
+        )
+        costs[csr.blocked] = np.inf
+        
+        # Les vecteurs d'une version périmée du graphe ne resserviront pas
+        for stale in [k for k in self._cost_cache if k[1] != csr.version]:
+            del self._cost_cache[stale]
+        self._cost_cache[key] = (costs, costs.tolist())
+        if len(self._cost_cache) > COST_CACHE_SIZE:
+            self._cost_cache.popitem(last=False)
+        return self._cost_cache[key]
+    
+    def build_landmarks(self, presets: Optional[Dict[str, OptimizationParams]] = None,
+                        n_landmarks: int = DEFAULT_LANDMARKS,
+                        directory: Optional[str] = None,
+                        build_missing: bool = True) -> Dict[str, LandmarkIndex]:
+        """
+        Calcule (ou recharge depuis directory/landmarks_<préréglage>) les repères ALT
+        de chaque jeu de poids; par défaut les préréglages standards
+        build_missing=False: rechargement seul, préréglages sans index à jour omis
+        """
+        n_landmarks = min(n_landmarks, self.compiled_graph.n_nodes)
+        return self._load_or_build_indexes(
+            'landmarks', LandmarkIndex, self.landmark_indexes, presets, directory,
+            lambda csr, costs: LandmarkIndex.build(csr, costs, n_landmarks),
+            lambda index: index.n_landmarks >= n_landmarks, build_missing,
+        )
+    
+    def build_contraction_hierarchies(self, presets: Optional[Dict[str, OptimizationParams]] = None,
+                                      directory: Optional[str] = None,
+                                      build_missing: bool = True) -> Dict[str, ContractionHierarchy]:
+        """
+        Calcule (ou recharge depuis directory/ch_<préréglage>) la hiérarchie de contraction
+        de chaque jeu de poids; par défaut les préréglages standards
+        build_missing=False: rechargement seul, préréglages sans index à jour omis
+        """
+        return self._load_or_build_indexes('ch', ContractionHierarchy, self.contraction_hierarchies,
+                                           presets, directory, ContractionHierarchy.build,
+                                           build_missing=build_missing)
+    
+    def _load_or_build_indexes(self, prefix: str, index_class, registry: Dict[Tuple, object],
+                               presets: Optional[Dict[str, OptimizationParams]], directory: Optional[str],
+                               build: Callable, usable: Optional[Callable] = None,
+                               build_missing: bool = True) -> Dict[str, object]:
+        """Index persisté réutilisé si son empreinte correspond au graphe et aux coûts, sinon reconstruit"""
+        csr = self.compiled_graph
+        indexes = {}
+        for name, params in (presets or STANDARD_PRESETS).items():
+            costs = self.edge_cost_vector(params)
+            path = os.path.join(directory, f"{prefix}_{name}") if directory else None
+            index = index_class.load(path, graph_fingerprint(csr, costs), csr.version) if path else None
+            if index is None or (usable is not None and not usable(index)):
+                if not build_missing:
+                    continue
+                index = build(csr, costs)
+                if path:
+                    index.save(path)
+            registry[cost_params_key(params)] = index
+            indexes[name] = index
+        return indexes
+    
+    def landmark_index(self, params: OptimizationParams) -> Optional[LandmarkIndex]:
+        """Repères ALT du jeu de poids, s'ils sont à jour pour le graphe courant"""
+        index = self.landmark_indexes.get(cost_params_key(params))
+        if index is None or index.version != self.compiled_graph.version:
+            return None
+        return index
+    
+    def contraction_hierarchy(self, params: OptimizationParams) -> Optional[ContractionHierarchy]:
+        """Hiérarchie de contraction du jeu de poids, si elle est à jour pour le graphe courant"""
+        index = self.contraction_hierarchies.get(cost_params_key(params))
+        if index is None or index.version != self.compiled_graph.version:
+            return None
+        return index
+    
+    def geodesic_rate(self, params: OptimizationParams) -> float:
+        """Coût minimal par NM orthodromique du jeu de poids (borne géodésique admissible)"""
+        index = self.landmark_index(params)
+        if index is not None:
+            return index.geodesic_rate
+        csr = self.compiled_graph
+        key = (cost_params_key(params), csr.version)
+        if key not in self._geodesic_rates:
+            self._geodesic_rates = {k: v for k, v in self._geodesic_rates.items() if k[1] == csr.version}
+            self._geodesic_rates[key] = geodesic_rate(csr, self.edge_cost_vector(params))
+        return self._geodesic_rates[key]
+    
+    def heuristic_table(self, goal: int, params: OptimizationParams,
+                        heuristic: str = 'geodesic',
+                        active: Optional[Tuple[int, ...]] = None) -> List[Optional[float]]:
+        """
+        Table nœud (indice CSR) -> heuristique vers goal, remplie à la demande par la recherche
+        Les entrées déjà calculées resservent aux requêtes suivantes vers la même destination
+        active: repères ALT retenus (la borne en dépend)
+        """
+        csr = self.compiled_graph
+        key = (goal, heuristic, active, cost_params_key(params), csr.version)
+        table = self._heuristic_cache.get(key)
+        if table is not None:
+            self._heuristic_cache.move_to_end(key)
+            self.heuristic_cache_stats['hits'] += 1
+            return table
+        
+        self.heuristic_cache_stats['misses'] += 1
+        for stale in [k for k in self._heuristic_cache if k[-1] != csr.version]:
+            del self._heuristic_cache[stale]
+        table = self._heuristic_cache[key] = [None] * csr.n_nodes
+        if len(self._heuristic_cache) > HEURISTIC_CACHE_SIZE:
+            self._heuristic_cache.popitem(last=False)
+        return table
+    
     @staticmethod
     def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Distance en nautical miles"""
-        from math import radians, cos, sin, asin, sqrt
-        lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-        dlon = lon2 - lon1
-        dlat = lat2 - lat1
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * asin(sqrt(a))
-        return c * 3440.065
+        return haversine_distance(lat1, lon1, lat2, lon2)
     
     def heuristic_cost(self, from_node_id: str, to_node_id: str, 
                       params: OptimizationParams) -> float:
@@ -95,9 +364,13 @@ class WeightedAStarOptimizer:
         
         if not edge_data:
             return float('inf'), None
+        if edge_data.get('blocked', False):
+            return float('inf'), edge_data
         
         # Coûts de base
         time_hours = edge_data.get('time_hours', 0)
+        if self.edge_profiles is not None and 'edge_key' in edge_data:
+            time_hours *= self.edge_profiles.time_factor(edge_data['edge_key'], current_time)
         fuel_tons = edge_data.get('fuel_tons', 0)
         distance_nm = edge_data.get('weight', 0)
         
@@ -123,13 +396,310 @@ class WeightedAStarOptimizer:
     
     def find_optimal_route(self, start_node_id: str, end_node_id: str,
                           params: OptimizationParams,
-                          max_iterations: int = 10000) -> Optional[List[str]]:
+                          max_iterations: int = 10000,
+                          backend: Optional[str] = None,
+                          heuristic: Optional[str] = None,
+                          bidirectional: bool = False,
+                          hierarchy: bool = True) -> Optional[List[str]]:
         """
         Trouve la route optimale en utilisant A* pondéré
         Retourne la liste des node_ids
+        backend, heuristic: remplacent ponctuellement ceux de l'optimiseur
+        bidirectional: recherche avant + arrière (coût minimal, voir _find_route_bidirectional);
+        heuristic est alors ignorée
+        hierarchy: utilise la hiérarchie de contraction du jeu de poids si elle est à jour
+        (poids d'un préréglage, graphe inchangé depuis la construction), sinon A*
         """
         logger.info(f"Recherche route optimale: {start_node_id} -> {end_node_id}")
         
+        if hierarchy and (backend or self.backend) == 'csr' and self.edge_profiles is None:
+            index = self.contraction_hierarchy(params)
+            if index is not None:
+                return self._find_route_hierarchy(index, start_node_id, end_node_id)
+        if bidirectional:
+            if (backend or self.backend) == 'csr' and self.edge_profiles is None:
+                return self._find_route_bidirectional(start_node_id, end_node_id, params, max_iterations)
+            # La recherche arrière ne connaît pas l'heure de passage (profils temporels)
+            logger.info("Recherche bidirectionnelle indisponible: recherche avant")
+        if (backend or self.backend) == 'csr':
+            return self._find_route_csr(start_node_id, end_node_id, params, max_iterations,
+                                        heuristic or self.heuristic)
+        return self._find_route_networkx(start_node_id, end_node_id, params, max_iterations)
+    
+    def _find_route_csr(self, start_node_id: str, end_node_id: str,
+                        params: OptimizationParams, max_iterations: int,
+                        heuristic_mode: str = 'geodesic') -> Optional[List[str]]:
+        """
+        A* sur le graphe compilé: mêmes coûts, même heuristique et même ordre
+        d'exploration que le parcours networkx, sur des listes indexées par entier
+        Le coût d'une arête est lu dans le vecteur précompilé (edge_cost_vector), l'heuristique
+        dans la table de la destination (heuristic_table)
+        heuristic_mode 'landmarks': max(borne ALT, borne géodésique admissible), chemin de coût
+        minimal; repli sur l'heuristique géodésique sans repères à jour ou avec profils temporels
+        """
+        csr = self.compiled_graph
+        start = csr.index.get(start_node_id)
+        goal = csr.index.get(end_node_id)
+        if start is None or goal is None:
+            logger.warning(f"Nœud inconnu du graphe: {start_node_id if start is None else end_node_id}")
+            return None
+        
+        current_time = datetime.now()
+        offsets, targets = csr.offsets_list, csr.targets_list
+        costs = self.edge_cost_list(params)
+        profiles = self.edge_profiles
+        if profiles is not None:
+            edge_keys = csr.as_list('edge_keys')
+            time_hours, fuel_tons = csr.as_list('time_hours'), csr.as_list('fuel_tons')
+            weather_risk, piracy_risk = csr.as_list('weather_risk'), csr.as_list('piracy_risk')
+        w_time, w_cost, w_risk = params.weight_time, params.weight_cost, params.weight_risk
+        fuel_price = params.fuel_price_per_ton
+        inf = float('inf')
+        
+        landmarks = self.landmark_index(params) if heuristic_mode == 'landmarks' else None
+        if heuristic_mode == 'landmarks' and (landmarks is None or profiles is not None):
+            logger.info("Repères ALT indisponibles pour cette requête: heuristique géodésique")
+            heuristic_mode, landmarks = 'geodesic', None
+        
+        # Haversine vers la destination: radians et cosinus précalculés, formule de geodesy
+        active = landmarks.active_landmarks(start, goal) if landmarks is not None else None
+        table = self.heuristic_table(goal, params, heuristic_mode, active)
+        lat_rad, lon_rad, cos_lat = csr.trig_lists()
+        goal_lat, goal_lon, goal_cos = lat_rad[goal], lon_rad[goal], cos_lat[goal]
+        sin, asin, sqrt = math.sin, math.asin, math.sqrt
+        radius = EARTH_RADIUS['nm']
+        
+        def heuristic(node: int) -> float:
+            a = (sin((goal_lat - lat_rad[node]) / 2) ** 2 +
+                 cos_lat[node] * goal_cos * sin((goal_lon - lon_rad[node]) / 2) ** 2)
+            distance_nm = 2 * asin(sqrt(min(a, 1.0))) * radius
+            h = table[node] = w_time * (distance_nm / 15) + w_cost * (distance_nm * 20) + w_risk * 2.0
+            return h
+        
+        if landmarks is not None:
+            rate, lower_bound = landmarks.geodesic_rate, landmarks.lower_bound(goal, active)
+            
+            def heuristic(node: int) -> float:
+                a = (sin((goal_lat - lat_rad[node]) / 2) ** 2 +
+                     cos_lat[node] * goal_cos * sin((goal_lon - lon_rad[node]) / 2) ** 2)
+                bound = lower_bound(node)
+                geodesic = rate * 2 * asin(sqrt(min(a, 1.0))) * radius
+                h = table[node] = bound if bound > geodesic else geodesic
+                return h
+        
+        g_costs = {start: 0.0}
+        came_from: Dict[int, int] = {}
+        closed = set()
+        # (f, ordre d'insertion, nœud, heures écoulées depuis le départ)
+        open_set = [(heuristic(start), 0, start, 0.0)]
+        counter = 1
+        iterations = relaxed = 0
+        
+        while open_set and iterations < max_iterations:
+            iterations += 1
+            
+            _, _, node, elapsed = heapq.heappop(open_set)
+            if node in closed:
+                continue
+            closed.add(node)
+            
+            if node == goal:
+                self.last_search_stats = {'iterations': iterations, 'expanded': len(closed), 'relaxed': relaxed}
+                path = [goal]
+                while path[-1] in came_from:
+                    path.append(came_from[path[-1]])
+                path.reverse()
+                logger.info(f"Route trouvée en {iterations} itérations: {len(path)} waypoints")
+                return [csr.node_ids[i] for i in path]
+            
+            g_node = g_costs[node]
+            relaxed += offsets[node + 1] - offsets[node]
+            for edge in range(offsets[node], offsets[node + 1]):
+                neighbor = targets[edge]
+                edge_cost = costs[edge]
+                if neighbor in closed or edge_cost == inf:
+                    continue
+                
+                if profiles is not None and edge_keys[edge] >= 0:
+                    # Arête profilée: temps modulé à l'heure de passage, coût recalculé
+                    edge_time = time_hours[edge] * profiles.time_factor(
+                        edge_keys[edge], current_time + timedelta(hours=elapsed)
+                    )
+                    edge_risk = (weather_risk[edge] + piracy_risk[edge]) / 2.0
+                    edge_cost = (
+                        w_time * (edge_time + edge_risk * 2.0) +
+                        w_cost * (fuel_tons[edge] * fuel_price) +
+                        w_risk * edge_risk
+                    )
+                
+                tentative_g = g_node + edge_cost
+                if tentative_g < g_costs.get(neighbor, inf):
+                    came_from[neighbor] = node
+                    g_costs[neighbor] = tentative_g
+                    h = table[neighbor]
+                    if h is None:
+                        h = heuristic(neighbor)
+                    heapq.heappush(open_set, (tentative_g + h, counter, neighbor, elapsed + edge_cost / 10))
+                    counter += 1
+        
+        self.last_search_stats = {'iterations': iterations, 'expanded': len(closed), 'relaxed': relaxed}
+        logger.warning(f"Pas de route trouvée après {iterations} itérations")
+        return None
+    
+    def _find_route_hierarchy(self, index: ContractionHierarchy,
+                              start_node_id: str, end_node_id: str) -> Optional[List[str]]:
+        """Requête CH: recherche bidirectionnelle montante, chemin déplié en waypoints d'origine"""
+        csr = self.compiled_graph
+        start = csr.index.get(start_node_id)
+        goal = csr.index.get(end_node_id)
+        if start is None or goal is None:
+            logger.warning(f"Nœud inconnu du graphe: {start_node_id if start is None else end_node_id}")
+            return None
+        
+        _, path, stats = index.query(start, goal)
+        self.last_search_stats = {'iterations': stats['settled'], 'expanded': stats['settled'],
+                                  'relaxed': stats['relaxed']}
+        if path is None:
+            logger.warning(f"Pas de route trouvée (hiérarchie de contraction): {start_node_id} -> {end_node_id}")
+            return None
+        logger.info(f"Route trouvée (hiérarchie de contraction): {len(path)} waypoints, {stats['settled']} nœuds fixés")
+        return [csr.node_ids[i] for i in path]
+    
+    def _lower_bounds(self, start: int, goal: int,
+                      params: OptimizationParams) -> Tuple[Callable[[int], float], Callable[[int], float]]:
+        """
+        Bornes inférieures admissibles et cohérentes de d(v, goal) et d(start, v):
+        borne géodésique (geodesic_rate) et, si disponibles, repères ALT
+        """
+        csr = self.compiled_graph
+        index = self.landmark_index(params)
+        rate = self.geodesic_rate(params)
+        lat_rad, lon_rad, cos_lat = csr.trig_lists()
+        sin, asin, sqrt = math.sin, math.asin, math.sqrt
+        scale = 2 * EARTH_RADIUS['nm'] * rate
+        
+        def geodesic(anchor: int) -> Callable[[int], float]:
+            anchor_lat, anchor_lon, anchor_cos = lat_rad[anchor], lon_rad[anchor], cos_lat[anchor]
+            
+            def bound(node: int) -> float:
+                a = (sin((anchor_lat - lat_rad[node]) / 2) ** 2 +
+                     cos_lat[node] * anchor_cos * sin((anchor_lon - lon_rad[node]) / 2) ** 2)
+                return scale * asin(sqrt(min(a, 1.0)))
+            
+            return bound
+        
+        if index is None:
+            if rate == 0:
+                # Aucune borne (coût nul possible par mille): recherche de Dijkstra
+                return (lambda node: 0.0), (lambda node: 0.0)
+            return geodesic(goal), geodesic(start)
+        
+        active = index.active_landmarks(start, goal)
+        pairs = [(geodesic(goal), index.lower_bound(goal, active)),
+                 (geodesic(start), index.lower_bound_from(start, active))]
+        
+        def combine(geodesic_bound: Callable[[int], float],
+                    landmark_bound: Callable[[int], float]) -> Callable[[int], float]:
+            def bound(node: int) -> float:
+                g, l = geodesic_bound(node), landmark_bound(node)
+                return g if g > l else l
+            return bound
+        
+        return combine(*pairs[0]), combine(*pairs[1])
+    
+    def _find_route_bidirectional(self, start_node_id: str, end_node_id: str,
+                                  params: OptimizationParams, max_iterations: int) -> Optional[List[str]]:
+        """
+        A* bidirectionnel sur le graphe compilé (successeurs en avant, prédécesseurs en arrière)
+        Potentiels moyens p(v) = (d⁻(v, goal) - d⁻(start, v)) / 2 et -p(v): les deux recherches
+        voient les mêmes coûts réduits positifs. Arrêt quand min clé avant + min clé arrière
+        >= meilleur coût de jonction: le chemin retourné est de coût minimal
+        Même coût que la recherche avant avec heuristic='landmarks' (ou Dijkstra) seulement:
+        l'heuristique géodésique n'est pas admissible et la recherche avant peut rendre plus cher
+        """
+        csr = self.compiled_graph
+        start = csr.index.get(start_node_id)
+        goal = csr.index.get(end_node_id)
+        if start is None or goal is None:
+            logger.warning(f"Nœud inconnu du graphe: {start_node_id if start is None else end_node_id}")
+            return None
+        
+        costs = self.edge_cost_list(params)
+        offsets, targets = csr.offsets_list, csr.targets_list
+        in_offsets, in_sources, in_edges = csr.in_offsets_list, csr.in_sources_list, csr.in_edges_list
+        to_goal, from_start = self._lower_bounds(start, goal, params)
+        inf = float('inf')
+        
+        potentials: Dict[int, float] = {}
+        
+        def potential(node: int) -> float:
+            p = potentials.get(node)
+            if p is None:
+                p = potentials[node] = (to_goal(node) - from_start(node)) / 2
+            return p
+        
+        # Indice 0: recherche avant depuis start, 1: recherche arrière depuis goal
+        g_costs = ({start: 0.0}, {goal: 0.0})
+        parents: Tuple[Dict[int, int], Dict[int, int]] = ({}, {})
+        closed = (set(), set())
+        open_sets = ([(potential(start), 0, start)], [(-potential(goal), 1, goal)])
+        counter = 2
+        best_cost, meeting = (0.0, start) if start == goal else (inf, None)
+        iterations = relaxed = 0
+        
+        while open_sets[0] and open_sets[1] and iterations < max_iterations:
+            if open_sets[0][0][0] + open_sets[1][0][0] >= best_cost:
+                break
+            iterations += 1
+            
+            side = 0 if open_sets[0][0][0] <= open_sets[1][0][0] else 1
+            _, _, node = heapq.heappop(open_sets[side])
+            if node in closed[side]:
+                continue
+            closed[side].add(node)
+            
+            g_side, g_other, parent, done = g_costs[side], g_costs[1 - side], parents[side], closed[side]
+            g_node = g_side[node]
+            if side == 0:
+                first, last = offsets[node], offsets[node + 1]
+                edges = zip(targets[first:last], costs[first:last])
+            else:
+                first, last = in_offsets[node], in_offsets[node + 1]
+                edges = zip(in_sources[first:last], map(costs.__getitem__, in_edges[first:last]))
+            relaxed += last - first
+            
+            for neighbor, edge_cost in edges:
+                if neighbor in done or edge_cost == inf:
+                    continue
+                tentative_g = g_node + edge_cost
+                if tentative_g < g_side.get(neighbor, inf):
+                    g_side[neighbor] = tentative_g
+                    parent[neighbor] = node
+                    p = potential(neighbor)
+                    heapq.heappush(open_sets[side], (tentative_g + (p if side == 0 else -p), counter, neighbor))
+                    counter += 1
+                    if neighbor in g_other and tentative_g + g_other[neighbor] < best_cost:
+                        best_cost, meeting = tentative_g + g_other[neighbor], neighbor
+        
+        self.last_search_stats = {'iterations': iterations, 'expanded': len(closed[0]) + len(closed[1]),
+                                  'relaxed': relaxed}
+        if meeting is None:
+            logger.warning(f"Pas de route trouvée après {iterations} itérations")
+            return None
+        
+        path = [meeting]
+        while path[-1] in parents[0]:
+            path.append(parents[0][path[-1]])
+        path.reverse()
+        while path[-1] in parents[1]:
+            path.append(parents[1][path[-1]])
+        logger.info(f"Route trouvée (bidirectionnelle) en {iterations} itérations: {len(path)} waypoints")
+        return [csr.node_ids[i] for i in path]
+    
+    def _find_route_networkx(self, start_node_id: str, end_node_id: str,
+                             params: OptimizationParams, max_iterations: int) -> Optional[List[str]]:
+        """Parcours historique: dict-of-dict networkx et compute_edge_cost par arête"""
+        
         current_time = datetime.now()
         
         # Initialisation
@@ -142,7 +712,7 @@ class WeightedAStarOptimizer:
         start_node = PathNode(start_node_id, 0, start_h, current_time)
         heapq.heappush(open_set, (start_node.f_cost, id(start_node), start_node))
         
-        iterations = 0
+        iterations = relaxed = 0
         
         while open_set and iterations < max_iterations:
             iterations += 1
@@ -163,11 +733,13 @@ class WeightedAStarOptimizer:
                     node = came_from[node]
                 path.insert(0, start_node_id)
                 
+                self.last_search_stats = {'iterations': iterations, 'expanded': len(closed_set), 'relaxed': relaxed}
                 logger.info(f"Route trouvée en {iterations} itérations: {len(path)} waypoints")
                 return path
             
             # Exploration des voisins
             for neighbor in self.graph.successors(current.node_id):
+                relaxed += 1
                 if neighbor in closed_set:
                     continue
                 
@@ -196,9 +768,86 @@ class WeightedAStarOptimizer:
                         (neighbor_node.f_cost, id(neighbor_node), neighbor_node)
                     )
         
+        self.last_search_stats = {'iterations': iterations, 'expanded': len(closed_set), 'relaxed': relaxed}
         logger.warning(f"Pas de route trouvée après {iterations} itérations")
         return None
     
+    def optimize_route(self, start_node_id: str, end_node_id: str, params: OptimizationParams,
+                       **search_options) -> Optional[OptimizedRoute]:
+        """
+        find_optimal_route + construct_optimized_route, servis par le cache de routes s'il est configuré
+        search_options: arguments de find_optimal_route (backend, heuristic, bidirectional...)
+        Le cache conserve sa propre copie: l'appelant peut modifier la route retournée
+        """
+        key = None
+        if self.route_cache is not None:
+            self._sync_graph_version()
+            key = RouteCache.key(start_node_id, end_node_id, cost_params_key(params), search_options)
+            cached = self.route_cache.get(key)
+            if cached is not None:
+                return self._copy_route(cached.route)
+        
+        path = self.find_optimal_route(start_node_id, end_node_id, params, **search_options)
+        # Absence de route mise en cache aussi: bloquer une arête ne peut pas en créer une
+        route = self.construct_optimized_route(path, params) if path else None
+        if key is not None:
+            self.route_cache.put(key, path or [], self._copy_route(route))
+        return route
+    
+    @staticmethod
+    def _copy_route(route: Optional[OptimizedRoute]) -> Optional[OptimizedRoute]:
+        """
+        Copie indépendante d'une route: listes, segments et attributs d'arête copiés, WayPoint
+        partagés (comme pour toute route construite). Copie des __dict__ des dataclasses,
+        une vingtaine de fois plus rapide que copy.deepcopy
+        """
+        if route is None:
+            return None
+        copied = _shallow_copy(route)
+        copied.waypoints = list(route.waypoints)
+        copied.segments = []
+        for segment in route.segments:
+            segment = _shallow_copy(segment)
+            segment.attributes = _shallow_copy(segment.attributes)
+            copied.segments.append(segment)
+        copied.optimization_metrics = dict(route.optimization_metrics)
+        return copied
+    
+    def pareto_routes(self, start_node_id: str, end_node_id: str, params: OptimizationParams,
+                      epsilon: float = DEFAULT_EPSILON,
+                      max_labels: int = DEFAULT_MAX_LABELS) -> List[Tuple[List[str], Tuple[float, float, float]]]:
+        """
+        Routes ε-non dominées sur (temps, coût carburant, risque), en une seule recherche à étiquettes
+        Triées par coût pondéré selon params: la première est la route de find_optimal_route
+        (à ε près); epsilon borne la taille du front
+        """
+        if start_node_id not in self.graph or end_node_id not in self.graph:
+            return []
+        csr = self.compiled_graph
+        # Coût d'une arête = wt * temps + wc * carburant + (2 wt + wr) * risque (voir compute_edge_cost)
+        weights = (params.weight_time, params.weight_cost, 2.0 * params.weight_time + params.weight_risk)
+        front = pareto_front(csr, edge_objectives(csr, params.fuel_price_per_ton),
+                             csr.index[start_node_id], csr.index[end_node_id], weights, epsilon, max_labels)
+        node_ids = csr.node_ids
+        return [([node_ids[i] for i in path], costs) for path, costs in front]
+    
+    def k_shortest_routes(self, start_node_id: str, end_node_id: str, params: OptimizationParams,
+                          k: int = 3, max_similarity: float = DEFAULT_MAX_SIMILARITY) -> List[Tuple[List[str], float]]:
+        """
+        k routes sans boucle de coût pondéré croissant (Yen), chacune partageant au plus
+        max_similarity de son coût avec les précédentes; coûts de edge_cost_vector (sans profils
+        temporels). Un seul arbre de plus courts chemins vers l'arrivée sert à toutes les déviations
+        """
+        if start_node_id not in self.graph or end_node_id not in self.graph:
+            return []
+        csr = self.compiled_graph
+        costs, cost_list = self._edge_costs(params)
+        paths, stats = k_shortest_paths(csr, costs, cost_list, csr.index[start_node_id],
+                                        csr.index[end_node_id], k, max_similarity)
+        self.last_search_stats = stats
+        node_ids = csr.node_ids
+        return [([node_ids[i] for i in path], cost) for path, cost in paths]
+    
     def construct_optimized_route(self, path: List[str], 
                                   params: OptimizationParams) -> OptimizedRoute:
         """Construit un objet OptimizedRoute à partir d'un chemin"""
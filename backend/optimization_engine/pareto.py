@@ -0,0 +1,158 @@
+"""
+Front de Pareto multi-objectif (temps, coût carburant, risque) en une seule recherche
+Recherche à étiquettes (label-setting): chaque étiquette porte le vecteur de coûts d'un chemin
+partiel; élagage par ε-dominance contre les étiquettes fixées du nœud et contre le front déjà
+atteint à l'arrivée (complété par des bornes inférieures par objectif vers l'arrivée)
+"""
+import heapq
+import logging
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from optimization_engine.csr_graph import CSRGraph
+
+logger = logging.getLogger(__name__)
+
+OBJECTIVES = ('time_hours', 'fuel_cost_usd', 'risk')
+DEFAULT_EPSILON = 0.05
+# Étiquettes traitées au plus par recherche (garde-fou sur les grands graphes)
+DEFAULT_MAX_LABELS = 200_000
+
+Costs = Tuple[float, float, float]
+
+
+def edge_objectives(csr: CSRGraph, fuel_price_per_ton: float) -> np.ndarray:
+    """Objectifs par arête (n_edges, 3), mêmes composantes que compute_edge_cost; inf si bloquée"""
+    attributes = csr.attributes
+    objectives = np.column_stack([
+        attributes['time_hours'],
+        attributes['fuel_tons'] * fuel_price_per_ton,
+        (attributes['weather_risk'] + attributes['piracy_risk']) / 2.0,
+    ])
+    objectives[csr.blocked] = np.inf
+    return objectives
+
+
+def _dominated(costs: Sequence[float], front: List[Costs], scale: float) -> bool:
+    """Vrai si une étiquette du front vaut au plus scale (= 1 + ε) fois costs sur chaque objectif"""
+    time_hours, fuel_cost, risk = costs[0] * scale, costs[1] * scale, costs[2] * scale
+    for other_time, other_fuel, other_risk in front:
+        if other_time <= time_hours and other_fuel <= fuel_cost and other_risk <= risk:
+            return True
+    return False
+
+
+def pareto_front(csr: CSRGraph, objectives: np.ndarray, start: int, goal: int, weights: Costs,
+                 epsilon: float = DEFAULT_EPSILON,
+                 max_labels: int = DEFAULT_MAX_LABELS) -> List[Tuple[List[int], Costs]]:
+    """
+    Chemins ε-non dominés de start à goal, triés par coût pondéré (weights . objectifs)
+    Étiquettes traitées par coût pondéré croissant (coût + borne inférieure): une étiquette
+    dominante sort toujours avant celles qu'elle domine
+    """
+    n = csr.n_nodes
+    usable = np.isfinite(objectives[:, 0])
+    sources, targets = csr.sources[usable], csr.targets[usable]
+    
+    # Bornes inférieures vers goal: un Dijkstra arrière par objectif
+    bounds = np.empty((n, 3))
+    for j in range(3):
+        reverse = csr_matrix((objectives[usable, j], (targets, sources)), shape=(n, n))
+        bounds[:, j] = dijkstra(reverse, indices=goal)
+    lower = bounds.tolist()
+    if not np.isfinite(bounds[start, 0]):
+        return []
+    
+    offsets, edge_targets = csr.offsets_list, csr.targets_list
+    edge_costs = objectives.tolist()
+    w_time, w_fuel, w_risk = weights
+    scale = 1.0 + epsilon
+    
+    # Étiquettes: coûts, nœud, étiquette parente, tailles du front du nœud et du front d'arrivée
+    # déjà comparées à l'empilement (les fronts ne font que croître: seule la suite reste à comparer)
+    label_costs: List[Costs] = [(0.0, 0.0, 0.0)]
+    label_nodes = [start]
+    label_parents = [-1]
+    label_seen = [(0, 0)]
+    settled: List[List[Costs]] = [[] for _ in range(n)]
+    goal_labels: List[int] = []
+    goal_front: List[Costs] = []
+    
+    def key(costs: Costs, node: int) -> float:
+        bound = lower[node]
+        return (w_time * (costs[0] + bound[0]) + w_fuel * (costs[1] + bound[1]) +
+                w_risk * (costs[2] + bound[2]))
+    
+    def optimistic(costs: Costs, node: int) -> Costs:
+        bound = lower[node]
+        return (costs[0] + bound[0], costs[1] + bound[1], costs[2] + bound[2])
+    
+    heap = [(key(label_costs[0], start), 0)]
+    processed = 0
+    while heap and processed < max_labels:
+        _, label = heapq.heappop(heap)
+        costs, node = label_costs[label], label_nodes[label]
+        front = settled[node]
+        seen_front, seen_goal = label_seen[label]
+        if len(front) > seen_front and _dominated(costs, front[seen_front:], scale):
+            continue
+        if len(goal_front) > seen_goal and _dominated(optimistic(costs, node), goal_front[seen_goal:], scale):
+            continue
+        front.append(costs)
+        processed += 1
+        if node == goal:
+            goal_labels.append(label)
+            goal_front.append(costs)
+            continue
+        
+        for edge in range(offsets[node], offsets[node + 1]):
+            edge_cost = edge_costs[edge]
+            if edge_cost[0] == float('inf'):
+                continue
+            neighbor = edge_targets[edge]
+            new = (costs[0] + edge_cost[0], costs[1] + edge_cost[1], costs[2] + edge_cost[2])
+            if _dominated(new, settled[neighbor], scale) or _dominated(optimistic(new, neighbor), goal_front, scale):
+                continue
+            label_costs.append(new)
+            label_nodes.append(neighbor)
+            label_parents.append(label)
+            label_seen.append((len(settled[neighbor]), len(goal_front)))
+            heapq.heappush(heap, (key(new, neighbor), len(label_costs) - 1))
+    
+    if heap and processed >= max_labels:
+        logger.warning(f"Front de Pareto tronqué après {max_labels} étiquettes")
+    
+    routes = []
+    for label in goal_labels:
+        costs, path = label_costs[label], []
+        while label >= 0:
+            path.append(label_nodes[label])
+            label = label_parents[label]
+        routes.append((path[::-1], costs))
+    routes.sort(key=lambda route: w_time * route[1][0] + w_fuel * route[1][1] + w_risk * route[1][2])
+    return routes
+
+
+# Libellé des routes extrêmes du front, par objectif (même ordre que OBJECTIVES)
+STRATEGIES = ('time', 'cost', 'safety')
+
+
+def select_alternatives(routes: List[Tuple[List[str], Costs]],
+                        n_routes: int) -> List[Tuple[str, List[str], Costs]]:
+    """
+    Au plus n_routes routes du front trié par coût pondéré, avec leur stratégie:
+    'balanced' (meilleur coût pondéré), puis la meilleure sur chaque objectif
+    ('time', 'cost', 'safety'), puis les compromis suivants ('trade-off')
+    """
+    if not routes:
+        return []
+    selected = {0: 'balanced'}
+    for j, strategy in enumerate(STRATEGIES):
+        best = min(range(len(routes)), key=lambda i: (routes[i][1][j], i))
+        selected.setdefault(best, strategy)
+    for i in range(len(routes)):
+        selected.setdefault(i, 'trade-off')
+    return [(strategy, routes[i][0], routes[i][1]) for i, strategy in list(selected.items())[:n_routes]]
@@ -0,0 +1,98 @@
+"""
+Cache LRU des routes calculées
+Clé: (départ, arrivée, paramètres normalisés, options de recherche).
+Index inverse arête -> clés: une arête bloquée ou renchérie n'invalide que les routes qui
+l'empruntent (les autres restent optimales); toute autre modification du graphe vide le cache
+"""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+DEFAULT_MAX_ROUTES = 1024
+DEFAULT_TTL_SECONDS = 900.0
+
+Edge = Tuple[str, str]
+
+
+@dataclass
+class CachedRoute:
+    """Entrée du cache: chemin, route construite et échéance"""
+    path: List[str]
+    route: Any
+    expires_at: float
+    
+    @property
+    def edges(self) -> List[Edge]:
+        return list(zip(self.path[:-1], self.path[1:]))
+
+
+class RouteCache:
+    """Cache LRU borné en taille et en durée de vie (ttl_seconds)"""
+    
+    def __init__(self, max_routes: int = DEFAULT_MAX_ROUTES, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_routes = max_routes
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._routes: "OrderedDict[Tuple, CachedRoute]" = OrderedDict()
+        self._edge_index: Dict[Edge, Set[Tuple]] = {}
+        self.stats: Dict[str, int] = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+    
+    def __len__(self) -> int:
+        return len(self._routes)
+    
+    @staticmethod
+    def key(start: str, end: str, params_key: Tuple, options: Dict[str, Hashable]) -> Tuple:
+        """Clé normalisée (options triées)"""
+        return (start, end, params_key, tuple(sorted(options.items())))
+    
+    def get(self, key: Tuple) -> Optional[CachedRoute]:
+        entry = self._routes.get(key)
+        if entry is not None and entry.expires_at <= self.clock():
+            self._remove(key)
+            self.stats['expirations'] += 1
+            entry = None
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+        self._routes.move_to_end(key)
+        self.stats['hits'] += 1
+        return entry
+    
+    def put(self, key: Tuple, path: List[str], route: Any):
+        if key in self._routes:
+            self._remove(key)
+        entry = CachedRoute(list(path), route, self.clock() + self.ttl_seconds)
+        self._routes[key] = entry
+        for edge in entry.edges:
+            self._edge_index.setdefault(edge, set()).add(key)
+        while len(self._routes) > self.max_routes:
+            self._remove(next(iter(self._routes)))
+            self.stats['evictions'] += 1
+    
+    def invalidate_edge(self, from_node_id: str, to_node_id: str) -> int:
+        """Supprime les routes empruntant l'arête; retourne leur nombre"""
+        keys = self._edge_index.pop((from_node_id, to_node_id), set())
+        for key in keys:
+            self._remove(key)
+        self.stats['invalidations'] += len(keys)
+        return len(keys)
+    
+    def clear(self):
+        self.stats['invalidations'] += len(self._routes)
+        self._routes.clear()
+        self._edge_index.clear()
+    
+    def info(self) -> Dict[str, Any]:
+        return {'routes': len(self._routes), 'max_routes': self.max_routes,
+                'ttl_seconds': self.ttl_seconds, **self.stats}
+    
+    def _remove(self, key: Tuple):
+        entry = self._routes.pop(key)
+        for edge in entry.edges:
+            keys = self._edge_index.get(edge)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._edge_index[edge]
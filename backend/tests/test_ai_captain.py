@@ -1,7 +1,11 @@
 import pytest
 import json
+import random
 import networkx as nx
-from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from datetime import date, datetime, timedelta
+from itertools import islice
 from pathlib import Path
 
 # Import backend components
@@ -12,12 +16,65 @@ from models import (
     VesselSpec, VesselDimensions, WayPoint, EdgeAttributes,
     OptimizationParams, OptimizedRoute, NavigationStatus, RiskLevel,
 )
-from data_engineering.ais_processor import AISDataProcessor, GeospatialGraphBuilder
-from optimization_engine.optimizer import WeightedAStarOptimizer
+from data_engineering.ais_processor import (
+    AISDataProcessor, GeospatialGraphBuilder, compact_ais_frame, frame_bytes_per_million_rows,
+)
+from data_engineering.ais_stream import iter_json_records
+from data_engineering.ais_cache import AISColumnarCache
+from data_engineering import geodesy
+from data_engineering.edge_statistics import aggregate_edge_moments, merge_edge_moments
+from data_engineering.edge_store import EdgeStatisticsStore
+from data_engineering.parallel import shard_by_mmsi
+from data_engineering.graph_snapping import snap_edge_moments, snap_edge_statistics
+from data_engineering.trajectory import simplify_tracks
+from data_engineering.quality import filter_ais_quality
+from data_engineering.edge_profiles import EdgeProfiles, profile_buckets
+from data_engineering.edge_statistics import encode_edge_keys
+from data_engineering.port_calls import detect_port_calls, detect_stops, port_history_from_calls
+from data_engineering.traffic_density import TrafficDensityStore
+from data_engineering.ais_history import AISHistoryStore
+from optimization_engine.optimizer import STANDARD_PRESETS, WeightedAStarOptimizer
+from optimization_engine.csr_graph import CSRGraph
+from optimization_engine.landmarks import LandmarkIndex
+from optimization_engine.contraction import ContractionHierarchy
+from optimization_engine.route_cache import RouteCache
+from optimization_engine.pareto import select_alternatives
+from data_engineering.maritime_graph_builder import create_maritime_network
 from agents.monitoring_agent import DeviationMonitoringAgent
 from agents.forecasting_agent import CongestionForecastingAgent
 
 
+def make_ais_records(n_vessels=5, pings_per_vessel=40, seed=1):
+    """Génère des enregistrements AIS bruts (format JSON source) mélangés"""
+    rng = random.Random(seed)
+    base = datetime(2024, 1, 1)
+    records = []
+    for v in range(n_vessels):
+        t = base
+        for _ in range(pings_per_vessel):
+            t += timedelta(seconds=rng.choice([300, 600, 1800, 4000, 7200]))
+            records.append({
+                'MMSI': str(200000000 + v),
+                'NAME': f'VESSEL_{v}',
+                'TSTAMP': t.strftime('%Y-%m-%d %H:%M:%S GMT'),
+                'LATITUDE': str(rng.uniform(-10, 10)),
+                'LONGITUDE': str(rng.uniform(90, 110)),
+                'SOG': str(rng.uniform(0, 20)),
+                'COG': str(rng.uniform(0, 360)),
+                'DRAUGHT': '8.5',
+            })
+    rng.shuffle(records)
+    return records
+
+
+@pytest.fixture
+def ais_file(tmp_path):
+    """Fichier AIS JSON synthétique"""
+    path = tmp_path / 'ais.json'
+    path.write_text(json.dumps(make_ais_records()))
+    return path
+
+
 class TestAISProcessor:
     """Tests pour le pipeline ETL AIS"""
     
@@ -36,6 +93,1008 @@ class TestAISProcessor:
         assert distance == 0
 
 
+class TestGeodesy:
+    """Tests du noyau géodésique partagé"""
+    
+    def test_batch_matches_scalar(self):
+        """Les noyaux vectorisés donnent les mêmes distances que le chemin scalaire"""
+        lats = np.array([1.3521, 53.3495, -33.8688, 35.6762])
+        lons = np.array([103.8198, 9.9878, 151.2093, 139.6503])
+        
+        pairwise = geodesy.haversine_distance(lats[:-1], lons[:-1], lats[1:], lons[1:])
+        matrix = geodesy.haversine_matrix(lats, lons, lats, lons, unit='km')
+        
+        for i in range(len(lats) - 1):
+            assert pairwise[i] == pytest.approx(
+                geodesy.haversine_distance(float(lats[i]), float(lons[i]),
+                                           float(lats[i + 1]), float(lons[i + 1])))
+        assert matrix.shape == (4, 4)
+        assert np.allclose(np.diag(matrix), 0)
+        assert np.allclose(matrix, matrix.T)
+        assert matrix[0, 1] == pytest.approx(pairwise[0] * 6371.0 / 3440.065)
+    
+    def test_one_to_many(self):
+        """Distances d'un point vers plusieurs points"""
+        distances = geodesy.haversine_one_to_many(0, 0, np.array([0.0, 1.0]), np.array([1.0, 0.0]))
+        
+        assert distances.shape == (2,)
+        assert distances[0] == pytest.approx(60.04, abs=0.01)  # 1° ~ 60 NM
+    
+    def test_initial_bearing(self):
+        """Caps cardinaux"""
+        assert geodesy.initial_bearing(0, 0, 1, 0) == pytest.approx(0)
+        assert geodesy.initial_bearing(0, 0, 0, 1) == pytest.approx(90)
+        assert np.allclose(
+            geodesy.initial_bearing(np.zeros(2), np.zeros(2), np.array([-1.0, 0.0]), np.array([0.0, -1.0])),
+            [180, 270]
+        )
+    
+    def test_unknown_unit(self):
+        """Une unité inconnue lève une erreur explicite"""
+        with pytest.raises(ValueError):
+            geodesy.haversine_distance(0, 0, 1, 1, unit='miles')
+
+
+class TestVoyageSegmentation:
+    """Tests de la segmentation vectorisée"""
+    
+    def test_vectorized_matches_loop(self, ais_file):
+        """La segmentation colonnaire produit la même table que la boucle"""
+        processor = AISDataProcessor(ais_file)
+        processor.load_ais_data()
+        
+        expected = processor.create_voyage_segments(vectorized=False)
+        result = processor.create_voyage_segments(vectorized=True)
+        
+        assert len(result) > 0
+        pd.testing.assert_frame_equal(result, expected)
+    
+    def test_gap_threshold(self, ais_file):
+        """Aucun segment ne dépasse le gap maximum"""
+        processor = AISDataProcessor(ais_file)
+        processor.load_ais_data()
+        
+        segments = processor.create_voyage_segments(min_time_gap_hours=0.5)
+        
+        assert (segments['time_hours'] <= 0.5).all()
+    
+    def test_empty_data(self):
+        """Un seul ping ne produit aucun segment"""
+        processor = AISDataProcessor('unused.json')
+        processor.raw_data = pd.DataFrame({
+            'MMSI': ['1'], 'NAME': ['A'], 'TSTAMP': [pd.Timestamp('2024-01-01')],
+            'LATITUDE': [0.0], 'LONGITUDE': [0.0], 'SOG': [10.0], 'DRAUGHT': [8.0],
+        })
+        
+        segments = processor.create_voyage_segments()
+        
+        assert segments.empty
+        assert 'time_hours' in segments.columns
+
+
+class TestCompactDtypes:
+    """Tests du profil mémoire compact"""
+    
+    def test_compact_profile_dtypes(self, ais_file):
+        """MMSI int64, NAME catégoriel, cinématique float32, TSTAMP epoch int64"""
+        processor = AISDataProcessor(ais_file, compact_dtypes=True)
+        df = processor.load_ais_data()
+        
+        assert df['MMSI'].dtype == np.int64
+        assert isinstance(df['NAME'].dtype, pd.CategoricalDtype)
+        assert df['LATITUDE'].dtype == np.float32
+        assert df['SOG'].dtype == np.float32
+        assert df['TSTAMP'].dtype == np.int64
+    
+    def test_compact_profile_is_smaller(self, ais_file):
+        """Le profil compact réduit l'empreinte par million de lignes"""
+        df = AISDataProcessor(ais_file).load_ais_data()
+        
+        assert frame_bytes_per_million_rows(compact_ais_frame(df)) < frame_bytes_per_million_rows(df) / 2
+    
+    def test_non_numeric_mmsi_stays_categorical(self):
+        """Un MMSI non numérique est conservé en catégoriel"""
+        df = pd.DataFrame({'MMSI': ['123', 'ABC'], 'NAME': ['A', 'B']})
+        
+        assert isinstance(compact_ais_frame(df)['MMSI'].dtype, pd.CategoricalDtype)
+    
+    def test_segments_match_default_profile(self, ais_file):
+        """Mêmes segments qu'avec le profil par défaut, à la précision float32 près"""
+        expected = AISDataProcessor(ais_file)
+        expected.load_ais_data()
+        expected_segments = expected.create_voyage_segments()
+        
+        compact = AISDataProcessor(ais_file, compact_dtypes=True)
+        compact.load_ais_data()
+        segments = compact.create_voyage_segments(drop_raw=True)
+        
+        assert compact.raw_data is None
+        assert len(segments) == len(expected_segments)
+        assert (segments['mmsi'].astype(str).to_numpy() == expected_segments['mmsi'].to_numpy()).all()
+        assert (segments['timestamp'].to_numpy() == expected_segments['timestamp'].to_numpy()).all()
+        assert np.allclose(segments['time_hours'], expected_segments['time_hours'])
+        assert np.allclose(segments['from_lat'], expected_segments['from_lat'], atol=1e-5)
+        assert list(segments['vessel_name'].astype(str)) == list(expected_segments['vessel_name'])
+
+
+def make_track_frame(n_pings=240, step_minutes=5, seed=0):
+    """Trace typée: cap 090 puis virage au 000 à mi-parcours, 12 nœuds, léger bruit GPS"""
+    rng = np.random.default_rng(seed)
+    hours = np.arange(n_pings) * step_minutes / 60
+    turn = n_pings // 2
+    east = np.minimum(np.arange(n_pings), turn) * 12 * step_minutes / 60 / 60
+    north = np.maximum(np.arange(n_pings) - turn, 0) * 12 * step_minutes / 60 / 60
+    return pd.DataFrame({
+        'MMSI': 200000001,
+        'NAME': 'TRACK',
+        'TSTAMP': pd.Timestamp('2024-01-01') + pd.to_timedelta(hours, unit='h'),
+        'LATITUDE': 1.0 + north + rng.normal(0, 0.0005, n_pings),
+        'LONGITUDE': 103.0 + east + rng.normal(0, 0.0005, n_pings),
+        'SOG': 12.0,
+        'COG': np.where(np.arange(n_pings) <= turn, 90.0, 0.0),
+        'DRAUGHT': 8.5,
+    })
+
+
+class TestAISQualityFilter:
+    """Tests du filtre qualité vectorisé"""
+    
+    def _dirty_frame(self):
+        """Trace propre (12 nœuds, pings toutes les 5 min) + un défaut de chaque type"""
+        df = make_track_frame(n_pings=20)
+        clean = len(df)
+        
+        def defect(i, **changes):
+            row = df.iloc[i].copy()
+            row['TSTAMP'] += pd.Timedelta(minutes=1)
+            for column, value in changes.items():
+                row[column] = value
+            return row
+        
+        zero_gap = df.iloc[7].copy()
+        zero_gap['LONGITUDE'] += 0.01
+        defects = pd.DataFrame([
+            df.iloc[3],                                           # doublon exact
+            defect(4, LATITUDE=95.0),                             # latitude hors plage
+            defect(5, SOG=102.3),                                 # SOG non disponible
+            defect(6, COG=360.0),                                 # COG non disponible
+            zero_gap,                                             # même instant, autre position
+            defect(10, LATITUDE=df.iloc[10]['LATITUDE'] + 5),     # saut GPS
+        ])
+        return pd.concat([df, defects], ignore_index=True), clean
+    
+    def test_per_rule_counts(self):
+        """Chaque défaut est rejeté et compté sous sa règle"""
+        df, clean = self._dirty_frame()
+        
+        filtered, counts = filter_ais_quality(df.sample(frac=1, random_state=0))
+        
+        assert counts == {'duplicate': 1, 'position_range': 1, 'sog_range': 1, 'cog_range': 1,
+                          'zero_time_gap': 1, 'implied_speed': 1}
+        assert len(filtered) == clean
+    
+    def test_clean_data_untouched(self):
+        """Des pings valides ne sont jamais rejetés; l'ordre d'origine est conservé"""
+        df = make_track_frame(n_pings=50).sample(frac=1, random_state=1)
+        
+        filtered, counts = filter_ais_quality(df)
+        
+        assert sum(counts.values()) == 0
+        assert list(filtered.index) == list(df.index)
+    
+    def test_processor_report(self, tmp_path):
+        """Le processeur applique le filtre au chargement et cumule les rejets par règle"""
+        records = make_ais_records(n_vessels=2, pings_per_vessel=10)
+        records.append(dict(records[0]))
+        records[1]['SOG'] = '102.3'
+        path = tmp_path / 'ais.json'
+        path.write_text(json.dumps(records))
+        
+        processor = AISDataProcessor(path, quality_filter=True)
+        df = processor.load_ais_data()
+        
+        assert processor.quality_report['duplicate'] == 1
+        assert processor.quality_report['sog_range'] == 1
+        assert len(df) == len(records) - sum(processor.quality_report.values())
+    
+    def test_streaming_matches_batch_across_chunks(self, tmp_path):
+        """En flux, les règles comparent aussi les pings de part et d'autre d'une frontière de chunk"""
+        df = make_track_frame(n_pings=40)
+        duplicate = df.iloc[9].copy()                     # doublon en tête du chunk suivant
+        zero_gap = df.iloc[19].copy()                     # même instant, autre position
+        zero_gap['LONGITUDE'] += 0.01
+        spike = df.iloc[28].copy()                        # saut GPS en fin de chunk
+        spike['TSTAMP'] += pd.Timedelta(minutes=1)
+        spike['LATITUDE'] += 5
+        df = pd.concat([df, pd.DataFrame([duplicate, zero_gap, spike])])
+        df = df.sort_values('TSTAMP', kind='mergesort').reset_index(drop=True)
+        records = [{
+            'MMSI': str(row.MMSI), 'NAME': row.NAME, 'TSTAMP': row.TSTAMP.strftime('%Y-%m-%d %H:%M:%S GMT'),
+            'LATITUDE': repr(row.LATITUDE), 'LONGITUDE': repr(row.LONGITUDE),
+            'SOG': str(row.SOG), 'COG': str(row.COG), 'DRAUGHT': str(row.DRAUGHT),
+        } for row in df.itertuples()]
+        path = tmp_path / 'ais.json'
+        path.write_text(json.dumps(records))
+        
+        batch = AISDataProcessor(path, quality_filter=True)
+        expected = batch.load_ais_data()
+        streaming = AISDataProcessor(path, quality_filter=True)
+        streamed = pd.concat(list(streaming.iter_ais_chunks(chunk_size=10)), ignore_index=True)
+        
+        assert streaming.quality_report == batch.quality_report
+        assert batch.quality_report['duplicate'] == batch.quality_report['zero_time_gap'] == 1
+        assert batch.quality_report['implied_speed'] == 1
+        assert streamed['TSTAMP'].tolist() == expected['TSTAMP'].tolist()
+        assert streamed['LATITUDE'].tolist() == expected['LATITUDE'].tolist()
+
+
+class TestTrajectorySimplification:
+    """Tests de la simplification Douglas-Peucker avant segmentation"""
+    
+    def _totals(self, segments):
+        distances = geodesy.haversine_distance(segments['from_lat'].to_numpy(), segments['from_lon'].to_numpy(),
+                                               segments['to_lat'].to_numpy(), segments['to_lon'].to_numpy())
+        return distances.sum(), segments['time_hours'].sum()
+    
+    def test_fewer_segments_same_totals(self):
+        """Beaucoup moins de segments; temps total identique, distance dans la tolérance"""
+        processor = AISDataProcessor('unused.json')
+        processor.raw_data = make_track_frame()
+        
+        full = processor.create_voyage_segments()
+        simplified = processor.create_voyage_segments(simplify_tolerance_nm=0.5)
+        distance_full, time_full = self._totals(full)
+        distance_simplified, time_simplified = self._totals(simplified)
+        
+        assert len(simplified) * 5 < len(full)
+        assert time_simplified == pytest.approx(time_full)
+        assert distance_simplified == pytest.approx(distance_full, rel=0.01)
+        assert (simplified['time_hours'] <= 1.0).all()
+    
+    def test_turn_and_gaps_kept(self):
+        """Le virage (garde-fou de cap) et les extrémités de trace sont conservés"""
+        df = make_track_frame()
+        df.loc[200:, 'TSTAMP'] += pd.Timedelta(hours=3)  # perte de signal
+        
+        kept = simplify_tracks(df, tolerance_nm=0.5, max_span_hours=1.0)
+        
+        assert {0, 120, 121, 199, 200, 239} <= set(kept.index)
+    
+    def test_vessels_simplified_independently(self):
+        """Deux navires entrelacés: aucune trace ne déborde sur l'autre"""
+        a = make_track_frame(seed=1)
+        b = make_track_frame(seed=2).assign(MMSI=200000002, LATITUDE=lambda d: d['LATITUDE'] + 5)
+        df = pd.concat([a, b], ignore_index=True).sort_values('TSTAMP', kind='mergesort')
+        
+        processor = AISDataProcessor('unused.json')
+        processor.raw_data = df
+        segments = processor.create_voyage_segments(simplify_tolerance_nm=0.5)
+        
+        assert set(segments['mmsi']) == {200000001, 200000002}
+        assert (segments['to_lat'] - segments['from_lat']).abs().max() < 1
+        assert segments.groupby('mmsi')['time_hours'].sum().to_numpy() == pytest.approx([239 / 12] * 2)
+
+
+def make_repeating_ais_records(seed=0):
+    """Enregistrements AIS chronologiques sur peu de positions (arêtes répétées)"""
+    rng = random.Random(seed)
+    records = sorted(make_ais_records(n_vessels=3, pings_per_vessel=200),
+                     key=lambda r: r['TSTAMP'])
+    for record in records:
+        record['LATITUDE'] = str(rng.choice([1.0, 1.5, 2.0]))
+        record['LONGITUDE'] = str(rng.choice([103.0, 104.0]))
+    return records
+
+
+class TestAISStreaming:
+    """Tests du chargement AIS en flux"""
+    
+    def test_parse_json_array_and_ndjson(self, tmp_path):
+        """Les deux formats produisent les mêmes enregistrements, même avec de petits blocs"""
+        records = make_ais_records(n_vessels=2, pings_per_vessel=10)
+        array_path = tmp_path / 'ais.json'
+        array_path.write_text(json.dumps(records, indent=2))
+        ndjson_path = tmp_path / 'ais.ndjson'
+        ndjson_path.write_text('\n'.join(json.dumps(r) for r in records) + '\n')
+        
+        assert list(iter_json_records(array_path, block_size=64)) == records
+        assert list(iter_json_records(ndjson_path, block_size=64)) == records
+    
+    def test_chunks_are_typed(self, ais_file):
+        """Chaque chunk est typé comme load_ais_data"""
+        processor = AISDataProcessor(ais_file)
+        chunks = list(processor.iter_ais_chunks(chunk_size=30))
+        
+        assert sum(len(c) for c in chunks) == 200
+        assert all(len(c) <= 30 for c in chunks)
+        assert pd.api.types.is_datetime64_any_dtype(chunks[0]['TSTAMP'])
+    
+    def test_streaming_segments_cross_chunk_boundaries(self, tmp_path):
+        """Les segments à cheval sur deux chunks sont conservés"""
+        records = make_repeating_ais_records()
+        array_path = tmp_path / 'ais.json'
+        array_path.write_text(json.dumps(records))
+        ndjson_path = tmp_path / 'ais.ndjson'
+        ndjson_path.write_text('\n'.join(json.dumps(r) for r in records))
+        
+        processor = AISDataProcessor(array_path)
+        processor.load_ais_data()
+        expected = processor.create_voyage_segments()
+        streamed = pd.concat(list(AISDataProcessor(ndjson_path).iter_voyage_segments(chunk_size=17)))
+        
+        assert len(streamed) == len(expected)
+        assert streamed['time_hours'].sum() == pytest.approx(expected['time_hours'].sum())
+    
+    def test_streaming_edge_statistics_match_batch(self, tmp_path):
+        """Les statistiques en flux sont identiques au calcul en mémoire"""
+        path = tmp_path / 'ais.json'
+        path.write_text(json.dumps(make_repeating_ais_records()))
+        
+        processor = AISDataProcessor(path)
+        processor.load_ais_data()
+        processor.create_voyage_segments()
+        expected = processor.compute_edge_statistics()
+        streamed = processor.compute_edge_statistics_streaming(chunk_size=25)
+        
+        assert len(expected) > 0
+        assert set(streamed) == set(expected)
+        # Les quantiles fusionnés sont approchés, le reste est exact
+        exact = ['distance_nm', 'time_hours_avg', 'speed_avg_knots', 'observations',
+                 'fuel_consumption_tons', 'time_hours_var', 'speed_knots_var']
+        for edge_key, stats in expected.items():
+            for name in exact:
+                assert streamed[edge_key][name] == pytest.approx(stats[name])
+
+
+class TestEdgeStatistics:
+    """Tests de l'agrégation vectorisée par arête"""
+    
+    def setup_method(self):
+        records = make_repeating_ais_records()
+        for record in records[::50]:
+            record['SOG'] = 'NaN'
+        self.records = records
+    
+    def _processor(self, tmp_path):
+        path = tmp_path / 'ais.json'
+        path.write_text(json.dumps(self.records))
+        processor = AISDataProcessor(path)
+        processor.load_ais_data()
+        processor.create_voyage_segments()
+        return processor
+    
+    def test_vectorized_matches_loop(self, tmp_path):
+        """Même format et mêmes valeurs que l'ancienne boucle iterrows"""
+        processor = self._processor(tmp_path)
+        
+        expected = processor.compute_edge_statistics(vectorized=False)
+        result = processor.compute_edge_statistics()
+        
+        assert len(expected) > 0
+        assert set(result) == set(expected)
+        for edge_key, stats in expected.items():
+            for name, value in stats.items():
+                assert result[edge_key][name] == pytest.approx(value, nan_ok=True)
+    
+    def test_moments_and_quantiles(self, tmp_path):
+        """Variance et quantiles exacts sur un lot unique"""
+        processor = self._processor(tmp_path)
+        segments = processor.processed_data
+        stats = processor.compute_edge_statistics()
+        
+        edge_key = next(iter(stats))
+        (from_lat, from_lon), (to_lat, to_lon) = edge_key
+        mask = ((segments['from_lat'].round(2) == from_lat) & (segments['from_lon'].round(2) == from_lon)
+                & (segments['to_lat'].round(2) == to_lat) & (segments['to_lon'].round(2) == to_lon))
+        times = segments.loc[mask, 'time_hours']
+        
+        assert stats[edge_key]['time_hours_var'] == pytest.approx(times.var(ddof=0))
+        assert stats[edge_key]['time_hours_p50'] == pytest.approx(times.quantile(0.5))
+        assert stats[edge_key]['time_hours_p90'] == pytest.approx(times.quantile(0.9))
+    
+    def test_min_observations_configurable(self, tmp_path):
+        """Le seuil d'observations est paramétrable"""
+        processor = self._processor(tmp_path)
+        
+        all_edges = processor.compute_edge_statistics(min_observations=1)
+        frequent = processor.compute_edge_statistics(min_observations=10)
+        
+        assert len(all_edges) > len(frequent) > 0
+        assert all(s['observations'] >= 10 for s in frequent.values())
+    
+    def test_merge_is_exact_for_moments(self, tmp_path):
+        """Fusionner deux moitiés redonne moyenne et variance du tout"""
+        segments = self._processor(tmp_path).processed_data
+        half = len(segments) // 2
+        
+        merged = merge_edge_moments(aggregate_edge_moments(segments.iloc[:half]),
+                                    aggregate_edge_moments(segments.iloc[half:]))
+        full = aggregate_edge_moments(segments)
+        
+        for column in ['count', 'time_mean', 'time_m2', 'distance_mean', 'distance_m2']:
+            assert np.allclose(merged[column], full[column])
+
+
+class TestParallelProcessing:
+    """Tests du traitement parallèle par MMSI"""
+    
+    def test_shards_keep_vessels_together(self, ais_file):
+        """Chaque navire appartient à un seul shard et aucune ligne n'est perdue"""
+        pings = AISDataProcessor(ais_file).load_ais_data()
+        shards = shard_by_mmsi(pings, 3)
+        
+        assert sum(len(shard) for shard in shards) == len(pings)
+        owners = {}
+        for i, shard in enumerate(shards):
+            for mmsi in shard['MMSI'].unique():
+                assert owners.setdefault(mmsi, i) == i
+    
+    def test_parallel_matches_serial(self, tmp_path):
+        """Le pool de processus donne les mêmes statistiques que le calcul série"""
+        path = tmp_path / 'ais.json'
+        path.write_text(json.dumps(make_repeating_ais_records()))
+        processor = AISDataProcessor(path)
+        processor.load_ais_data()
+        processor.create_voyage_segments()
+        expected = processor.compute_edge_statistics()
+        
+        result = processor.compute_edge_statistics_parallel(n_workers=2, n_shards=3)
+        
+        assert set(result) == set(expected)
+        for edge_key, stats in expected.items():
+            assert result[edge_key]['observations'] == stats['observations']
+            assert result[edge_key]['time_hours_avg'] == pytest.approx(stats['time_hours_avg'])
+            assert result[edge_key]['time_hours_var'] == pytest.approx(stats['time_hours_var'])
+        assert len(processor.shard_report) == 3
+        assert sum(shard['pings'] for shard in processor.shard_report) == len(processor.raw_data)
+
+
+class TestEdgeStatisticsStore:
+    """Tests du store incrémental de statistiques par arête"""
+    
+    def _pings(self, tmp_path):
+        path = tmp_path / 'ais.json'
+        path.write_text(json.dumps(make_repeating_ais_records()))
+        return AISDataProcessor(path).load_ais_data().sort_values('TSTAMP', ignore_index=True)
+    
+    def test_incremental_matches_full_history(self, tmp_path):
+        """Deux lots successifs == un seul traitement, y compris aux frontières"""
+        pings = self._pings(tmp_path)
+        processor = AISDataProcessor('unused.json')
+        processor.raw_data = pings
+        processor.create_voyage_segments()
+        expected = processor.compute_edge_statistics()
+        
+        store = EdgeStatisticsStore()
+        half = len(pings) // 2
+        store.ingest(pings.iloc[:half])
+        changed = store.ingest(pings.iloc[half:])
+        result = store.statistics()
+        
+        assert len(changed) > 0
+        assert set(result) == set(expected)
+        for edge_key, stats in expected.items():
+            assert result[edge_key]['observations'] == stats['observations']
+            assert result[edge_key]['time_hours_avg'] == pytest.approx(stats['time_hours_avg'])
+    
+    def test_exponential_decay(self, tmp_path):
+        """Après une demi-vie, l'ancien trafic compte pour moitié"""
+        pings = self._pings(tmp_path)
+        store = EdgeStatisticsStore(decay_half_life_hours=24)
+        store.ingest(pings)
+        before = store.moments['count'].sum()
+        
+        later = pings.iloc[:1].copy()
+        later['TSTAMP'] = store.last_timestamp + pd.Timedelta(hours=24)
+        later['MMSI'] = 'NEW_VESSEL'
+        store.ingest(later)
+        
+        assert store.moments['count'].sum() == pytest.approx(before / 2)
+    
+    def test_save_and_load(self, tmp_path):
+        """Le store persisté reprend exactement là où il s'était arrêté"""
+        pings = self._pings(tmp_path)
+        half = len(pings) // 2
+        store = EdgeStatisticsStore(decay_half_life_hours=48)
+        store.ingest(pings.iloc[:half])
+        store.save(tmp_path / 'store')
+        
+        reloaded = EdgeStatisticsStore.load(tmp_path / 'store')
+        reloaded.ingest(pings.iloc[half:])
+        store.ingest(pings.iloc[half:])
+        
+        assert reloaded.last_timestamp == store.last_timestamp
+        assert np.allclose(reloaded.moments['count'], store.moments['count'])
+        assert np.allclose(reloaded.moments['time_mean'], store.moments['time_mean'])
+    
+    def test_push_to_graph_in_place(self, tmp_path):
+        """Les arêtes modifiées sont poussées dans le graphe sans le reconstruire"""
+        store = EdgeStatisticsStore()
+        changed = store.ingest(self._pings(tmp_path))
+        
+        builder = GeospatialGraphBuilder()
+        for wp in [WayPoint('A', 'A', 1.0, 103.0, 'waypoint'), WayPoint('B', 'B', 2.0, 104.0, 'waypoint')]:
+            builder.add_waypoint(wp)
+        graph = builder.get_graph()
+        builder.add_edge_from_ais(builder.waypoints['A'], builder.waypoints['B'],
+                                  EdgeAttributes(distance_nm=1, time_hours_avg=1, fuel_consumption_tons=1,
+                                                 weather_risk=RiskLevel.HIGH))
+        
+        updated = store.push_to_graph(builder, changed, radius_nm=5)
+        
+        assert updated == 2
+        assert builder.get_graph() is graph
+        assert graph['A']['B']['weight'] == pytest.approx(
+            store.statistics()[((1.0, 103.0), (2.0, 104.0))]['distance_nm'])
+        assert graph['A']['B']['weather_risk'] == RiskLevel.HIGH.value
+        assert graph.has_edge('B', 'A')
+    
+    def test_push_changed_edge_keeps_pair_average(self):
+        """Une seule des deux arêtes AIS d'une paire modifiée: la paire reste moyennée sur les deux"""
+        builder = GeospatialGraphBuilder()
+        for wp in [WayPoint('A', 'A', 1.0, 103.0, 'waypoint'), WayPoint('B', 'B', 2.0, 104.0, 'waypoint')]:
+            builder.add_waypoint(wp)
+        store = EdgeStatisticsStore()
+        store.moments = aggregate_edge_moments(pd.DataFrame({
+            'from_lat': [1.0, 1.0, 1.0, 1.02], 'from_lon': [103.0] * 4,
+            'to_lat': [2.0] * 4, 'to_lon': [104.0] * 4,
+            'time_hours': [10.0, 10.0, 10.0, 30.0], 'sog_knots': [8.0, 8.0, 8.0, 12.0],
+        }))
+        changed = encode_edge_keys(np.array([1.02]), np.array([103.0]), np.array([2.0]), np.array([104.0]))
+        
+        assert store.push_to_graph(builder, changed, min_observations=1, radius_nm=5) == 1
+        edge = builder.get_graph()['A']['B']
+        assert edge['observations'] == 4
+        assert edge['time_hours'] == pytest.approx(15.0)
+        assert store.push_to_graph(builder, [], min_observations=1, radius_nm=5) == 0
+
+
+class TestGraphSnapping:
+    """Tests du rattachement en masse des arêtes AIS au graphe"""
+    
+    def setup_method(self):
+        self.builder = GeospatialGraphBuilder()
+        for wp in [WayPoint('A', 'A', 1.0, 103.0, 'waypoint'), WayPoint('B', 'B', 2.0, 104.0, 'waypoint')]:
+            self.builder.add_waypoint(wp)
+    
+    def _segments(self):
+        """Deux arêtes AIS distinctes (à 0.01° près) rattachées à la même paire A -> B"""
+        return pd.DataFrame({
+            'from_lat': [1.0, 1.0, 1.0, 1.02], 'from_lon': [103.0, 103.0, 103.0, 103.0],
+            'to_lat': [2.0, 2.0, 2.0, 2.0], 'to_lon': [104.0, 104.0, 104.0, 104.0],
+            'time_hours': [10.0, 10.0, 10.0, 30.0], 'sog_knots': [8.0, 8.0, 8.0, 12.0],
+        })
+    
+    def test_duplicates_merged_by_observation_weight(self):
+        """Les arêtes rattachées à la même paire sont moyennées par observations"""
+        snapped = snap_edge_moments(aggregate_edge_moments(self._segments()), self.builder,
+                                    radius_nm=5, min_observations=1)
+        
+        assert len(snapped) == 1
+        row = snapped.iloc[0]
+        assert (row['from_id'], row['to_id']) == ('A', 'B')
+        assert row['observations'] == 4
+        assert row['time_hours'] == pytest.approx(15.0)
+        assert row['speed_knots'] == pytest.approx(9.0)
+    
+    def test_out_of_radius_and_loops_ignored(self):
+        """Extrémités trop éloignées ou rattachées au même waypoint: arête ignorée"""
+        segments = pd.DataFrame({
+            'from_lat': [1.0, 1.0], 'from_lon': [103.0, 103.0],
+            'to_lat': [1.01, 30.0], 'to_lon': [103.01, 150.0],
+            'time_hours': [1.0, 1.0], 'sog_knots': [5.0, 5.0],
+        })
+        
+        snapped = snap_edge_moments(aggregate_edge_moments(segments), self.builder,
+                                    radius_nm=5, min_observations=1)
+        
+        assert snapped.empty
+    
+    def test_dict_statistics_match_moments(self, tmp_path):
+        """Le format dict de compute_edge_statistics donne le même rattachement"""
+        moments = aggregate_edge_moments(self._segments())
+        processor = AISDataProcessor(tmp_path / 'unused.json')
+        processor.processed_data = self._segments()
+        
+        from_dict = snap_edge_statistics(processor.compute_edge_statistics(min_observations=1),
+                                         self.builder, radius_nm=5)
+        from_moments = snap_edge_moments(moments, self.builder, radius_nm=5, min_observations=1)
+        
+        pd.testing.assert_frame_equal(from_dict, from_moments)
+    
+    def test_bulk_add_creates_routable_edges(self, tmp_path):
+        """Les arêtes sont ajoutées en une fois, avec les attributs attendus par l'optimiseur"""
+        processor = AISDataProcessor(tmp_path / 'unused.json')
+        processor.processed_data = self._segments()
+        
+        written = processor.snap_edges_to_graph(self.builder, radius_nm=5, min_observations=1)
+        
+        edge = self.builder.get_graph()['A']['B']
+        assert written == 1
+        assert edge['time_hours'] == pytest.approx(15.0)
+        assert edge['observations'] == 4
+        assert edge['weather_risk'] == RiskLevel.NONE.value
+        assert edge['blocked'] is False
+        optimizer = WeightedAStarOptimizer(self.builder.get_graph(), self.builder.waypoints)
+        assert optimizer.find_optimal_route('A', 'B', OptimizationParams()) == ['A', 'B']
+
+
+class TestEdgeProfiles:
+    """Tests des profils temporels et saisonniers des arêtes"""
+    
+    def _segments(self):
+        """Une arête parcourue en 2h le lundi à 10h et en 1h le lundi à 22h (10 fois chacun)"""
+        monday = pd.Timestamp('2024-01-01')  # lundi
+        timestamps = [monday + pd.Timedelta(weeks=w, hours=h) for w in range(10) for h in (10, 22)]
+        return pd.DataFrame({
+            'from_lat': 1.0, 'from_lon': 103.0, 'to_lat': 1.2, 'to_lon': 103.2,
+            'time_hours': [2.0, 1.0] * 10, 'sog_knots': [8.0, 16.0] * 10,
+            'timestamp': timestamps, 'draught': [8.5, 13.0] * 10,
+        })
+    
+    def test_buckets(self):
+        """Heure de la semaine (lundi 00h = 0), mois et classe de tirant d'eau"""
+        buckets = profile_buckets(
+            np.array(['2024-01-01T10:30', '2024-03-03T23:00', 'NaT'], dtype='datetime64[ns]'),
+            np.array([8.5, 16.0, np.nan]),
+        )
+        
+        assert list(buckets['hour_of_week']) == [10, 6 * 24 + 23, -1]
+        assert list(buckets['month']) == [0, 2, -1]
+        assert list(buckets['draught_class']) == [1, 4, -1]
+    
+    def test_time_dependent_lookup(self):
+        """Temps par classe horaire, repli sur la moyenne pour une classe vide"""
+        profiles = EdgeProfiles.from_segments(self._segments())
+        edge_key = encode_edge_keys(1.0, 103.0, 1.2, 103.2)
+        edge_id = profiles.edge_id(edge_key)
+        
+        assert len(profiles) == 1 and edge_id == 0
+        assert profiles.travel_time_at(edge_id, datetime(2024, 6, 3, 10, 15)) == pytest.approx(2.0)
+        assert profiles.travel_time_at(edge_id, datetime(2024, 6, 3, 22, 0)) == pytest.approx(1.0)
+        assert profiles.travel_time_at(edge_id, datetime(2024, 6, 4, 10, 0)) == pytest.approx(1.5)
+        assert profiles.time_factor(edge_key, datetime(2024, 6, 3, 10, 0)) == pytest.approx(2 / 1.5)
+        assert profiles.time_factor(12345, datetime(2024, 6, 3, 10, 0)) == 1.0
+        assert profiles.mean_times('draught_class')[0, [1, 3]] == pytest.approx([2.0, 1.0])
+        assert list(profiles.edge_ids(np.array([edge_key, 12345]))) == [0, -1]
+    
+    def test_save_and_load(self, tmp_path):
+        """Les tableaux denses sont persistés et relus à l'identique"""
+        profiles = EdgeProfiles.from_segments(self._segments())
+        profiles.save(tmp_path / 'profiles.npz')
+        
+        restored = EdgeProfiles.load(tmp_path / 'profiles.npz')
+        
+        assert (restored.edge_keys == profiles.edge_keys).all()
+        assert np.array_equal(restored.arrays['month']['time_sum'], profiles.arrays['month']['time_sum'])
+    
+    def test_optimizer_uses_profiles(self):
+        """Le coût d'une arête AIS dépend de l'heure de passage"""
+        profiles = EdgeProfiles.from_segments(self._segments())
+        graph = nx.DiGraph()
+        graph.add_edge('A', 'B', weight=20, time_hours=1.5, fuel_tons=0.3,
+                       edge_key=int(encode_edge_keys(1.0, 103.0, 1.2, 103.2)))
+        waypoints = {'A': WayPoint('A', 'A', 1.0, 103.0, 'waypoint'), 'B': WayPoint('B', 'B', 1.2, 103.2, 'waypoint')}
+        optimizer = WeightedAStarOptimizer(graph, waypoints, edge_profiles=profiles)
+        params = OptimizationParams(weight_time=1.0, weight_cost=0.0, weight_risk=0.0)
+        
+        day_cost, _ = optimizer.compute_edge_cost('A', 'B', params, datetime(2024, 6, 3, 10, 0))
+        night_cost, _ = optimizer.compute_edge_cost('A', 'B', params, datetime(2024, 6, 3, 22, 0))
+        
+        assert day_cost == pytest.approx(2.0)
+        assert night_cost == pytest.approx(1.0)
+
+
+class TestPortCalls:
+    """Tests de la détection des escales (mouillage, quai, attente, séjour)"""
+    
+    PORT = WayPoint(id="SGSIN", name="Singapore", latitude=1.26, longitude=103.84, port_type="port")
+    
+    def _pings(self):
+        """
+        A: mouillage 0h-6h puis quai 7h-19h; B: mouillage 2h-8h puis quai 9h-15h;
+        C: arrêt en mer loin de tout port; D: arrêt de 30 min au port (trop court)
+        """
+        day = pd.Timestamp('2024-03-01')
+        rows = []
+        
+        def leg(mmsi, start_hour, end_hour, lat, lon, sog):
+            for minute in range(int(start_hour * 60), int(end_hour * 60) + 1, 10):
+                rows.append({'MMSI': mmsi, 'TSTAMP': day + pd.Timedelta(minutes=minute),
+                             'LATITUDE': lat, 'LONGITUDE': lon, 'SOG': sog, 'COG': 0.0})
+        
+        leg(1, 0, 6, 1.41, 103.84, 0.2)
+        leg(1, 6.2, 6.8, 1.33, 103.84, 10.0)
+        leg(1, 7, 19, 1.265, 103.845, 0.0)
+        leg(1, 19.2, 20, 1.20, 103.90, 12.0)
+        leg(2, 2, 8, 1.40, 103.86, 0.4)
+        leg(2, 8.2, 8.8, 1.32, 103.85, 9.0)
+        leg(2, 9, 15, 1.262, 103.838, 0.1)
+        leg(3, 0, 5, 10.0, 110.0, 0.3)
+        leg(4, 3, 3.5, 1.26, 103.84, 0.0)
+        leg(4, 3.7, 5, 1.10, 103.70, 12.0)
+        return pd.DataFrame(rows).sample(frac=1.0, random_state=0)
+    
+    def test_stops(self):
+        """Arrêts: suites de pings à faible SOG d'au moins une heure"""
+        stops = detect_stops(self._pings())
+        
+        assert sorted(stops['mmsi'].tolist()) == [1, 1, 2, 2, 3]
+        first = stops[stops['mmsi'] == 1].sort_values('start').iloc[0]
+        assert first['duration_hours'] == pytest.approx(6.0)
+        assert first['latitude'] == pytest.approx(1.41)
+    
+    def test_port_calls(self):
+        """Attente = mouillage -> accostage, séjour = durée à quai"""
+        calls = detect_port_calls(self._pings(), {"SGSIN": self.PORT}).set_index('mmsi')
+        
+        assert sorted(calls.index) == [1, 2]
+        assert (calls['port_id'] == "SGSIN").all()
+        assert calls.loc[1, 'wait_hours'] == pytest.approx(7.0)
+        assert calls.loc[1, 'dwell_hours'] == pytest.approx(12.0)
+        assert calls.loc[2, 'wait_hours'] == pytest.approx(7.0)
+        assert calls.loc[2, 'dwell_hours'] == pytest.approx(6.0)
+        assert calls.loc[2, 'queue_exit'] == pd.Timestamp('2024-03-01 09:00')
+    
+    def test_history_feeds_forecasting_agent(self):
+        """L'historique produit est directement exploitable par l'agent de prévision"""
+        calls = detect_port_calls(self._pings(), {"SGSIN": self.PORT})
+        history = port_history_from_calls(calls)
+        
+        assert [record['queue_length'] for record in history["SGSIN"]] == [0, 1]
+        assert set(history["SGSIN"][0]) >= {'timestamp', 'queue_length', 'wait_hours', 'vessel_type'}
+        
+        agent = CongestionForecastingAgent()
+        agent.register_port_calls(calls)
+        assert agent.simple_moving_average_forecast("SGSIN") == pytest.approx(7.0)
+    
+    def test_direct_berth_without_port(self):
+        """Accostage direct: attente nulle; sans port de type 'port': aucune escale"""
+        pings = self._pings()
+        direct = pings[(pings['MMSI'] != 1) | (pings['TSTAMP'] >= pd.Timestamp('2024-03-01 06:10'))]
+        calls = detect_port_calls(direct, {"SGSIN": self.PORT}).set_index('mmsi')
+        waypoint = WayPoint(id="WP", name="WP", latitude=1.26, longitude=103.84, port_type="waypoint")
+        
+        assert calls.loc[1, 'wait_hours'] == pytest.approx(0.0)
+        assert detect_port_calls(pings, {"WP": waypoint}).empty
+
+
+class TestTrafficDensity:
+    """Tests des rasters journaliers tuilés de densité de trafic"""
+    
+    def _store(self, tmp_path, **kwargs):
+        store = TrafficDensityStore(tmp_path / 'density', resolution_deg=0.1, tile_cells=16, **kwargs)
+        store.add_points(
+            np.array([1.25, 1.25, 1.35, 1.35, -33.9]),
+            np.array([103.81, 103.85, 103.9, 103.9, 151.2]),
+            np.array(['2024-01-01T10:00', '2024-01-01T23:59', '2024-01-02T00:00',
+                      '2024-01-03T08:00', '2024-01-02T12:00'], dtype='datetime64[ns]'),
+        )
+        return store
+    
+    def test_daily_rasters_sum_over_range(self, tmp_path):
+        """Une plage de dates somme les rasters journaliers sans relire l'AIS"""
+        store = self._store(tmp_path)
+        singapore = (1.0, 103.0, 2.0, 104.0)
+        
+        raster, extent = store.query(date(2024, 1, 1), date(2024, 1, 1), singapore)
+        assert raster.sum() == 2 and raster[2, 8] == 2
+        assert extent == (1.0, 103.0, 2.1, 104.1)
+        
+        raster, _ = store.query(date(2024, 1, 1), date(2024, 1, 3), singapore)
+        assert raster.sum() == 4 and raster[3, 9] == 2
+        assert store.query(date(2024, 1, 1), date(2024, 1, 3))[0].sum() == 5
+        assert store.days() == ['2024-01-01', '2024-01-02', '2024-01-03']
+    
+    def test_tile_cache_and_reopen(self, tmp_path):
+        """Tuiles relues depuis le cache LRU; la grille d'un répertoire existant est imposée"""
+        store = self._store(tmp_path, cache_tiles=64)
+        bbox = (1.0, 103.0, 2.0, 104.0)
+        store.query(date(2024, 1, 1), date(2024, 1, 3), bbox)
+        store.query(date(2024, 1, 1), date(2024, 1, 3), bbox)
+        
+        assert store.cache.hits == store.cache.misses and len(store.cache) <= 64
+        reopened = TrafficDensityStore(tmp_path / 'density', resolution_deg=0.1, tile_cells=16)
+        assert reopened.query(date(2024, 1, 1), date(2024, 1, 3), bbox)[0].sum() == 4
+        with pytest.raises(ValueError):
+            TrafficDensityStore(tmp_path / 'density', resolution_deg=0.25, tile_cells=16)
+    
+    def test_ingest_source_once(self, tmp_path, ais_file):
+        """Un fichier AIS déjà ingéré n'est pas recompté"""
+        store = TrafficDensityStore(tmp_path / 'density')
+        n_points = store.ingest_source(ais_file)
+        
+        assert n_points > 0
+        assert store.ingest_source(ais_file) == 0
+        assert store.query(date(2000, 1, 1), date(2100, 1, 1))[0].sum() == n_points
+    
+    def test_ingest_source_writes_each_tile_once(self, tmp_path, ais_file, monkeypatch):
+        """Les chunks d'un fichier sont cumulés en mémoire: une écriture par tuile (total et source)"""
+        store = TrafficDensityStore(tmp_path / 'density', resolution_deg=0.1, tile_cells=16)
+        writes = []
+        accumulate = TrafficDensityStore._accumulate
+        monkeypatch.setattr(TrafficDensityStore, '_accumulate',
+                            staticmethod(lambda path, counts: (writes.append(path), accumulate(path, counts))))
+        
+        n_points = store.ingest_source(ais_file, chunk_size=20)
+        
+        assert len(writes) == len(set(writes)) > 2
+        assert store.query(date(2000, 1, 1), date(2100, 1, 1))[0].sum() == n_points == len(make_ais_records())
+    
+    def test_forced_reingest_keeps_counts(self, tmp_path, ais_file):
+        """Ré-ingestion forcée ou fichier modifié: la contribution précédente est retranchée"""
+        store = self._store(tmp_path)
+        store.ingest_source(ais_file)
+        everything = (date(2000, 1, 1), date(2100, 1, 1))
+        before = store.query(*everything)[0]
+        
+        store.ingest_source(ais_file, force=True)
+        store.ingest_source(ais_file, force=True)
+        assert np.array_equal(store.query(*everything)[0], before)
+        
+        ais_file.write_text(json.dumps(make_ais_records()[:1]))
+        n_points = store.ingest_source(ais_file)
+        assert store.query(*everything)[0].sum() == 5 + n_points
+        reopened = TrafficDensityStore(tmp_path / 'density', resolution_deg=0.1, tile_cells=16)
+        assert np.array_equal(reopened.query(*everything)[0], store.query(*everything)[0])
+
+
+class TestAISHistoryStore:
+    """Tests de l'historique AIS local (SQLite, blocs navire x jour indexés)"""
+    
+    def _store(self, tmp_path):
+        frame = make_track_frame(n_pings=600, step_minutes=10)  # ~4 jours par navire
+        store = AISHistoryStore(tmp_path / 'history.sqlite')
+        store.ingest(frame)
+        return store, frame
+    
+    def test_query_by_vessel_and_time(self, tmp_path):
+        """Requête par MMSI et fenêtre: mêmes pings qu'un filtre pandas, triés par date"""
+        store, frame = self._store(tmp_path)
+        mmsi = frame['MMSI'].iloc[0]
+        start, end = pd.Timestamp('2024-01-01 20:00'), pd.Timestamp('2024-01-02 09:00')
+        
+        result = store.query(mmsi=mmsi, start=start, end=end)
+        expected = frame[(frame['MMSI'] == mmsi) & frame['TSTAMP'].between(start, end)].sort_values('TSTAMP')
+        
+        assert len(result) == len(expected) > 0
+        assert result['TSTAMP'].is_monotonic_increasing
+        assert np.allclose(result['LATITUDE'], expected['LATITUDE'])
+        assert (result['MMSI'] == str(mmsi)).all()
+    
+    def test_query_by_bbox(self, tmp_path):
+        """Requête spatio-temporelle via le R-tree, filtrée exactement ping par ping"""
+        store, frame = self._store(tmp_path)
+        center = frame.iloc[len(frame) // 2]
+        bbox = (center['LATITUDE'] - 0.5, center['LONGITUDE'] - 0.5,
+                center['LATITUDE'] + 0.5, center['LONGITUDE'] + 0.5)
+        
+        result = store.query(bbox=bbox, start=pd.Timestamp('2024-01-01'), end=pd.Timestamp('2024-01-03'))
+        inside = (frame['LATITUDE'].between(bbox[0], bbox[2]) & frame['LONGITUDE'].between(bbox[1], bbox[3])
+                  & frame['TSTAMP'].between(pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-03')))
+        
+        assert len(result) == int(inside.sum()) > 0
+        assert len(store.query(bbox=bbox, limit=5)) == 5
+        with pytest.raises(ValueError):
+            store.query(bbox=(10.0, 0.0, 5.0, 1.0))
+    
+    def test_reads_ignore_uncommitted_ingestion(self, tmp_path):
+        """Une ingestion en cours (transaction ouverte) n'est pas visible des lectures"""
+        store, frame = self._store(tmp_path)
+        with store._lock:
+            store.conn.execute("DELETE FROM blocks_rtree")
+            store.conn.execute("DELETE FROM blocks")
+            assert len(store.query()) == len(frame)
+            assert store.stats()['pings'] == len(frame)
+            store.conn.rollback()
+    
+    def test_limit_matches_sorted_head(self, tmp_path):
+        """limit arrête la lecture des blocs mais rend les premiers pings du résultat complet"""
+        store, frame = self._store(tmp_path)
+        bbox = (frame['LATITUDE'].min(), frame['LONGITUDE'].min(),
+                frame['LATITUDE'].median(), frame['LONGITUDE'].max())
+        
+        for kwargs in ({}, {'bbox': bbox}, {'mmsi': frame['MMSI'].iloc[0], 'start': pd.Timestamp('2024-01-02')}):
+            full = store.query(**kwargs)
+            for limit in (1, 150, len(full) + 10):
+                head = store.query(limit=limit, **kwargs)
+                assert len(head) == min(limit, len(full))
+                pd.testing.assert_frame_equal(head, full.iloc[:limit].reset_index(drop=True))
+    
+    def test_ingest_source_once(self, tmp_path, ais_file):
+        """Un fichier AIS déjà ingéré n'est pas dupliqué; la base est relue à la réouverture"""
+        store = AISHistoryStore(tmp_path / 'history.sqlite')
+        n_pings = store.ingest_source(ais_file)
+        store.close()
+        
+        reopened = AISHistoryStore(tmp_path / 'history.sqlite')
+        assert reopened.ingest_source(ais_file) == 0
+        assert reopened.stats()['pings'] == n_pings == len(reopened.query())
+        assert reopened.query()['NAME'].notna().all()
+    
+    def test_reingest_source_replaces_blocks(self, tmp_path, ais_file):
+        """Ré-ingestion forcée ou fichier modifié: les blocs précédents du fichier sont remplacés"""
+        store = AISHistoryStore(tmp_path / 'history.sqlite')
+        store.ingest(make_track_frame(n_pings=50))
+        n_pings = store.ingest_source(ais_file)
+        before = store.stats()
+        
+        assert store.ingest_source(ais_file, force=True) == n_pings
+        ais_file.write_text(ais_file.read_text() + '\n')  # fichier modifié, mêmes pings
+        assert store.ingest_source(ais_file) == n_pings
+        
+        assert store.stats() == before
+        n_rtree = store.conn.execute("SELECT COUNT(*) FROM blocks_rtree").fetchone()[0]
+        assert n_rtree == before['blocks']
+        assert len(store.query()) == before['pings']
+
+
+class TestAISColumnarCache:
+    """Tests du cache colonnaire AIS"""
+    
+    def test_warm_load_matches_source(self, ais_file, tmp_path):
+        """Le chargement depuis le cache redonne les mêmes valeurs et segments"""
+        expected = AISDataProcessor(ais_file).load_ais_data()
+        
+        processor = AISDataProcessor(ais_file, cache_dir=tmp_path / 'cache')
+        cold = processor.load_ais_data()
+        warm = AISDataProcessor(ais_file, cache_dir=tmp_path / 'cache').load_ais_data()
+        
+        assert processor.cache.is_valid(ais_file)
+        assert len(warm) == len(cold) == len(expected)
+        assert list(warm['MMSI'].astype(str)) == list(expected['MMSI'])
+        assert warm['LATITUDE'].tolist() == expected['LATITUDE'].tolist()
+        assert (warm['TSTAMP'].to_numpy() == expected['TSTAMP'].to_numpy()).all()
+    
+    def test_column_projection(self, ais_file, tmp_path):
+        """Seules les colonnes demandées sont chargées"""
+        processor = AISDataProcessor(ais_file, cache_dir=tmp_path / 'cache')
+        df = processor.load_ais_data(columns=['MMSI', 'LATITUDE'])
+        
+        assert list(df.columns) == ['MMSI', 'LATITUDE']
+    
+    def test_invalidation_on_source_change(self, ais_file, tmp_path):
+        """Une modification du fichier source invalide le cache"""
+        cache = AISColumnarCache(tmp_path / 'cache')
+        cache.build(ais_file)
+        assert cache.is_valid(ais_file)
+        
+        ais_file.write_text(json.dumps(make_ais_records(n_vessels=1, pings_per_vessel=3)))
+        
+        assert not cache.is_valid(ais_file)
+        assert cache.load(ais_file) is None
+        assert len(AISDataProcessor(ais_file, cache_dir=tmp_path / 'cache').load_ais_data()) == 3
+    
+    def test_columns_appearing_in_later_chunks(self, ais_file, tmp_path):
+        """Une colonne absente du premier chunk est ajoutée au schéma (manquante avant)"""
+        records = make_ais_records()
+        for i, record in enumerate(records[120:]):
+            record.update(DESTINATION=f'PORT_{i % 3}', HEADING=i)
+        ais_file.write_text(json.dumps(records))
+        cache = AISColumnarCache(tmp_path / 'cache')
+        cache.build(ais_file, chunk_size=50)
+        
+        expected = AISDataProcessor(ais_file).load_ais_data()
+        warm = cache.load(ais_file)
+        
+        assert list(warm.columns) == list(expected.columns)
+        assert warm['DESTINATION'].astype(object).fillna('-').tolist() == \
+            expected['DESTINATION'].fillna('-').tolist()
+        assert np.array_equal(warm['HEADING'].to_numpy(), expected['HEADING'].to_numpy(), equal_nan=True)
+        assert warm['HEADING'].isna().sum() == 120
+    
+    def test_build_directory(self, tmp_path):
+        """Pré-construction pour un répertoire, sans reconstruire les entrées à jour"""
+        source_dir = tmp_path / 'ais'
+        source_dir.mkdir()
+        for i in range(2):
+            (source_dir / f'day{i}.json').write_text(json.dumps(make_ais_records(seed=i)))
+        cache = AISColumnarCache(tmp_path / 'cache')
+        
+        assert len(cache.build_directory(source_dir)) == 2
+        assert cache.build_directory(source_dir) == []
+
+
 class TestGeospatialGraph:
     """Tests pour la construction du graphe géospatial"""
     
@@ -82,6 +1141,48 @@ class TestGeospatialGraph:
         
         graph = self.builder.get_graph()
         assert graph.has_edge("P1", "P2")
+    
+    def _add_grid(self, step=2.0):
+        for i, lat in enumerate(np.arange(-10, 10.01, step)):
+            for j, lon in enumerate(np.arange(90, 110.01, step)):
+                self.builder.add_waypoint(WayPoint(f"W{i}_{j}", f"W{i}_{j}", float(lat), float(lon), "waypoint"))
+    
+    def test_proximity_matches_linear_scan(self):
+        """L'index spatial retrouve le même waypoint qu'un balayage haversine complet"""
+        self._add_grid()
+        wps = list(self.builder.waypoints.values())
+        rng = np.random.default_rng(0)
+        
+        for lat, lon in zip(rng.uniform(-12, 12, 50), rng.uniform(88, 112, 50)):
+            distances = [geodesy.haversine_distance(lat, lon, wp.latitude, wp.longitude) for wp in wps]
+            best = int(np.argmin(distances))
+            expected = wps[best] if distances[best] <= 50 else None
+            
+            assert self.builder.get_waypoint_by_proximity(lat, lon, 50) is expected
+    
+    def test_index_rebuilt_after_new_waypoint(self):
+        """L'index est reconstruit paresseusement quand les waypoints changent"""
+        self._add_grid()
+        assert self.builder.get_waypoint_by_proximity(0.9, 100.9, 10) is None
+        
+        self.builder.add_waypoint(WayPoint("NEW", "New", 0.9, 100.9, "waypoint"))
+        
+        assert self.builder.get_waypoint_by_proximity(0.9, 100.9, 10).id == "NEW"
+    
+    def test_batch_queries(self):
+        """Requêtes k plus proches voisins et par rayon, en lot"""
+        self._add_grid()
+        
+        ids, distances = self.builder.nearest_waypoints(np.array([0.1, 50.0]), np.array([100.1, 0.0]),
+                                                        k=3, radius_nm=200)
+        within = self.builder.waypoints_within_radius(np.array([0.0]), np.array([100.0]), 121)
+        
+        assert ids.shape == (2, 3)
+        assert ids[0, 0] == "W5_5"
+        assert (np.diff(distances[0]) >= 0).all()
+        assert list(ids[1]) == [None, None, None]
+        assert within[0][0] == "W5_5"
+        assert len(within[0]) == 5  # le centre et ses 4 voisins à 2° (~120 NM)
 
 
 class TestOptimizer:
@@ -150,6 +1251,384 @@ class TestOptimizer:
         assert edge_data is not None
 
 
+class TestCSRGraph:
+    """Tests du graphe compilé (CSR) et du backend de recherche associé"""
+    
+    def test_compiled_adjacency(self):
+        """Successeurs, prédécesseurs et attributs alignés sur le graphe networkx"""
+        graph, waypoints = create_maritime_network()
+        csr = CSRGraph.from_networkx(graph, waypoints)
+        
+        assert csr.n_nodes == graph.number_of_nodes() and csr.n_edges == graph.number_of_edges()
+        for node_id in ['SG', 'SN', 'RT']:
+            i = csr.index[node_id]
+            successors = [csr.node_ids[j] for j in csr.targets[csr.offsets[i]:csr.offsets[i + 1]]]
+            predecessors = [csr.node_ids[j] for j in csr.in_sources[csr.in_offsets[i]:csr.in_offsets[i + 1]]]
+            assert sorted(successors) == sorted(graph.successors(node_id))
+            assert sorted(predecessors) == sorted(graph.predecessors(node_id))
+        
+        edge = csr.edge_index(csr.index['SG'], csr.index[next(iter(graph.successors('SG')))])
+        assert csr.attributes['time_hours'][edge] == graph.edges['SG', csr.node_ids[csr.targets[edge]]]['time_hours']
+    
+    def test_identical_paths_on_maritime_network(self):
+        """Le backend CSR retrouve exactement les chemins du parcours networkx"""
+        graph, waypoints = create_maritime_network()
+        optimizer = WeightedAStarOptimizer(graph, waypoints)
+        
+        for params in [OptimizationParams(), OptimizationParams(weight_time=2.0, weight_cost=0.1)]:
+            for start, end in [('SG', 'RT'), ('SH', 'LA'), ('SG', 'HA'), ('HK', 'GI')]:
+                path = optimizer.find_optimal_route(start, end, params, backend='csr')
+                assert path is not None
+                assert path == optimizer.find_optimal_route(start, end, params, backend='networkx')
+    
+    def test_blocked_edge_recompiles(self):
+        """Bloquer une arête invalide le graphe compilé; les deux backends l'évitent"""
+        graph = nx.DiGraph()
+        for u, v, hours in [('A', 'B', 10), ('B', 'C', 10), ('A', 'C', 25)]:
+            graph.add_edge(u, v, time_hours=hours, fuel_tons=0.0)
+        waypoints = {n: WayPoint(n, n, 0.0, 0.0, 'port') for n in 'ABC'}
+        optimizer = WeightedAStarOptimizer(graph, waypoints)
+        params = OptimizationParams(weight_cost=0, weight_risk=0)
+        
+        assert optimizer.find_optimal_route('A', 'C', params) == ['A', 'B', 'C']
+        version = optimizer.compiled_graph.version
+        optimizer.set_edge_blocked('B', 'C')
+        
+        assert optimizer.compiled_graph.version == version + 1
+        assert optimizer.find_optimal_route('A', 'C', params) == ['A', 'C']
+        assert optimizer.find_optimal_route('A', 'C', params, backend='networkx') == ['A', 'C']
+        assert optimizer.find_optimal_route('A', 'X', params) is None
+        with pytest.raises(ValueError):
+            WeightedAStarOptimizer(graph, waypoints, backend='igraph')
+    
+    def test_in_place_builder_update_recompiles(self):
+        """Arête modifiée en place par le builder AIS: graphe compilé et cache de routes invalidés"""
+        builder = GeospatialGraphBuilder()
+        for i in range(4):
+            builder.add_waypoint(WayPoint(f"N{i}", f"N{i}", 0.0, 0.0, 'waypoint'))
+        
+        def snapped(edges):
+            return pd.DataFrame([{'from_id': u, 'to_id': v, 'observations': 5, 'distance_nm': 60.0,
+                                  'time_hours': hours, 'fuel_tons': 0.0, 'edge_key': -1} for u, v, hours in edges])
+        
+        builder.add_edges_from_snapped(snapped([('N0', 'N1', 10), ('N1', 'N3', 10), ('N0', 'N2', 15), ('N2', 'N3', 15)]))
+        optimizer = WeightedAStarOptimizer(builder.get_graph(), builder.waypoints, route_cache=RouteCache())
+        params = OptimizationParams()
+        assert optimizer.find_optimal_route('N0', 'N3', params) == ['N0', 'N1', 'N3']
+        assert [wp.id for wp in optimizer.optimize_route('N0', 'N3', params).waypoints] == ['N0', 'N1', 'N3']
+        
+        builder.add_edges_from_snapped(snapped([('N1', 'N3', 40000)]))
+        assert optimizer.find_optimal_route('N0', 'N3', params) == ['N0', 'N2', 'N3']
+        assert optimizer.find_optimal_route('N0', 'N3', params, backend='networkx') == ['N0', 'N2', 'N3']
+        assert [wp.id for wp in optimizer.optimize_route('N0', 'N3', params).waypoints] == ['N0', 'N2', 'N3']
+    
+    def test_edge_cost_vector_memoized(self):
+        """Vecteur de coût identique à compute_edge_cost, mémoïsé par paramètres et version"""
+        graph, waypoints = create_maritime_network()
+        optimizer = WeightedAStarOptimizer(graph, waypoints)
+        params = OptimizationParams(weight_time=2.0, weight_cost=0.1)
+        csr = optimizer.compiled_graph
+        
+        costs = optimizer.edge_cost_vector(params)
+        for edge in range(0, csr.n_edges, 7):
+            u, v = csr.node_ids[csr.sources[edge]], csr.node_ids[csr.targets[edge]]
+            expected, _ = optimizer.compute_edge_cost(u, v, params, datetime.now())
+            assert costs[edge] == pytest.approx(expected)
+        
+        assert optimizer.edge_cost_vector(OptimizationParams(weight_time=2.0, weight_cost=0.1)) is costs
+        assert optimizer.cost_cache_stats == {'hits': 1, 'misses': 1}
+        
+        u, v = csr.node_ids[csr.sources[0]], csr.node_ids[csr.targets[0]]
+        optimizer.set_edge_blocked(u, v)
+        blocked = optimizer.edge_cost_vector(params)
+        assert blocked is not costs and np.isinf(blocked[optimizer.compiled_graph.edge_index(csr.sources[0], csr.targets[0])])
+    
+    def test_heuristic_table_matches_heuristic_cost(self):
+        """La table par destination contient exactement heuristic_cost et resert à la requête suivante"""
+        graph, waypoints = create_maritime_network()
+        optimizer = WeightedAStarOptimizer(graph, waypoints)
+        params = OptimizationParams()
+        csr = optimizer.compiled_graph
+        
+        optimizer.find_optimal_route('SG', 'RT', params)
+        table = optimizer.heuristic_table(csr.index['RT'], params)
+        filled = [i for i, h in enumerate(table) if h is not None]
+        assert filled
+        for i in filled:
+            assert table[i] == optimizer.heuristic_cost(csr.node_ids[i], 'RT', params)
+        
+        optimizer.find_optimal_route('SH', 'RT', params)
+        assert optimizer.heuristic_cache_stats == {'hits': 2, 'misses': 1}
+    
+    def test_landmarks_give_minimal_cost_paths(self, tmp_path):
+        """Repères ALT: chemins de coût minimal (Dijkstra), tables rechargées depuis le disque"""
+        graph, waypoints = create_maritime_network()
+        optimizer = WeightedAStarOptimizer(graph, waypoints, heuristic='landmarks')
+        indexes = optimizer.build_landmarks(n_landmarks=4, directory=str(tmp_path))
+        assert set(indexes) == {'balanced', 'time', 'safety'}
+        assert (tmp_path / 'landmarks_time' / 'forward.npy').exists()
+        
+        params = OptimizationParams(weight_time=2.0)
+        csr = optimizer.compiled_graph
+        costs = optimizer.edge_cost_vector(params)
+        
+        def weight(u, v, _):
+            return costs[csr.edge_index(csr.index[u], csr.index[v])]
+        
+        for start, end in [('SG', 'RT'), ('SH', 'LA'), ('HK', 'GI')]:
+            path = optimizer.find_optimal_route(start, end, params)
+            cost = sum(weight(u, v, None) for u, v in zip(path[:-1], path[1:]))
+            assert cost == pytest.approx(nx.dijkstra_path_length(graph, start, end, weight=weight))
+        
+        reloaded = LandmarkIndex.load(str(tmp_path / 'landmarks_time'), indexes['time'].fingerprint)
+        assert np.array_equal(reloaded.forward, indexes['time'].forward)
+        assert LandmarkIndex.load(str(tmp_path / 'landmarks_time'), 'autre graphe') is None
+        
+        # Graphe modifié: repères périmés, repli sur l'heuristique géodésique
+        optimizer.set_edge_blocked('SG', csr.node_ids[csr.targets[csr.offsets[csr.index['SG']]]])
+        assert optimizer.landmark_index(params) is None
+        assert optimizer.find_optimal_route('SH', 'LA', params) == optimizer.find_optimal_route('SH', 'LA', params, backend='networkx')
+    
+    def test_bidirectional_search_matches_minimal_cost(self):
+        """Recherche bidirectionnelle: même coût que Dijkstra et que l'A* avant par repères ALT"""
+        graph, waypoints = create_maritime_network()
+        optimizer = WeightedAStarOptimizer(graph, waypoints)
+        params = OptimizationParams()
+        csr = optimizer.compiled_graph
+        costs = optimizer.edge_cost_vector(params)
+        
+        def weight(u, v, _):
+            return costs[csr.edge_index(csr.index[u], csr.index[v])]
+        
+        for landmarks in (False, True):
+            if landmarks:
+                optimizer.build_landmarks({'balanced': params}, n_landmarks=4)
+            for start, end in [('SG', 'RT'), ('SH', 'LA'), ('SG', 'HA'), ('HK', 'GI'), ('SG', 'SG')]:
+                path = optimizer.find_optimal_route(start, end, params, bidirectional=True)
+                assert path[0] == start and path[-1] == end
+                cost = sum(weight(u, v, None) for u, v in zip(path[:-1], path[1:]))
+                assert cost == pytest.approx(nx.dijkstra_path_length(graph, start, end, weight=weight))
+                if landmarks:
+                    forward = optimizer.find_optimal_route(start, end, params, heuristic='landmarks')
+                    assert cost == pytest.approx(sum(weight(u, v, None) for u, v in zip(forward[:-1], forward[1:])))
+        
+        assert optimizer.find_optimal_route('SG', 'XX', params, bidirectional=True) is None
+    
+    def test_contraction_hierarchy_queries(self, tmp_path):
+        """Hiérarchie de contraction: coût minimal, chemins dépliés en arêtes d'origine, repli sur A*"""
+        graph, waypoints = create_maritime_network()
+        optimizer = WeightedAStarOptimizer(graph, waypoints)
+        assert optimizer.build_contraction_hierarchies(directory=str(tmp_path), build_missing=False) == {}
+        assert optimizer.contraction_hierarchy(OptimizationParams()) is None
+        indexes = optimizer.build_contraction_hierarchies(directory=str(tmp_path))
+        assert set(indexes) == {'balanced', 'time', 'safety'}
+        reloaded = WeightedAStarOptimizer(graph, waypoints).build_contraction_hierarchies(
+            directory=str(tmp_path), build_missing=False)
+        assert set(reloaded) == set(indexes)
+        
+        params = STANDARD_PRESETS['time']
+        csr = optimizer.compiled_graph
+        costs = optimizer.edge_cost_vector(params)
+        
+        def weight(u, v, _):
+            return costs[csr.edge_index(csr.index[u], csr.index[v])]
+        
+        for start, end in [('SG', 'RT'), ('SH', 'LA'), ('SG', 'HA'), ('HK', 'GI'), ('RT', 'RT')]:
+            path = optimizer.find_optimal_route(start, end, params)
+            assert path[0] == start and path[-1] == end
+            assert all(graph.has_edge(u, v) for u, v in zip(path[:-1], path[1:]))
+            cost = sum(weight(u, v, None) for u, v in zip(path[:-1], path[1:]))
+            assert cost == pytest.approx(nx.dijkstra_path_length(graph, start, end, weight=weight))
+        assert optimizer.construct_optimized_route(optimizer.find_optimal_route('SG', 'RT', params), params)
+        
+        reloaded = ContractionHierarchy.load(str(tmp_path / 'ch_time'), indexes['time'].fingerprint)
+        assert np.array_equal(reloaded.middles, indexes['time'].middles)
+        
+        # Poids personnalisés ou graphe modifié: A*
+        assert optimizer.contraction_hierarchy(OptimizationParams(weight_time=3.0)) is None
+        optimizer.set_edge_blocked('SG', csr.node_ids[csr.targets[csr.offsets[csr.index['SG']]]])
+        assert optimizer.contraction_hierarchy(params) is None
+        assert optimizer.find_optimal_route('SH', 'LA', params) == optimizer.find_optimal_route('SH', 'LA', params, backend='networkx')
+
+
+class TestRouteCache:
+    """Tests du cache de routes (LRU, TTL, invalidation par arête)"""
+    
+    def setup_method(self):
+        self.now = 0.0
+        self.cache = RouteCache(max_routes=3, ttl_seconds=60, clock=lambda: self.now)
+        graph, waypoints = create_maritime_network()
+        self.graph = graph
+        self.optimizer = WeightedAStarOptimizer(graph, waypoints, route_cache=self.cache)
+        self.params = OptimizationParams()
+    
+    def test_lru_and_ttl(self):
+        """Éviction du plus ancien au-delà de max_routes, expiration après ttl_seconds"""
+        for i in range(4):
+            self.cache.put(RouteCache.key('A', str(i), (), {}), ['A', str(i)], i)
+        assert len(self.cache) == 3 and self.cache.stats['evictions'] == 1
+        assert self.cache.get(RouteCache.key('A', '0', (), {})) is None
+        assert self.cache.get(RouteCache.key('A', '1', (), {})).route == 1
+        
+        self.now = 61
+        assert self.cache.get(RouteCache.key('A', '2', (), {})) is None
+        assert self.cache.stats['expirations'] == 1
+    
+    def test_optimize_route_hits_cache(self):
+        """Même requête (paramètres et options identiques): route servie par le cache"""
+        route = self.optimizer.optimize_route('SG', 'RT', self.params)
+        cached = self.optimizer.optimize_route('SG', 'RT', OptimizationParams())
+        assert cached == route and cached is not route
+        # Une copie par appel: modifier la route retournée n'altère pas le cache
+        cached.waypoints.clear()
+        route.segments.clear()
+        assert self.optimizer.optimize_route('SG', 'RT', self.params).waypoints
+        assert self.optimizer.optimize_route('SG', 'RT', self.params).segments
+        assert self.optimizer.optimize_route('SG', 'RT', self.params, bidirectional=True) is not route
+        assert self.cache.stats['hits'] == 3 and self.cache.stats['misses'] == 2
+    
+    def test_blocked_edge_invalidates_only_routes_using_it(self):
+        """Arête bloquée: routes qui l'empruntent invalidées, les autres restent en cache"""
+        through = self.optimizer.optimize_route('SG', 'RT', self.params)
+        other = self.optimizer.optimize_route('SH', 'LA', self.params)
+        path = [wp.id for wp in through.waypoints]
+        assert not set(zip(path[:-1], path[1:])) & {(wp.id, wq.id) for wp, wq in zip(other.waypoints[:-1], other.waypoints[1:])}
+        
+        self.optimizer.set_edge_blocked(path[0], path[1])
+        assert self.cache.stats['invalidations'] == 1
+        assert self.optimizer.optimize_route('SH', 'LA', self.params) == other
+        assert self.cache.stats['hits'] == 1
+        rerouted = self.optimizer.optimize_route('SG', 'RT', self.params)
+        assert rerouted is None or [wp.id for wp in rerouted.waypoints][:2] != path[:2]
+        
+        # Déblocage: une route plus courte peut réapparaître partout, le cache est vidé
+        self.optimizer.set_edge_blocked(path[0], path[1], blocked=False)
+        assert len(self.cache) == 0
+        assert [wp.id for wp in self.optimizer.optimize_route('SG', 'RT', self.params).waypoints] == path
+
+
+class TestParetoRoutes:
+    """Tests du front de Pareto (temps, coût carburant, risque) de /route/alternatives"""
+    
+    def _tradeoff_graph(self):
+        """A -> X -> D par cinq intermédiaires: (temps, carburant, risque) totaux par chemin"""
+        totals = {
+            'B': (10.0, 10.0, 1.0),   # rapide
+            'C': (20.0, 2.0, 1.0),    # économe
+            'E': (16.0, 8.0, 0.0),    # sûr
+            'F': (22.0, 12.0, 2.0),   # dominé
+            'G': (9.9, 10.3, 1.0),    # à moins de 5 % de B
+        }
+        graph = nx.DiGraph()
+        for middle, (hours, fuel, risk) in totals.items():
+            graph.add_edge('A', middle, time_hours=hours / 2, fuel_tons=fuel / 2, weather_risk=risk, piracy_risk=risk)
+            graph.add_edge(middle, 'D', time_hours=hours / 2, fuel_tons=fuel / 2, weather_risk=risk, piracy_risk=risk)
+        waypoints = {node: WayPoint(node, node, 0.0, float(i), 'waypoint')
+                     for i, node in enumerate(graph.nodes)}
+        return WeightedAStarOptimizer(graph, waypoints)
+    
+    def test_front_drops_dominated_and_epsilon_close_routes(self):
+        """ε = 0: tous les chemins non dominés; ε = 5 %: G confondu avec B"""
+        optimizer = self._tradeoff_graph()
+        params = OptimizationParams()
+        
+        exact = optimizer.pareto_routes('A', 'D', params, epsilon=0.0)
+        assert sorted(path[1] for path, _ in exact) == ['B', 'C', 'E', 'G']
+        assert exact[0][0] == optimizer.find_optimal_route('A', 'D', params)
+        
+        routes = optimizer.pareto_routes('A', 'D', params, epsilon=0.05)
+        assert sorted(path[1] for path, _ in routes) == ['B', 'C', 'E']
+        assert [(strategy, path[1]) for strategy, path, _ in select_alternatives(routes, 3)] == [
+            ('balanced', 'C'), ('time', 'B'), ('safety', 'E')
+        ]
+        assert len(select_alternatives(routes, 2)) == 2
+    
+    def test_front_matches_brute_force(self):
+        """Graphe aléatoire: front exact = vecteurs non dominés de tous les chemins simples"""
+        rng = random.Random(3)
+        graph = nx.gnp_random_graph(9, 0.35, seed=3, directed=True)
+        for u, v in graph.edges:
+            graph.edges[u, v].update(time_hours=rng.uniform(1, 10), fuel_tons=rng.uniform(1, 10),
+                                     weather_risk=rng.choice([0.0, 0.5, 1.0]), piracy_risk=0.0)
+        graph = nx.relabel_nodes(graph, str)
+        waypoints = {node: WayPoint(node, node, 0.0, float(node), 'waypoint') for node in graph.nodes}
+        optimizer = WeightedAStarOptimizer(graph, waypoints)
+        params = OptimizationParams(fuel_price_per_ton=1.0)
+        
+        def totals(path):
+            edges = [graph.edges[u, v] for u, v in zip(path[:-1], path[1:])]
+            return (sum(e['time_hours'] for e in edges), sum(e['fuel_tons'] for e in edges),
+                    sum(e['weather_risk'] / 2 for e in edges))
+        
+        vectors = [totals(path) for path in nx.all_simple_paths(graph, '0', '8')]
+        assert vectors
+        expected = {tuple(round(x, 9) for x in vector) for vector in vectors
+                    if not any(other != vector and all(o <= x for o, x in zip(other, vector)) for other in vectors)}
+        routes = optimizer.pareto_routes('0', '8', params, epsilon=0.0)
+        assert {tuple(round(x, 9) for x in costs) for _, costs in routes} == expected
+        for path, costs in routes:
+            assert np.allclose(totals(path), costs)
+    
+    def test_single_route_without_tradeoff(self):
+        """Réseau maritime: temps et carburant proportionnels à la distance, risque nul -> une seule route"""
+        graph, waypoints = create_maritime_network()
+        optimizer = WeightedAStarOptimizer(graph, waypoints)
+        routes = optimizer.pareto_routes('SG', 'RT', OptimizationParams())
+        assert len(routes) == 1
+        assert routes[0][0] == optimizer.find_optimal_route('SG', 'RT', OptimizationParams())
+        assert optimizer.pareto_routes('DU', 'PA', OptimizationParams()) == []
+
+
+class TestKShortestRoutes:
+    """Tests des k meilleures routes (Yen) de /route/alternatives?k="""
+    
+    def test_matches_networkx_simple_paths(self):
+        """Sans filtre de similarité: mêmes coûts que les k plus courts chemins simples de networkx"""
+        rng = random.Random(5)
+        graph = nx.relabel_nodes(nx.gnp_random_graph(40, 0.15, seed=5, directed=True), lambda i: f"N{i}")
+        for u, v in graph.edges:
+            graph.edges[u, v].update(time_hours=rng.uniform(1, 10), fuel_tons=rng.uniform(0.1, 1),
+                                     weather_risk=rng.choice([0, 1, 2]), piracy_risk=0)
+        waypoints = {node: WayPoint(node, node, 0.0, 0.0, 'waypoint') for node in graph.nodes}
+        optimizer = WeightedAStarOptimizer(graph, waypoints)
+        params = OptimizationParams()
+        csr = optimizer.compiled_graph
+        costs = optimizer.edge_cost_vector(params)
+        for u, v in graph.edges:
+            graph.edges[u, v]['cost'] = costs[csr.edge_index(csr.index[u], csr.index[v])]
+        
+        for start, end in [('N0', 'N30'), ('N17', 'N8')]:
+            routes = optimizer.k_shortest_routes(start, end, params, k=6, max_similarity=1.0)
+            expected = list(islice(nx.shortest_simple_paths(graph, start, end, weight='cost'), 6))
+            assert len({tuple(path) for path, _ in routes}) == 6
+            assert np.allclose([cost for _, cost in routes],
+                               [costs[csr.path_edges([csr.index[n] for n in path])].sum() for path in expected])
+            assert [path for path, _ in routes] == expected
+    
+    def test_similar_paths_suppressed(self):
+        """Détour B -> X -> C quasi identique au chemin direct: écarté sous max_similarity"""
+        graph = nx.DiGraph()
+        for u, v, hours in [('A', 'B', 10), ('B', 'C', 10), ('C', 'D', 10), ('B', 'X', 5.5), ('X', 'C', 5),
+                            ('A', 'Y', 20), ('Y', 'D', 20)]:
+            graph.add_edge(u, v, time_hours=hours, fuel_tons=0.0)
+        waypoints = {node: WayPoint(node, node, 0.0, float(i), 'waypoint') for i, node in enumerate(graph.nodes)}
+        optimizer = WeightedAStarOptimizer(graph, waypoints)
+        params = OptimizationParams()
+        
+        assert [path for path, _ in optimizer.k_shortest_routes('A', 'D', params, k=3, max_similarity=1.0)] == [
+            ['A', 'B', 'C', 'D'], ['A', 'B', 'X', 'C', 'D'], ['A', 'Y', 'D']
+        ]
+        routes = optimizer.k_shortest_routes('A', 'D', params, k=3, max_similarity=0.5)
+        assert [path for path, _ in routes] == [['A', 'B', 'C', 'D'], ['A', 'Y', 'D']]
+        assert [cost for _, cost in routes] == [30.0, 40.0]
+        
+        optimizer.set_edge_blocked('Y', 'D')
+        assert [path for path, _ in optimizer.k_shortest_routes('A', 'D', params, k=3, max_similarity=0.5)] == [
+            ['A', 'B', 'C', 'D']
+        ]
+        assert optimizer.k_shortest_routes('D', 'A', params) == []
+
+
 class TestDeviationMonitoring:
     """Tests pour l'agent de monitoring de déviation"""
     